@@ -15,9 +15,14 @@ def load_config():
     config['PROJECT_ROOT'] = project_root
     config['DB_PATH'] = os.path.join(project_root, config['database']['path'])
     config['GEN_DB_PATH'] = os.path.join(project_root, config['database']['generated_path'])
+    config['TARGET_DB_PATH'] = os.path.join(project_root, config['target_database']['path'])
+    config['RESULT_SPILL_PATH'] = os.path.join(project_root, config['result_cache']['spill_path'])
+    config['MATERIALIZATION_PATH'] = os.path.join(project_root, config['materialization']['path'])
     config['CATALOG_PATH'] = os.path.join(project_root, config['catalog']['output_path'])
     config['TEMPLATES_PATH'] = os.path.join(project_root, config['templates']['path'])
     config['SOURCE_PATH'] = os.path.join(project_root, config['source']['path'])
+    config['ANALYSIS_CACHE_PATH'] = os.path.join(project_root, config['analyzer']['cache_path'])
+    config['VECTOR_INDEX_PATH'] = os.path.join(project_root, config['vector_search']['index_dir'])
     
     return config
 
@@ -0,0 +1,87 @@
+"""
+Analysis Cache - SQL 분석 결과 캐시
+역할: 정규화된 SQL 본문 + 분석기 버전의 해시를 키로 sqlglot 분석 결과(JSON)를 디스크에 보관하여,
+      내용이 바뀌지 않은 SQL은 재파싱 없이 이전 분석 결과를 재사용
+구동자: sql_analyzer.py (inbox 처리 시 자동 사용)
+"""
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)""")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class AnalysisCache:
+    """content hash -> 분석 결과 JSON 을 저장하는 SQLite 기반 영속 캐시"""
+
+    def __init__(self, cache_path: str, analyzer_version: str):
+        self.cache_path = cache_path
+        self.analyzer_version = analyzer_version
+        self._conn = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        """프로세스별 연결 (워커 프로세스에 부모 연결을 공유하지 않음)"""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.cache_path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    content_hash TEXT PRIMARY KEY,
+                    analyzer_version TEXT,
+                    result TEXT NOT NULL,
+                    created_at TEXT
+                )
+            """)
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def normalize_sql(sql: str) -> str:
+        """따옴표 밖의 공백을 하나로 합치고 끝의 세미콜론 제거 (리터럴 내부는 그대로 유지)"""
+        parts = _QUOTED.split(sql.strip().rstrip(';').strip())
+        # split 결과에서 홀수 인덱스가 따옴표 리터럴
+        return ''.join(p if i % 2 else _WHITESPACE.sub(' ', p) for i, p in enumerate(parts))
+
+    def make_key(self, sql: str) -> str:
+        """정규화 SQL + 분석기 버전 -> sha256"""
+        content = f"{self.analyzer_version}\n{self.normalize_sql(sql)}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """캐시 조회 (없으면 None)"""
+        row = self._connect().execute(
+            "SELECT result FROM analysis_cache WHERE content_hash = ? AND analyzer_version = ?",
+            (content_hash, self.analyzer_version)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, content_hash: str, result: Dict[str, Any]):
+        """분석 결과 저장 (동일 키는 덮어씀)"""
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_cache (content_hash, analyzer_version, result, created_at) VALUES (?, ?, ?, ?)",
+            (content_hash, self.analyzer_version, json.dumps(result, ensure_ascii=False), datetime.now().isoformat())
+        )
+        conn.commit()
+
+    def purge_stale(self) -> int:
+        """현재 분석기 버전과 다른 항목 삭제"""
+        conn = self._connect()
+        cur = conn.execute("DELETE FROM analysis_cache WHERE analyzer_version != ?", (self.analyzer_version,))
+        conn.commit()
+        return cur.rowcount
@@ -0,0 +1,214 @@
+"""
+Inbox Watcher - 상주형 inbox 감시 데몬
+역할: data/source/inbox 를 주기적으로 감시하여 새로 들어온 SQL 파일을 디바운스 윈도우 단위의
+      마이크로 배치로 묶고, 배치마다 분석(sql_analyzer) + DB 등록(load_json_data)을 한 번에 수행
+      (인터프리터/sqlglot/프로세스 풀은 한 번만 기동하여 파일마다 시작 비용을 내지 않음)
+      배치 처리 중 예외가 나면 로그만 남기고 감시를 계속하며, 원인 파일은 하나씩 다시 처리하여 찾아 failed/ 로 격리
+      (워커 프로세스가 죽어 풀이 깨진 경우는 파일 문제가 아니므로 풀을 새로 만들어 다시 처리하고 격리하지 않음)
+구동자: 관리자 (서버 기동 시 백그라운드 프로세스로 실행)
+
+사용법: python engine/inbox_watcher.py [--workers N] [--debounce 2.0] [--split-statements]
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import traceback
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+# 프로젝트 루트 추가 및 설정 로드
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from config.loader import CFG
+
+from engine.sql_analyzer import SQLQueryAnalyzer
+from engine.load_json_data import QueryIndexerDB
+
+
+class InboxWatcher:
+    """inbox 폴링 + 디바운스 마이크로 배치 처리기"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        debounce: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        split_statements: Optional[bool] = None
+    ):
+        watcher_cfg = CFG.get('watcher', {})
+        analyzer_cfg = CFG.get('analyzer', {})
+
+        self.workers = workers if workers is not None else analyzer_cfg.get('workers', 1)
+        self.debounce = debounce if debounce is not None else watcher_cfg.get('debounce_seconds', 2.0)
+        self.poll_interval = poll_interval if poll_interval is not None else watcher_cfg.get('poll_interval_seconds', 0.5)
+        self.max_batch_size = max_batch_size if max_batch_size is not None else watcher_cfg.get('max_batch_size', 200)
+        self.split_statements = split_statements if split_statements is not None else analyzer_cfg.get('split_statements', False)
+
+        self.analyzer = SQLQueryAnalyzer()
+        self.indexer = QueryIndexerDB()
+        self.executor = None
+
+        # filename -> (size, mtime_ns): 직전 폴링 시점의 상태 (변화가 없어야 '쓰기 완료'로 간주)
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._last_arrival = 0.0
+        self._running = False
+
+        self.batches = 0
+        self.files_processed = 0
+
+    def _scan(self) -> List[str]:
+        """inbox 를 스캔하여 크기/수정시각이 직전 폴링과 같은(쓰기가 끝난) 파일 목록 반환"""
+        now = time.monotonic()
+        current = {}
+        stable = []
+        try:
+            entries = list(os.scandir(self.analyzer.inbox_dir))
+        except FileNotFoundError:
+            return []
+
+        for entry in entries:
+            if not entry.is_file() or not (entry.name.endswith('.sql') or entry.name.endswith('.txt')):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            state = (st.st_size, st.st_mtime_ns)
+            current[entry.name] = state
+            if self._seen.get(entry.name) != state:
+                # 새 파일이거나 아직 쓰는 중 -> 디바운스 타이머 재시작
+                self._last_arrival = now
+            else:
+                stable.append(entry.name)
+
+        self._seen = current
+        return sorted(stable)
+
+    def _ready(self, stable: List[str]) -> bool:
+        """배치 실행 조건: 디바운스 윈도우 동안 새 도착이 없거나 배치 최대 크기 도달"""
+        if not stable:
+            return False
+        if len(stable) >= self.max_batch_size:
+            return True
+        return time.monotonic() - self._last_arrival >= self.debounce
+
+    def process_batch(self, files: List[str]):
+        """마이크로 배치 하나: 분석 -> 템플릿 생성 -> TB_QUERY_ASSET 등록"""
+        started = time.perf_counter()
+        self.batches += 1
+        print(f"\n📦 배치 #{self.batches} 처리 시작 ({len(files)}개 파일)")
+
+        if self.split_statements:
+            outcomes = self.analyzer.process_dumps(files, workers=self.workers, executor=self.executor)
+        else:
+            outcomes = self.analyzer.process_files(files, workers=self.workers, executor=self.executor)
+
+        templates = [path for o in outcomes for path in o.get('templates', [])]
+        migrated = self.indexer.migrate_json_files(templates)['migrated'] if templates else 0
+        if migrated:
+            self.indexer.refresh_vector_index()
+
+        self.files_processed += len(files)
+
+        success_count = sum(1 for o in outcomes if o['success'])
+        elapsed = time.perf_counter() - started
+        print(f"✨ 배치 #{self.batches} 완료: 분석 성공 {success_count}/{len(files)}, "
+              f"등록 {migrated}/{len(templates)} ({elapsed:.2f}s)")
+
+    def _restart_executor(self):
+        """워커가 죽어(OOM kill/세그폴트) 깨진 프로세스 풀을 버리고 새로 생성 (깨진 풀은 이후 모든 제출이 실패함)"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.workers > 1:
+            self.executor = self.analyzer.create_executor(self.workers)
+
+    def _remaining(self, files: List[str]) -> List[str]:
+        """아직 inbox 에 남아 있는(success/failed 로 옮겨지지 않은) 파일"""
+        return [f for f in files if os.path.exists(os.path.join(self.analyzer.inbox_dir, f))]
+
+    def _process_safely(self, files: List[str], pool_retry: bool = True):
+        """
+        배치 하나를 처리하되 예외로 감시 루프가 끝나지 않게 함
+        - 프로세스 풀이 깨지면 풀을 새로 만들어 남은 파일로 한 번 다시 처리하고, 또 깨지면 inbox 에 남겨 다음 폴링에 재시도
+          (인프라 오류이므로 failed/ 로 옮기지 않음)
+        - 그 밖의 예외로 여러 파일 배치가 실패하면 inbox 에 남은 파일을 하나씩 다시 처리하고, 혼자서도 실패한 파일은 failed/ 로 격리
+        """
+        try:
+            self.process_batch(files)
+        except BrokenProcessPool:
+            print(f"💥 배치 #{self.batches} 중 워커 프로세스 종료 ({len(files)}개 파일): 프로세스 풀을 새로 만듭니다")
+            self._restart_executor()
+            remaining = self._remaining(files)
+            if remaining and pool_retry:
+                self._process_safely(remaining, pool_retry=False)
+            elif remaining:
+                print(f"⏳ {len(remaining)}개 파일은 inbox 에 남겨 다음 폴링 때 다시 처리합니다")
+        except Exception:
+            error_log = traceback.format_exc()
+            print(f"💥 배치 #{self.batches} 실패 ({len(files)}개 파일): {error_log.strip().splitlines()[-1]}")
+            # 분석 성공으로 이미 success/ 로 옮겨진 파일은 제외 (템플릿 JSON 은 다음 일괄 등록 때 반영)
+            remaining = self._remaining(files)
+            if len(files) > 1:
+                for filename in remaining:
+                    self._process_safely([filename], pool_retry)
+            else:
+                for filename in remaining:
+                    self.analyzer._commit_failure(filename, error_log)
+        finally:
+            for filename in files:
+                self._seen.pop(filename, None)
+
+    def run(self):
+        """감시 루프 (SIGINT/SIGTERM 시 진행 중인 배치를 마친 뒤 종료)"""
+        self.indexer.create_tables()
+        if self.workers > 1:
+            self.executor = self.analyzer.create_executor(self.workers)
+
+        self._running = True
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+
+        mode = f"병렬 {self.workers} workers" if self.workers > 1 else "순차"
+        print(f"👀 Inbox 감시 시작: {self.analyzer.inbox_dir} "
+              f"(debounce {self.debounce}s, poll {self.poll_interval}s, {mode})")
+        try:
+            while self._running:
+                stable = self._scan()
+                if self._ready(stable):
+                    self._process_safely(stable[:self.max_batch_size])
+                else:
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+            print(f"\n🛑 감시 종료: 배치 {self.batches}개, 파일 {self.files_processed}개 처리")
+
+    def stop(self):
+        """현재 배치 완료 후 루프 종료 요청"""
+        self._running = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inbox Watcher (analyze + migrate daemon)")
+    parser.add_argument("--workers", type=int, default=None, help="병렬 분석 프로세스 수 (기본: config analyzer.workers)")
+    parser.add_argument("--debounce", type=float, default=None, help="마지막 도착 후 배치 실행까지 대기 시간(초)")
+    parser.add_argument("--poll-interval", type=float, default=None, help="inbox 폴링 간격(초)")
+    parser.add_argument("--split-statements", action="store_true", default=None, help="inbox 파일을 다중 문장 덤프로 처리")
+    args = parser.parse_args()
+
+    watcher = InboxWatcher(
+        workers=args.workers,
+        debounce=args.debounce,
+        poll_interval=args.poll_interval,
+        split_statements=args.split_statements
+    )
+    watcher.run()
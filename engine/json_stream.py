@@ -0,0 +1,146 @@
+"""
+JSON Template Stream - 대용량 템플릿 번들 점진 파서
+역할: 템플릿 여러 개를 담은 JSON 배열(`[{...}, {...}]`) 또는 JSONL(한 줄에 템플릿 하나) 번들을
+      일정 크기 청크 단위로 읽으며 레코드를 하나씩 생성 (파일 전체를 메모리에 올리지 않음)
+구동자: load_json_data.py (번들 마이그레이션)
+"""
+
+import re
+import json
+import codecs
+import hashlib
+from typing import Any, BinaryIO, Callable, Iterator, Optional, TextIO, Tuple
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class HashingReader:
+    """바이너리 스트림을 UTF-8 텍스트로 읽으면서 원본 바이트의 sha256 을 함께 계산"""
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._digest = hashlib.sha256()
+
+    def read(self, size: int) -> str:
+        data = self._raw.read(size)
+        self._digest.update(data)
+        return self._decoder.decode(data, final=not data)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def iter_json_records(
+    stream: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_error: Optional[Callable[[int, Exception], None]] = None
+) -> Iterator[Tuple[int, Any]]:
+    """
+    번들 스트림에서 레코드를 하나씩 생성 -> (순번(1부터), 레코드)
+
+    첫 글자가 '[' 이면 JSON 배열, 그 외에는 JSONL 로 처리합니다.
+    JSONL 은 줄 단위로 복구가 가능하므로 깨진 줄은 on_error(순번, 예외) 로 보고하고 건너뜁니다
+    (on_error 가 없으면 예외 발생). JSON 배열의 문법 오류는 이후 위치를 알 수 없으므로 항상 예외입니다.
+    """
+    reader = _ChunkBuffer(stream, chunk_size)
+    if not reader.skip_whitespace():
+        return
+    if reader.peek() == '[':
+        reader.pos += 1
+        yield from _iter_array(reader)
+    else:
+        yield from _iter_lines(reader, on_error)
+
+
+class _ChunkBuffer:
+    """청크 단위로 채워지는 텍스트 버퍼 (소비한 앞부분은 주기적으로 잘라냄)"""
+
+    def __init__(self, stream: TextIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """청크 하나를 더 읽음 (EOF 면 False)"""
+        if self.eof:
+            return False
+        # 하나의 레코드가 버퍼보다 크면 읽는 크기를 늘려 재시도 횟수를 로그 수준으로 유지
+        chunk = self.stream.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> bool:
+        """공백을 건너뛰고 다음 글자가 있으면 True"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return True
+            if not self.fill():
+                return False
+
+    def peek(self) -> str:
+        return self.buf[self.pos]
+
+
+def _iter_array(reader: _ChunkBuffer) -> Iterator[Tuple[int, Any]]:
+    ordinal = 0
+    while True:
+        if not reader.skip_whitespace():
+            raise ValueError(f"JSON 배열이 닫히지 않았습니다 (레코드 {ordinal}개 이후)")
+        token = reader.peek()
+        if token == ']':
+            return
+        if ordinal:
+            if token != ',':
+                raise ValueError(f"레코드 {ordinal} 뒤에 ',' 또는 ']' 가 필요합니다: {token!r}")
+            reader.pos += 1
+            if not reader.skip_whitespace():
+                raise ValueError(f"JSON 배열이 닫히지 않았습니다 (레코드 {ordinal}개 이후)")
+
+        while True:
+            try:
+                record, end = _DECODER.raw_decode(reader.buf, reader.pos)
+                # 버퍼 끝에서 끝난 값은 다음 청크에서 이어질 수 있음 (숫자/리터럴)
+                if end < len(reader.buf) or reader.eof:
+                    break
+            except json.JSONDecodeError as e:
+                if reader.eof:
+                    raise ValueError(f"레코드 {ordinal + 1} 파싱 실패: {e}") from e
+            # 레코드가 청크 경계에 걸침 -> 더 읽고 재시도
+            reader.fill()
+
+        ordinal += 1
+        reader.pos = end
+        yield ordinal, record
+
+
+def _iter_lines(reader: _ChunkBuffer, on_error) -> Iterator[Tuple[int, Any]]:
+    ordinal = 0
+    while True:
+        newline = reader.buf.find('\n', reader.pos)
+        if newline < 0:
+            if reader.fill():
+                continue
+            newline = len(reader.buf)
+        line = reader.buf[reader.pos:newline].strip()
+        reader.pos = newline + 1
+        if line:
+            ordinal += 1
+            try:
+                yield ordinal, json.loads(line)
+            except json.JSONDecodeError as e:
+                if on_error is None:
+                    raise ValueError(f"레코드 {ordinal} 파싱 실패: {e}") from e
+                on_error(ordinal, e)
+        if reader.pos > len(reader.buf) and reader.eof:
+            return
@@ -11,8 +11,11 @@ import sqlite3
 import json
 import os
 import sys
+import time
+import hashlib
+import argparse
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # 프로젝트 루트 추가 및 설정 로드
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,6 +24,9 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 from config.loader import CFG
 
+from engine.json_stream import HashingReader, iter_json_records
+from engine import template_vectors
+
 
 class QueryIndexerDB:
     """SQL 쿼리 JSON을 SQLite로 마이그레이션 (이력 관리 포함)"""
@@ -28,9 +34,12 @@ class QueryIndexerDB:
     def __init__(self, db_name=None):
         self.db_path = CFG['DB_PATH']
         self.data_dir = CFG['TEMPLATES_PATH']
+        self.vector_dim = CFG.get('vector_search', {}).get('dim', template_vectors.DEFAULT_DIM)
+        self.vector_index_dir = CFG['VECTOR_INDEX_PATH']
         
     def create_tables(self):
         """데이터베이스 스키마 생성 (IF NOT EXISTS)"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -118,16 +127,169 @@ class QueryIndexerDB:
             )
         """)
 
+        # 4. TB_TEMPLATE_MANIFEST: 등록된 템플릿 파일 상태 (증분 마이그레이션용)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS TB_TEMPLATE_MANIFEST (
+                file_path TEXT PRIMARY KEY, -- templates 디렉토리 기준 상대 경로 (외부 파일은 절대 경로)
+                file_size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT, -- sha256
+                query_id TEXT,
+                migrated_at TEXT
+            )
+        """)
+
+        # 5. TB_QUERY_SEARCH: 검색용 FTS5 (rowid = TB_QUERY_ASSET.id, 한글 부분 일치를 위해 trigram 토크나이저)
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS TB_QUERY_SEARCH USING fts5(
+                question, description, entities, tags, aliases,
+                tokenize = 'trigram'
+            )
+        """)
+
+        # 6. TB_QUERY_VECTOR: 유사도 검색용 템플릿 벡터 (float32 BLOB, 인덱스 파일 내보내기의 원본)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS TB_QUERY_VECTOR (
+                asset_id INTEGER PRIMARY KEY, -- TB_QUERY_ASSET.id
+                unit_type TEXT,
+                vector BLOB NOT NULL
+            )
+        """)
+
+        # 7. TB_CATALOG_STATE: 템플릿이 등록/이동될 때마다 증가하는 세대 번호 (MCP 서버 템플릿 캐시 무효화용)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS TB_CATALOG_STATE (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                generation INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO TB_CATALOG_STATE (id, generation) VALUES (1, 0)")
+
         # 인덱스
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_asset_query_id ON TB_QUERY_ASSET(query_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_asset_question ON TB_QUERY_ASSET(question)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_asset_unit_type ON TB_QUERY_ASSET(unit_type)")
+        # 목록/짧은 검색어의 키셋 페이지 (ORDER BY created_at DESC, query_id DESC 를 정렬 없이 인덱스 역순으로 읽음)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_asset_created ON TB_QUERY_ASSET(created_at, query_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_asset_unit_created ON TB_QUERY_ASSET(unit_type, created_at, query_id)")
+        # 하위 테이블 query_id 인덱스 (Move-then-Insert 의 DELETE 가 전체 스캔하지 않도록)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_select_columns_query_id ON query_select_columns(query_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_joins_query_id ON query_joins(query_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_where_conditions_query_id ON query_where_conditions(query_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_vector_unit_type ON TB_QUERY_VECTOR(unit_type, asset_id)")
+        
+        # 기존 DB(검색 인덱스 도입 전)는 자산 테이블로부터 한 번 채움
+        cursor.execute("SELECT (SELECT COUNT(*) FROM TB_QUERY_ASSET) != (SELECT COUNT(*) FROM TB_QUERY_SEARCH)")
+        if cursor.fetchone()[0]:
+            self.rebuild_search_index(cursor)
+        # 벡터도 동일 (vector_search.dim 이 바뀐 경우 포함)
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM TB_QUERY_ASSET) != (SELECT COUNT(*) FROM TB_QUERY_VECTOR)
+                OR EXISTS (SELECT 1 FROM TB_QUERY_VECTOR WHERE length(vector) != ?)
+        """, (self.vector_dim * 4,))
+        if cursor.fetchone()[0]:
+            self.rebuild_vectors(cursor)
         
         conn.commit()
         conn.close()
         print(f"✅ DB 스키마 생성 완료 (TB_QUERY_ASSET/HISTORY 적용): {self.db_path}")
+
+    @staticmethod
+    def rebuild_search_index(cursor) -> int:
+        """TB_QUERY_SEARCH 를 TB_QUERY_ASSET / query_select_columns 기준으로 재구성 (커밋은 호출자가 담당)"""
+        cursor.execute("DELETE FROM TB_QUERY_SEARCH")
+        cursor.execute("""
+            INSERT INTO TB_QUERY_SEARCH (rowid, question, description, entities, tags, aliases)
+            SELECT a.id, a.question, a.description,
+                   (SELECT group_concat(value, ' ') FROM json_each(CASE WHEN json_valid(a.entities) THEN a.entities ELSE '[]' END)),
+                   (SELECT group_concat(value, ' ') FROM json_each(CASE WHEN json_valid(a.tags) THEN a.tags ELSE '[]' END)),
+                   (SELECT group_concat(DISTINCT c.alias) FROM query_select_columns c WHERE c.query_id = a.query_id)
+            FROM TB_QUERY_ASSET a
+        """)
+        return cursor.rowcount
+
+    def rebuild_vectors(self, cursor) -> int:
+        """TB_QUERY_VECTOR 를 TB_QUERY_ASSET / query_joins / query_select_columns 기준으로 재구성 (커밋은 호출자가 담당)"""
+        cursor.execute("DELETE FROM TB_QUERY_VECTOR")
+        assets = cursor.execute("""
+            SELECT a.id, a.unit_type, a.question, a.entities, a.from_table,
+                   (SELECT group_concat(j.table_name, char(31)) FROM query_joins j WHERE j.query_id = a.query_id),
+                   (SELECT group_concat(DISTINCT c.alias) FROM query_select_columns c WHERE c.query_id = a.query_id)
+            FROM TB_QUERY_ASSET a
+        """).fetchall()
+        rows = []
+        for asset_id, unit_type, question, entities, from_table, join_tables, aliases in assets:
+            try:
+                entity_list = json.loads(entities) if entities else []
+            except ValueError:
+                entity_list = []
+            fields = template_vectors.template_fields(
+                question, entity_list,
+                [from_table] + (join_tables.split(chr(31)) if join_tables else []),
+                aliases.split(',') if aliases else []
+            )
+            rows.append((asset_id, unit_type, template_vectors.vectorize(fields, self.vector_dim).tobytes()))
+        cursor.executemany("INSERT INTO TB_QUERY_VECTOR (asset_id, unit_type, vector) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def _template_vector(self, data: Dict[str, Any]) -> bytes:
+        """템플릿 -> 유사도 검색 벡터 (float32 bytes)"""
+        structure = data['sql']['structure']
+        fields = template_vectors.template_fields(
+            data['question'],
+            data.get('entities', []),
+            [structure['from_table']] + [join['table'] for join in structure['joins']],
+            self._search_document(data)[4].split(',')
+        )
+        return template_vectors.vectorize(fields, self.vector_dim).tobytes()
+
+    def refresh_vector_index(self, changed: bool = True) -> bool:
+        """등록 내용이 바뀌었거나 인덱스 파일이 DB 와 맞지 않으면(없음/차원·건수 불일치) 다시 내보냄"""
+        if not changed:
+            try:
+                with open(os.path.join(self.vector_index_dir, template_vectors.META_FILE), 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    count = conn.execute("SELECT COUNT(*) FROM TB_QUERY_VECTOR").fetchone()[0]
+                finally:
+                    conn.close()
+                changed = meta.get('dim') != self.vector_dim or meta.get('count') != count
+            except (OSError, ValueError):
+                changed = True
+        if changed:
+            self.export_vector_index()
+        return changed
+
+    def export_vector_index(self) -> int:
+        """TB_QUERY_VECTOR 를 unit_type 순 연속 float32 행렬 파일로 내보냄 (MCP 서버가 메모리 매핑) -> 행 수"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM TB_QUERY_VECTOR").fetchone()[0]
+            rows = conn.execute("SELECT asset_id, unit_type, vector FROM TB_QUERY_VECTOR ORDER BY unit_type, asset_id")
+            template_vectors.write_index(self.vector_index_dir, rows, count, self.vector_dim)
+        finally:
+            conn.close()
+        print(f"🧭 벡터 인덱스 갱신: {count}개 ({self.vector_index_dir})")
+        return count
+
+    @staticmethod
+    def _search_document(data: Dict[str, Any]) -> tuple:
+        """템플릿 -> 검색 인덱스 컬럼 (question, description, entities, tags, aliases)"""
+        if 'presentation_presets' in data:
+            columns = [col for cols in data['presentation_presets'].values() for col in cols]
+        else:
+            columns = data['sql']['structure']['select_columns']
+        aliases = list(dict.fromkeys(col.get('alias') for col in columns if col.get('alias')))
+        return (
+            data['question'],
+            data.get('description'),
+            ' '.join(map(str, data.get('entities', []))),
+            ' '.join(map(str, data['metadata'].get('tags', []))),
+            ','.join(aliases)
+        )
     
-    def _archive_existing_query(self, cursor, query_id: str):
+    def _archive_existing_query(self, cursor, query_id: str, reason: str = 'UPDATE'):
         """
         동일한 query_id가 존재하면 History로 이동(Move) 후 삭제.
         설계서의 'Move-then-Insert' 로직 구현.
@@ -142,117 +304,180 @@ class QueryIndexerDB:
             cursor.execute("""
                 INSERT INTO TB_QUERY_HISTORY (asset_id, query_id, question, original_sql, archived_at, reason)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (asset_id, q_id, question, sql, datetime.now().isoformat(), 'UPDATE'))
+            """, (asset_id, q_id, question, sql, datetime.now().isoformat(), reason))
             
             # Asset에서 Delete
             cursor.execute("DELETE FROM TB_QUERY_ASSET WHERE id = ?", (asset_id,))
+            cursor.execute("DELETE FROM TB_QUERY_SEARCH WHERE rowid = ?", (asset_id,))
+            cursor.execute("DELETE FROM TB_QUERY_VECTOR WHERE asset_id = ?", (asset_id,))
+            self._bump_generation(cursor)
             
             # 하위 테이블 데이터 삭제 (Cascade가 없으므로 수동 삭제)
             cursor.execute("DELETE FROM query_select_columns WHERE query_id = ?", (q_id,))
             cursor.execute("DELETE FROM query_joins WHERE query_id = ?", (q_id,))
             cursor.execute("DELETE FROM query_where_conditions WHERE query_id = ?", (q_id,))
             
-            print(f"  Start Archiving: 기존 {query_id} 쿼리를 History로 이동하고 삭제했습니다.")
+            print(f"  Start Archiving: 기존 {query_id} 쿼리를 History로 이동하고 삭제했습니다. ({reason})")
             return True
         return False
 
+    @staticmethod
+    def _bump_generation(cursor):
+        """카탈로그 세대 번호 증가 (같은 트랜잭션으로 커밋되므로 커밋 전에는 다른 연결에 보이지 않음)"""
+        cursor.execute("UPDATE TB_CATALOG_STATE SET generation = generation + 1 WHERE id = 1")
+
+    def _insert_template(self, cursor, data: Dict[str, Any]) -> int:
+        """
+        템플릿 하나를 Move-then-Insert 로 등록 (커밋은 호출자가 담당)
+        하위 테이블은 executemany 로 일괄 삽입 -> 삽입된 행 수 반환
+        """
+        query_id = data['query_id']
+        
+        # 1. Move (Archive if exists)
+        self._archive_existing_query(cursor, query_id)
+        
+        # 2. Insert New Asset
+        cursor.execute("""
+            INSERT INTO TB_QUERY_ASSET (
+                query_id, question, description, unit_type, unit_description,
+                entities, presentation_type, presentation_config,
+                from_table, group_by, order_by,
+                original_sql, normalized_sql,
+                created_at, modified_at, modification_count,
+                tags, complexity, estimated_rows, identity_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            data['query_id'],
+            data['question'],
+            data.get('description'),
+            data['unit_type'],
+            data['unit_description'],
+            json.dumps(data.get('entities', []), ensure_ascii=False),
+            data['presentation_type'],
+            json.dumps(data.get('presentation_config', {}), ensure_ascii=False),
+            data['sql']['structure']['from_table'],
+            json.dumps(data['sql']['structure'].get('group_by', []), ensure_ascii=False),
+            json.dumps(data['sql']['structure'].get('order_by', []), ensure_ascii=False),
+            data['sql']['original'],
+            data['sql']['normalized'],
+            data['metadata']['created_at'],
+            data['metadata'].get('modified_at'),
+            data['metadata'].get('modification_count', 0),
+            json.dumps(data['metadata'].get('tags', []), ensure_ascii=False),
+            data['metadata']['complexity'],
+            data['metadata'].get('estimated_rows'),
+            data['metadata'].get('identity_hash')
+        ))
+        asset_id = cursor.lastrowid
+        self._bump_generation(cursor)
+        cursor.execute("""
+            INSERT INTO TB_QUERY_SEARCH (rowid, question, description, entities, tags, aliases)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (asset_id,) + self._search_document(data))
+        cursor.execute(
+            "INSERT INTO TB_QUERY_VECTOR (asset_id, unit_type, vector) VALUES (?, ?, ?)",
+            (asset_id, data['unit_type'], self._template_vector(data))
+        )
+        
+        # 3. Insert Sub-tables
+        # SELECT Columns
+        if 'presentation_presets' in data:
+            select_rows = [
+                (query_id, col.get('alias'), col.get('expression'),
+                 col.get('table'), col.get('column'), col.get('aggregation'), category)
+                for category, cols in data['presentation_presets'].items()
+                for col in cols
+            ]
+        else:
+            # Legacy Fallback
+            select_rows = [
+                (query_id, col.get('alias'), col.get('expression'),
+                 col.get('table'), col.get('column'), col.get('aggregation'), 'all')
+                for col in data['sql']['structure']['select_columns']
+            ]
+        cursor.executemany("""
+            INSERT INTO query_select_columns (
+                query_id, alias, expression, table_name, column_name, aggregation, category
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, select_rows)
+
+        # JOINS
+        join_rows = [
+            (query_id, join['type'], join['table'], join['on_condition'], join['relationship'])
+            for join in data['sql']['structure']['joins']
+        ]
+        cursor.executemany("""
+            INSERT INTO query_joins (
+                query_id, join_type, table_name, on_condition, relationship
+            ) VALUES (?, ?, ?, ?, ?)
+        """, join_rows)
+        
+        # WHERE Conditions (structure.partition_keys 로 선언된 컬럼의 조건은 partition_key 로 저장)
+        partition_keys = {k.lower() for k in data['sql']['structure'].get('partition_keys', [])}
+        where_rows = [
+            (query_id, cond['column'], cond['operator'], cond['value'],
+             "partition_key" if cond['column'].rsplit('.', 1)[-1].lower() in partition_keys else cond['type'])
+            for cond in data['sql']['structure']['where_conditions']
+        ]
+        cursor.executemany("""
+            INSERT INTO query_where_conditions (
+                query_id, column_name, operator, value, condition_type
+            ) VALUES (?, ?, ?, ?, ?)
+        """, where_rows)
+
+        return 3 + len(select_rows) + len(join_rows) + len(where_rows)
+
+    def _manifest_key(self, json_filepath: str) -> str:
+        """manifest 키: templates 디렉토리 내부 파일은 상대 경로, 외부 파일은 절대 경로"""
+        abs_path = os.path.abspath(json_filepath)
+        data_dir = os.path.abspath(self.data_dir)
+        if os.path.dirname(abs_path) == data_dir:
+            return os.path.basename(abs_path)
+        return abs_path
+
+    @staticmethod
+    def _load_manifest(cursor) -> Dict[str, tuple]:
+        """manifest 전체를 메모리로 로드 -> {file_path: (file_size, mtime_ns, content_hash, query_id)}"""
+        cursor.execute("SELECT file_path, file_size, mtime_ns, content_hash, query_id FROM TB_TEMPLATE_MANIFEST")
+        return {row[0]: row[1:] for row in cursor.fetchall()}
+
+    @staticmethod
+    def _upsert_manifest(cursor, key: str, file_size: int, mtime_ns: int, content_hash: str,
+                         query_id: Optional[str], migrated: Optional[bool] = None):
+        """manifest 갱신 (migrated=False 면 등록 시각은 유지; 기본값은 query_id 유무로 판단)"""
+        if migrated is None:
+            migrated = query_id is not None
+        cursor.execute("""
+            INSERT INTO TB_TEMPLATE_MANIFEST (file_path, file_size, mtime_ns, content_hash, query_id, migrated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file_path) DO UPDATE SET
+                file_size = excluded.file_size,
+                mtime_ns = excluded.mtime_ns,
+                content_hash = excluded.content_hash,
+                query_id = COALESCE(excluded.query_id, TB_TEMPLATE_MANIFEST.query_id),
+                migrated_at = COALESCE(excluded.migrated_at, TB_TEMPLATE_MANIFEST.migrated_at)
+        """, (key, file_size, mtime_ns, content_hash, query_id, datetime.now().isoformat() if migrated else None))
+
     def migrate_json_file(self, json_filepath: str):
         """단일 JSON 파일을 DB로 마이그레이션"""
         if not os.path.exists(json_filepath):
             print(f"❌ 파일을 찾을 수 없습니다: {json_filepath}")
             return False
         
-        with open(json_filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(json_filepath, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        st = os.stat(json_filepath)
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         try:
-            query_id = data['query_id']
-            
-            # 1. Move (Archive if exists)
-            self._archive_existing_query(cursor, query_id)
-            
-            # 2. Insert New Asset
-            cursor.execute("""
-                INSERT INTO TB_QUERY_ASSET (
-                    query_id, question, description, unit_type, unit_description,
-                    entities, presentation_type, presentation_config,
-                    from_table, group_by, order_by,
-                    original_sql, normalized_sql,
-                    created_at, modified_at, modification_count,
-                    tags, complexity, estimated_rows
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                data['query_id'],
-                data['question'],
-                data.get('description'),
-                data['unit_type'],
-                data['unit_description'],
-                json.dumps(data.get('entities', []), ensure_ascii=False),
-                data['presentation_type'],
-                json.dumps(data.get('presentation_config', {}), ensure_ascii=False),
-                data['sql']['structure']['from_table'],
-                json.dumps(data['sql']['structure'].get('group_by', []), ensure_ascii=False),
-                json.dumps(data['sql']['structure'].get('order_by', []), ensure_ascii=False),
-                data['sql']['original'],
-                data['sql']['normalized'],
-                data['metadata']['created_at'],
-                data['metadata'].get('modified_at'),
-                data['metadata'].get('modification_count', 0),
-                json.dumps(data['metadata'].get('tags', []), ensure_ascii=False),
-                data['metadata']['complexity'],
-                data['metadata'].get('estimated_rows')
-            ))
-            
-            # 3. Insert Sub-tables
-            # SELECT Columns
-            if 'presentation_presets' in data:
-                for category, cols in data['presentation_presets'].items():
-                    for col in cols:
-                        cursor.execute("""
-                            INSERT INTO query_select_columns (
-                                query_id, alias, expression, table_name, column_name, aggregation, category
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            query_id, col.get('alias'), col.get('expression'),
-                            col.get('table'), col.get('column'), col.get('aggregation'), category
-                        ))
-            else:
-                 # Legacy Fallback
-                for col in data['sql']['structure']['select_columns']:
-                    cursor.execute("""
-                        INSERT INTO query_select_columns (
-                            query_id, alias, expression, table_name, column_name, aggregation, category
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        query_id, col.get('alias'), col.get('expression'),
-                        col.get('table'), col.get('column'), col.get('aggregation'), 'all'
-                    ))
-
-            # JOINS
-            for join in data['sql']['structure']['joins']:
-                cursor.execute("""
-                    INSERT INTO query_joins (
-                        query_id, join_type, table_name, on_condition, relationship
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, (
-                    query_id, join['type'], join['table'], join['on_condition'], join['relationship']
-                ))
-            
-            # WHERE Conditions
-            for cond in data['sql']['structure']['where_conditions']:
-                cursor.execute("""
-                    INSERT INTO query_where_conditions (
-                        query_id, column_name, operator, value, condition_type
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, (
-                    query_id, cond['column'], cond['operator'], cond['value'], cond['type']
-                ))
-            
+            self._insert_template(cursor, data)
+            self._upsert_manifest(cursor, self._manifest_key(json_filepath), st.st_size, st.st_mtime_ns,
+                                  hashlib.sha256(raw).hexdigest(), data['query_id'])
             conn.commit()
-            print(f"  ✅ {query_id} 등록 완료")
+            print(f"  ✅ {data['query_id']} 등록 완료")
             return True
             
         except Exception as e:
@@ -261,29 +486,275 @@ class QueryIndexerDB:
             return False
         finally:
             conn.close()
+
+    def _connect_bulk(self) -> sqlite3.Connection:
+        """일괄 등록용 연결 (isolation_level=None: 트랜잭션/SAVEPOINT 를 직접 제어)"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _insert_with_savepoint(self, cursor, data: Any, stats: Dict[str, Any], label: str) -> bool:
+        """템플릿 하나를 SAVEPOINT 안에서 등록 (실패 시 해당 템플릿만 롤백하고 stats 에 반영)"""
+        cursor.execute("SAVEPOINT template")
+        try:
+            if not isinstance(data, dict):
+                raise ValueError(f"템플릿은 JSON 객체여야 합니다 ({type(data).__name__})")
+            stats["rows"] += self._insert_template(cursor, data)
+            cursor.execute("RELEASE template")
+            stats["migrated"] += 1
+            return True
+        except Exception as e:
+            cursor.execute("ROLLBACK TO template")
+            cursor.execute("RELEASE template")
+            stats["failed"] += 1
+            print(f"  ❌ {label} 등록 실패: {str(e)}")
+            return False
+
+    def migrate_json_files(self, json_filepaths: List[str], batch_size: Optional[int] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        여러 JSON 파일을 하나의 연결로 일괄 마이그레이션 (Bulk Path)
+        - 템플릿마다 SAVEPOINT: 실패한 템플릿만 롤백하고 나머지는 계속 진행
+        - batch_size 개 템플릿마다 COMMIT (fsync 횟수 최소화)
+        - manifest 와 크기/수정시각이 같거나 내용 해시가 같은 파일은 건너뜀 (full=True 면 모두 재등록)
+        
+        Returns:
+            {migrated, skipped, failed, rows, elapsed}
+        """
+        if batch_size is None:
+            batch_size = CFG.get('migration', {}).get('commit_batch_size', 500)
+        batch_size = max(1, batch_size)
+
+        stats = {"migrated": 0, "skipped": 0, "failed": 0, "rows": 0, "elapsed": 0.0}
+        started = time.perf_counter()
+
+        conn = self._connect_bulk()
+        cursor = conn.cursor()
+
+        pending = 0
+        try:
+            manifest = self._load_manifest(cursor)
+            cursor.execute("BEGIN")
+            for json_filepath in json_filepaths:
+                key = self._manifest_key(json_filepath)
+                known = manifest.get(key)
+                try:
+                    st = os.stat(json_filepath)
+                    if not full and known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                        stats["skipped"] += 1
+                        continue
+                    with open(json_filepath, 'rb') as f:
+                        raw = f.read()
+                except OSError as e:
+                    stats["failed"] += 1
+                    print(f"  ❌ {json_filepath} 읽기 실패: {str(e)}")
+                    continue
+
+                content_hash = hashlib.sha256(raw).hexdigest()
+                if not full and known and known[2] == content_hash:
+                    # 내용은 같고 수정시각만 바뀜 (touch, 재복사 등) -> manifest 만 갱신
+                    self._upsert_manifest(cursor, key, st.st_size, st.st_mtime_ns, content_hash, None)
+                    stats["skipped"] += 1
+                    continue
+
+                try:
+                    data = json.loads(raw)
+                except ValueError as e:
+                    stats["failed"] += 1
+                    print(f"  ❌ {json_filepath} 등록 실패: {str(e)}")
+                    continue
+                if not self._insert_with_savepoint(cursor, data, stats, json_filepath):
+                    continue
+                self._upsert_manifest(cursor, key, st.st_size, st.st_mtime_ns, content_hash, data['query_id'])
+
+                pending += 1
+                if pending >= batch_size:
+                    cursor.execute("COMMIT")
+                    cursor.execute("BEGIN")
+                    pending = 0
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        stats["elapsed"] = time.perf_counter() - started
+        return stats
+
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        """파일 sha256 (청크 단위로 읽어 메모리 사용량 일정)"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def migrate_bundle(self, bundle_path: str, batch_size: Optional[int] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        템플릿 번들(JSON 배열 또는 JSONL)을 스트리밍으로 읽으며 일괄 마이그레이션
+        - 레코드는 파싱되는 즉시 등록되고 batch_size 개마다 COMMIT (번들 크기와 무관하게 메모리 일정)
+        - 레코드마다 SAVEPOINT: 필수 필드가 빠진 레코드만 실패 처리
+        - 번들 파일 단위로 manifest 를 기록하여 변경이 없으면 통째로 건너뜀 (full=True 면 재등록)
+        - 배열 문법 오류로 중단되면 그때까지 등록된 레코드는 유지하되 manifest 는 갱신하지 않음 (다음 실행 시 재시도)
+
+        Returns:
+            {migrated, skipped, failed, rows, elapsed}
+        """
+        if batch_size is None:
+            batch_size = CFG.get('migration', {}).get('commit_batch_size', 500)
+        batch_size = max(1, batch_size)
+
+        stats = {"migrated": 0, "skipped": 0, "failed": 0, "rows": 0, "elapsed": 0.0}
+        started = time.perf_counter()
+        name = os.path.basename(bundle_path)
+
+        try:
+            st = os.stat(bundle_path)
+        except OSError as e:
+            stats["failed"] += 1
+            print(f"  ❌ {bundle_path} 읽기 실패: {str(e)}")
+            return stats
+
+        conn = self._connect_bulk()
+        cursor = conn.cursor()
+        key = self._manifest_key(bundle_path)
+
+        try:
+            cursor.execute("SELECT file_size, mtime_ns, content_hash FROM TB_TEMPLATE_MANIFEST WHERE file_path = ?", (key,))
+            known = cursor.fetchone()
+            if not full and known:
+                unchanged = known[0] == st.st_size and known[1] == st.st_mtime_ns
+                if not unchanged and known[0] == st.st_size:
+                    content_hash = self._file_digest(bundle_path)
+                    if known[2] == content_hash:
+                        # 내용은 같고 수정시각만 바뀜 -> manifest 만 갱신
+                        self._upsert_manifest(cursor, key, st.st_size, st.st_mtime_ns, content_hash, None)
+                        unchanged = True
+                if unchanged:
+                    print(f"  ⏭️ {name}: 변경 없음 (건너뜀)")
+                    stats["elapsed"] = time.perf_counter() - started
+                    return stats
+
+            print(f"📦 번들 스트리밍 등록: {name} ({st.st_size / (1 << 20):,.1f} MB)")
+
+            def on_error(ordinal: int, error: Exception):
+                stats["failed"] += 1
+                print(f"  ❌ {name}#{ordinal} 파싱 실패: {str(error)}")
+
+            pending = 0
+            completed = False
+            with open(bundle_path, 'rb') as raw:
+                reader = HashingReader(raw)
+                cursor.execute("BEGIN")
+                try:
+                    for ordinal, record in iter_json_records(reader, on_error=on_error):
+                        if not self._insert_with_savepoint(cursor, record, stats, f"{name}#{ordinal}"):
+                            continue
+                        pending += 1
+                        if pending >= batch_size:
+                            cursor.execute("COMMIT")
+                            cursor.execute("BEGIN")
+                            pending = 0
+                    completed = True
+                except ValueError as e:
+                    stats["failed"] += 1
+                    print(f"  ❌ {name} 스트리밍 중단: {str(e)}")
+
+            if completed:
+                self._upsert_manifest(cursor, key, st.st_size, st.st_mtime_ns, reader.hexdigest(), None, migrated=True)
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        stats["elapsed"] = time.perf_counter() - started
+        return stats
+
+    def _configured_bundles(self) -> List[str]:
+        """config templates.bundles 에 등록된 번들 경로 (프로젝트 루트 기준 상대 경로 허용)"""
+        return [
+            os.path.join(CFG['PROJECT_ROOT'], path)
+            for path in CFG.get('templates', {}).get('bundles', [])
+        ]
     
-    def migrate_all_queries(self):
-        """data 디렉토리의 모든 query_*.json 파일을 마이그레이션"""
+    def migrate_all_queries(self, batch_size: Optional[int] = None, full: bool = False, prune_deleted: Optional[bool] = None):
+        """
+        data 디렉토리의 query_*.json 파일과 config templates.bundles 번들을 증분 마이그레이션 (단일 연결 Bulk Path)
+        - 변경되지 않은 파일은 건너뜀 (History 에 불필요한 UPDATE 이력이 쌓이지 않음)
+        - prune_deleted: 디렉토리에서 사라진 템플릿을 reason 'DELETE' 로 History 이동
+        """
         print(f"🚀 쿼리 자산 등록 시작 (Move-then-Insert Strategy)...")
         
-        migrated_count = 0
-        failed_count = 0
-        
         if not os.path.exists(self.data_dir):
              print(f"⚠️ 템플릿 디렉토리({self.data_dir})가 없습니다.")
              return
 
-        for filename in os.listdir(self.data_dir):
-            if filename.startswith("query_") and filename.endswith(".json"):
-                filepath = os.path.join(self.data_dir, filename)
-                if self.migrate_json_file(filepath):
-                    migrated_count += 1
-                else:
-                    failed_count += 1
-        
+        if prune_deleted is None:
+            prune_deleted = CFG.get('migration', {}).get('prune_deleted', False)
+
+        filenames = sorted(
+            filename for filename in os.listdir(self.data_dir)
+            if filename.startswith("query_") and filename.endswith(".json")
+        )
+        stats = self.migrate_json_files(
+            [os.path.join(self.data_dir, filename) for filename in filenames], batch_size=batch_size, full=full
+        )
+        for bundle_path in self._configured_bundles():
+            bundle_stats = self.migrate_bundle(bundle_path, batch_size=batch_size, full=full)
+            for field in ("migrated", "skipped", "failed", "rows", "elapsed"):
+                stats[field] += bundle_stats[field]
+        stats["deleted"] = self.prune_deleted_templates(set(filenames)) if prune_deleted else 0
+        self.refresh_vector_index(changed=bool(stats["migrated"] or stats["deleted"]))
+        self._print_migration_stats(stats)
+        return stats
+
+    @staticmethod
+    def _is_template_file_key(key: str) -> bool:
+        """templates 디렉토리 내부의 개별 템플릿 파일(query_*.json) manifest 키인지 확인"""
+        return not os.path.isabs(key) and key.startswith("query_") and key.endswith(".json")
+
+    def prune_deleted_templates(self, present_files: set) -> int:
+        """manifest 에는 있으나 templates 디렉토리에서 사라진 파일의 쿼리를 History('DELETE')로 이동"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        deleted = 0
+        try:
+            manifest = self._load_manifest(cursor)
+            # 파일명이 바뀌었을 뿐 같은 query_id 를 다른 파일이 등록한 경우는 보존
+            live_query_ids = {v[3] for k, v in manifest.items() if not self._is_template_file_key(k) or k in present_files}
+            for key, (_, _, _, query_id) in manifest.items():
+                # templates 디렉토리 내부의 query_*.json 항목만 대상 (외부 파일/번들은 제외)
+                if not self._is_template_file_key(key) or key in present_files:
+                    continue
+                if query_id and query_id not in live_query_ids and self._archive_existing_query(cursor, query_id, reason='DELETE'):
+                    deleted += 1
+                cursor.execute("DELETE FROM TB_TEMPLATE_MANIFEST WHERE file_path = ?", (key,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return deleted
+
+    @staticmethod
+    def _print_migration_stats(stats: Dict[str, Any]):
+        """마이그레이션 결과 및 처리량 출력"""
+        elapsed = max(stats['elapsed'], 1e-9)
         print(f"\n✨ 작업 완료!")
-        print(f"  - 성공(신규/갱신): {migrated_count}개")
-        print(f"  - 실패: {failed_count}개")
+        print(f"  - 성공(신규/갱신): {stats['migrated']}개")
+        print(f"  - 변경 없음(건너뜀): {stats['skipped']}개")
+        if stats.get('deleted'):
+            print(f"  - 삭제(History 이동): {stats['deleted']}개")
+        print(f"  - 실패: {stats['failed']}개")
+        print(f"  - 처리량: {stats['rows']}행 / {stats['elapsed']:.2f}s "
+              f"({stats['rows'] / elapsed:,.0f} rows/s, {stats['migrated'] / elapsed:,.0f} templates/s)")
     
     def verify_db(self):
         """데이터베이스 무결성 검증"""
@@ -302,8 +773,24 @@ class QueryIndexerDB:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query JSON to SQLite Migrator")
+    parser.add_argument("--batch-size", type=int, default=None, help="커밋 단위 템플릿 수 (기본: config migration.commit_batch_size)")
+    parser.add_argument("--full", action="store_true", help="manifest 를 무시하고 모든 템플릿을 재등록")
+    parser.add_argument("--prune", action="store_true", default=None, help="사라진 템플릿 파일을 History('DELETE')로 이동")
+    parser.add_argument("--bundle", action="append", default=None, metavar="PATH",
+                        help="지정한 번들(JSON 배열/JSONL)만 스트리밍 등록 (여러 번 지정 가능)")
+    args = parser.parse_args()
+
     # 데이터베이스 생성 및 마이그레이션
     indexer = QueryIndexerDB()
     indexer.create_tables()
-    indexer.migrate_all_queries()
+    if args.bundle:
+        migrated = 0
+        for bundle_path in args.bundle:
+            bundle_stats = indexer.migrate_bundle(bundle_path, batch_size=args.batch_size, full=args.full)
+            indexer._print_migration_stats(bundle_stats)
+            migrated += bundle_stats['migrated']
+        indexer.refresh_vector_index(changed=migrated > 0)
+    else:
+        indexer.migrate_all_queries(batch_size=args.batch_size, full=args.full, prune_deleted=args.prune)
     indexer.verify_db()
@@ -6,9 +6,14 @@ SQL Query to JSON Converter (AST Based)
 import os
 import sys
 import json
+import time
 import shutil
+import signal
 import hashlib
+import argparse
 import traceback
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
@@ -26,11 +31,38 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 from config.loader import CFG
+from engine.analysis_cache import AnalysisCache
+from engine.sql_stream import iter_sql_statements
+
+# 분석 로직(_analyze_ast)이 바뀌면 올려서 이전 분석 캐시를 무효화
+ANALYZER_VERSION = "1.3.0"
+
+# WHERE 절에서 추출하는 비교 연산
+_BINARY_OPERATORS = {
+    exp.EQ: "=", exp.GT: ">", exp.LT: "<", exp.GTE: ">=", exp.LTE: "<=", exp.NEQ: "<>",
+}
+_WHERE_OPERATORS = tuple(_BINARY_OPERATORS) + (exp.In, exp.Between)
+_SET_OPERATIONS = (getattr(exp, 'SetOperation', exp.Union), exp.Union)
+
+# 파티션 키 컬럼 (테이블 별칭 제외 컬럼명, 대소문자 무시) - 해당 조건은 type "partition_key" 로 표시
+_PARTITION_KEYS = frozenset(k.lower() for k in CFG.get('partition', {}).get('keys', []))
+
+# SELECT 컬럼의 table 값을 FROM 테이블로 채우기 위한 표식
+_MAIN_TABLE = object()
+
+
+def _sql(node: exp.Expression) -> str:
+    """
+    하위 노드 SQL 생성. 기본 sql()은 호출마다 하위 트리를 deepcopy 하므로 복사를 생략함
+    (부모가 있는 노드는 기본 dialect 생성기가 변경하지 않음)
+    """
+    return node.sql(copy=False)
+
 
 class SQLQueryAnalyzer:
     """sqlglot AST 기반 SQL 분석기"""
     
-    def __init__(self):
+    def __init__(self, use_cache: Optional[bool] = None):
         self.source_dir = CFG.get('SOURCE_PATH')
         self.inbox_dir = os.path.join(self.source_dir, 'inbox')
         self.success_dir = os.path.join(self.source_dir, 'success')
@@ -40,12 +72,124 @@ class SQLQueryAnalyzer:
         # 디렉토리 생성
         for d in [self.inbox_dir, self.success_dir, self.failed_dir, self.output_dir]:
             os.makedirs(d, exist_ok=True)
+
+        # 분석 결과 캐시 (정규화 SQL + 분석기/sqlglot 버전/파티션 키 설정 해시 키)
+        # 파티션 키 설정이 바뀌면 조건 type 과 structure.partition_keys 가 달라지므로 이전 캐시를 쓰지 않음
+        if use_cache is None:
+            use_cache = CFG.get('analyzer', {}).get('cache_enabled', True)
+        self.cache = AnalysisCache(
+            CFG['ANALYSIS_CACHE_PATH'],
+            f"{ANALYZER_VERSION}/sqlglot-{sqlglot.__version__}/partition-{','.join(sorted(_PARTITION_KEYS))}"
+        ) if use_cache else None
             
     def _generate_identity_hash(self, from_table: str, select_exprs: List[str]) -> str:
         """쿼리 식별을 위한 해시 생성 (FROM + SELECT 조합)"""
         content = f"{from_table}|{'|'.join(sorted(select_exprs))}"
         return hashlib.md5(content.encode()).hexdigest()
 
+    def analyze_query(self, sql_content: str, question: str, query_id: str) -> Dict[str, Any]:
+        """SQL 문자열 하나를 AST로 파싱하여 JSON 템플릿(dict)을 생성 (파일 I/O 없음)"""
+        result_json, cache_hit = self._analyze_cached(sql_content, question, query_id)
+        if not cache_hit:
+            self._store_cache(result_json)
+        return result_json
+
+    def _analyze_cached(self, sql_content: str, question: str, query_id: str):
+        """
+        캐시 우선 분석. 캐시 적중 시 sqlglot 파싱을 생략하고 이전 분석 결과에
+        현재 query_id/question/원본 SQL만 덮어씀 -> (result_json, cache_hit)
+        """
+        sql_content = sql_content.strip()
+        if not sql_content:
+            raise ValueError("빈 쿼리입니다.")
+
+        source_hash = self.cache.make_key(sql_content) if self.cache else None
+        cached = self.cache.get(source_hash) if self.cache else None
+        if cached is not None:
+            cached['query_id'] = query_id
+            cached['question'] = question
+            cached['sql']['original'] = sql_content
+            cached['metadata']['created_at'] = datetime.now().isoformat()
+            return cached, True
+
+        # AST 파싱
+        parsed = parse_one(sql_content)
+        result_json = self._analyze_ast(parsed, query_id, question, sql_content)
+        result_json['metadata']['source_hash'] = source_hash
+        return result_json, False
+
+    def _store_cache(self, result_json: Dict[str, Any]):
+        """분석 결과를 캐시에 저장 (캐시 비활성 시 무시)"""
+        source_hash = result_json['metadata'].get('source_hash')
+        if self.cache and source_hash:
+            self.cache.put(source_hash, result_json)
+
+    def save_to_json(self, result_json: Dict[str, Any]) -> str:
+        """분석 결과를 templates 디렉토리에 query_<id>.json 으로 저장 (내용이 같은 기존 파일은 유지)"""
+        output_path = os.path.join(self.output_dir, f"query_{result_json['query_id']}.json")
+        if self._is_unchanged(output_path, result_json):
+            return output_path
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(result_json, f, indent=2, ensure_ascii=False)
+        return output_path
+
+    @staticmethod
+    def _is_unchanged(output_path: str, result_json: Dict[str, Any]) -> bool:
+        """기존 템플릿이 같은 원본 SQL 해시와 질문을 가지고 있으면 재작성 불필요"""
+        source_hash = result_json['metadata'].get('source_hash')
+        if not source_hash or not os.path.exists(output_path):
+            return False
+        try:
+            with open(output_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return (existing.get('metadata', {}).get('source_hash') == source_hash
+                and existing.get('question') == result_json['question'])
+
+    @staticmethod
+    def _parse_filename(filename: str):
+        """파일명에서 query_id / question 추출 (q001_설명.sql -> id: q001)"""
+        file_stem = os.path.splitext(filename)[0]
+        query_id = file_stem.split('_')[0] if '_' in file_stem else file_stem
+        question = file_stem.replace('_', ' ')
+        return query_id, question
+
+    def _analyze_source(self, filename: str):
+        """inbox 파일 하나를 읽어 분석 (파일 이동/저장 없음, 워커 프로세스에서도 호출됨) -> (result_json, cache_hit)"""
+        filepath = os.path.join(self.inbox_dir, filename)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            sql_content = f.read().strip()
+
+        if not sql_content:
+            raise ValueError("빈 파일입니다.")
+
+        query_id, question = self._parse_filename(filename)
+        return self._analyze_cached(sql_content, question, query_id)
+
+    def _commit_success(self, filename: str, result_json: Dict[str, Any], cache_hit: bool = False) -> str:
+        """성공 처리: 캐시/JSON 저장 후 success/ 로 이동 -> 템플릿 경로"""
+        if not cache_hit:
+            self._store_cache(result_json)
+        output_path = self.save_to_json(result_json)
+        shutil.move(os.path.join(self.inbox_dir, filename), os.path.join(self.success_dir, filename))
+        cache_mark = " (캐시 재사용)" if cache_hit else ""
+        print(f"✅ 분석 성공 및 이동 완료{cache_mark}: {filename} -> success/")
+        return output_path
+
+    def _commit_failure(self, filename: str, error_log: str):
+        """실패 처리: failed/ 로 이동 후 에러 로그 작성"""
+        try:
+            shutil.move(os.path.join(self.inbox_dir, filename), os.path.join(self.failed_dir, filename))
+
+            log_path = os.path.join(self.failed_dir, f"{filename}.error.log")
+            with open(log_path, 'w', encoding='utf-8') as f:
+                f.write(error_log)
+            print(f"⚠️ 실패 파일 이동 완료: {filename} -> failed/")
+        except Exception as move_error:
+            print(f"💀 파일 이동 중 치명적 오류: {move_error}")
+
     def analyze_file(self, filename: str) -> bool:
         """단일 파일 분석 및 처리 (Move logic 포함)"""
         filepath = os.path.join(self.inbox_dir, filename)
@@ -56,51 +200,17 @@ class SQLQueryAnalyzer:
         print(f"🔍 분석 시작: {filename}")
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                sql_content = f.read().strip()
-                
-            if not sql_content:
-                raise ValueError("빈 파일입니다.")
-
-            # AST 파싱
-            parsed = parse_one(sql_content)
-            
-            # 메타데이터 추출 (파일명 기반)
-            file_stem = os.path.splitext(filename)[0]
-            # q001_설명.sql -> id: q001
-            query_id = file_stem.split('_')[0] if '_' in file_stem else file_stem
-            question = file_stem.replace('_', ' ')
-            
-            # 분석 실행
-            result_json = self._analyze_ast(parsed, query_id, question, sql_content)
-            
-            # JSON 저장
-            output_path = os.path.join(self.output_dir, f"query_{query_id}.json")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result_json, f, indent=2, ensure_ascii=False)
-            
-            # 성공 처리: Move to Success
-            shutil.move(filepath, os.path.join(self.success_dir, filename))
-            print(f"✅ 분석 성공 및 이동 완료: {filename} -> success/")
+            result_json, cache_hit = self._analyze_source(filename)
+            self._commit_success(filename, result_json, cache_hit)
             return True
             
         except Exception as e:
             print(f"❌ 분석 실패: {filename} - {str(e)}")
-            # 실패 처리: Move to Failed
-            try:
-                shutil.move(filepath, os.path.join(self.failed_dir, filename))
-                
-                # 에러 로그 작성
-                log_path = os.path.join(self.failed_dir, f"{filename}.error.log")
-                with open(log_path, 'w', encoding='utf-8') as f:
-                    f.write(traceback.format_exc())
-                print(f"⚠️ 실패 파일 이동 완료: {filename} -> failed/")
-            except Exception as move_error:
-                print(f"💀 파일 이동 중 치명적 오류: {move_error}")
+            self._commit_failure(filename, traceback.format_exc())
             return False
 
     def _analyze_ast(self, ast: exp.Expression, query_id: str, question: str, original_sql: str) -> Dict[str, Any]:
-        """AST 순회 및 데이터 구조화"""
+        """AST 순회 및 데이터 구조화 (단일 순회로 SELECT/JOIN/WHERE/GROUP BY/ORDER BY 수집)"""
         
         # 1. Initialization
         select_columns = []
@@ -109,118 +219,95 @@ class SQLQueryAnalyzer:
         group_by = []
         order_by = []
         from_table = "Unknown"
-        
-        # 2. Extract FROM
-        from_exp = ast.find(exp.From)
-        if from_exp:
-            for source in from_exp.find_all(exp.Table):
-                from_table = source.sql()
-                break # Main table only
-                
-        # 3. Extract SELECT (Flexible Area)
-        for projection in ast.find_all(exp.Select):
-            for expression in projection.expressions:
-                if isinstance(expression, exp.Alias):
-                    alias = expression.alias
-                    expr_sql = expression.this.sql()
-                    # 간단한 aggregation 체크
-                    agg = None
-                    if expression.find(exp.AggFunc):
-                        agg = expression.find(exp.AggFunc).sql()
-                    
-                    select_columns.append({
-                        "alias": alias,
-                        "expression": expr_sql,
-                        "table": from_table, # 단순화 (실제로는 매핑 필요)
-                        "column": expr_sql,
-                        "aggregation": agg
-                    })
-                elif isinstance(expression, exp.Column):
-                    select_columns.append({
-                        "alias": expression.name,
-                        "expression": expression.sql(),
-                        "table": expression.table,
-                        "column": expression.name,
-                        "aggregation": None
+        tables = []       # 엔티티 후보 (CTE 이름 제외 전)
+        cte_names = set()
+
+        # 메인 쿼리: UNION 계열이면 가장 왼쪽 SELECT 기준
+        main = ast
+        while isinstance(main, _SET_OPERATIONS):
+            main = main.this
+
+        # 2. 단일 DFS 순회
+        # 스택 항목: (node, scope, ctx, proj)
+        #   scope: 노드가 속한 SELECT (하위 쿼리에 들어가면 해당 SELECT로 바뀜)
+        #   ctx  : 메인 FROM/WHERE 내부 여부 ('from' | 'where' | None)
+        #   proj : 메인 SELECT 컬럼 인덱스 (aggregation 탐지용)
+        stack = [(ast, main, None, None)]
+        while stack:
+            node, scope, ctx, proj = stack.pop()
+
+            if isinstance(node, exp.Select) and node is not main:
+                # 중첩 서브쿼리/CTE: 이후 노드는 메인 쿼리 구조에 포함하지 않음
+                scope, ctx, proj = node, None, None
+            in_main = scope is main
+            child_ctx = ctx
+
+            if isinstance(node, exp.Table):
+                tables.append(node)
+                if ctx == 'from' and from_table == "Unknown":
+                    from_table = _sql(node) # Main table only
+
+            elif isinstance(node, exp.Subquery) and ctx == 'from' and from_table == "Unknown":
+                # 파생 테이블: 서브쿼리 전체를 FROM 대상으로 유지 (재구성 시 그대로 사용)
+                from_table = _sql(node)
+
+            elif isinstance(node, exp.CTE):
+                cte_names.add(node.alias_or_name)
+
+            elif isinstance(node, exp.AggFunc):
+                if proj is not None and select_columns[proj]['aggregation'] is None:
+                    select_columns[proj]['aggregation'] = _sql(node)
+
+            elif in_main and ctx == 'where' and isinstance(node, _WHERE_OPERATORS):
+                where_conditions.append(self._extract_condition(node))
+                # 조건 내부(IN 서브쿼리 등)는 엔티티 수집만 계속
+                child_ctx = None
+
+            elif in_main and node.parent is main:
+                # 3. Extract FROM
+                if isinstance(node, exp.From):
+                    child_ctx = 'from'
+
+                # 4. Extract JOINs (Fixed Area)
+                elif isinstance(node, exp.Join):
+                    # sqlglot versions vary; safer to access via args (side/kind 는 문자열)
+                    join_parts = [str(node.args.get(k)).upper() for k in ("side", "kind") if node.args.get(k)]
+                    on_arg = node.args.get("on")
+                    on_cond = _sql(on_arg) if on_arg else ""
+                    joins.append({
+                        "type": " ".join(join_parts) if join_parts else "INNER",
+                        "table": _sql(node.this),
+                        "on_condition": on_cond,
+                        "relationship": on_cond # 단순 로직
                     })
-            break # Main query select only
 
-        # 4. Extract JOINs (Fixed Area)
-        for join in ast.find_all(exp.Join):
-            # sqlglot versions vary; safer to access via args
-            join_kind = join.args.get("kind")
-            join_type = join_kind.sql() if join_kind else "INNER"
-            
-            table = join.this.sql()
-            
-            on_arg = join.args.get("on") 
-            on_cond = on_arg.sql() if on_arg else ""
-            
-            joins.append({
-                "type": join_type,
-                "table": table,
-                "on_condition": on_cond,
-                "relationship": on_cond # 단순 로직
-            })
+                # 5. Extract WHERE (Change Area)
+                elif isinstance(node, exp.Where):
+                    child_ctx = 'where'
 
-        # 5. Extract WHERE (Change Area)
-        if ast.find(exp.Where):
-            # 순회하며 조건 추출
-            where_node = ast.find(exp.Where)
-            
-            # 재귀적으로 모든 조건절을 탐색하기보다, 최상위 AND 조건들만 분리하는 것이 이상적일 수 있으나
-            # 현재 로직은 단순화를 위해 평탄화된 조건 리스트를 추출함
-            
-            for cond in where_node.find_all(exp.EQ, exp.GT, exp.LT, exp.GTE, exp.LTE, exp.NEQ, exp.In, exp.Between):
-                col = ""
-                val = ""
-                operator = ""
-                cond_type = "filter"
-                
-                if isinstance(cond, exp.Between):
-                    operator = "BETWEEN"
-                    col = cond.this.sql()
-                    low = cond.args.get('low')
-                    high = cond.args.get('high')
-                    val = f"{low.sql()} AND {high.sql()}" if low and high else "Unknown"
-                    
-                elif isinstance(cond, exp.In):
-                    operator = "IN"
-                    col = cond.this.sql()
-                    # args['expressions'] is a list of expressions
-                    in_values = [e.sql() for e in cond.args.get('expressions', [])]
-                    val = f"({', '.join(in_values)})"
-                    
-                else:
-                    # Binary Operators (EQ, GT, LT ...)
-                    if isinstance(cond, exp.EQ): operator = "="
-                    elif isinstance(cond, exp.GT): operator = ">"
-                    elif isinstance(cond, exp.LT): operator = "<"
-                    elif isinstance(cond, exp.GTE): operator = ">="
-                    elif isinstance(cond, exp.LTE): operator = "<="
-                    elif isinstance(cond, exp.NEQ): operator = "<>"
-                    
-                    col = cond.this.sql()
-                    val = cond.expression.sql() 
-                    
-                where_conditions.append({
-                    "column": col,
-                    "operator": operator,
-                    "value": val,
-                    "type": "filter"
-                })
+                # 6. Extract GROUP BY
+                elif isinstance(node, exp.Group):
+                    group_by.extend(_sql(grp) for grp in node.expressions)
 
-        # 6. Extract GROUP BY
-        if ast.find(exp.Group):
-            for grp in ast.find(exp.Group).expressions:
-                group_by.append(grp.sql())
+                # 7. Extract ORDER BY
+                elif isinstance(node, exp.Order):
+                    order_by.extend(_sql(o) for o in node.expressions)
 
-        # 7. Extract ORDER BY
-        if ast.find(exp.Order):
-            for ord in ast.find(exp.Order).expressions:
-                order_by.append(ord.sql())
-        
-        # 8. Classification (Unit Logic)
+                # 8. Extract SELECT (Flexible Area)
+                elif node.arg_key == "expressions":
+                    proj = self._extract_select_column(node, select_columns)
+
+            # 자식 노드를 역순으로 push -> 원본 순서대로 방문
+            children = list(node.iter_expressions())
+            for child in reversed(children):
+                stack.append((child, scope, child_ctx, proj))
+
+        # 메인 SELECT 컬럼의 테이블 (단순화: 실제로는 매핑 필요)
+        for col in select_columns:
+            if col['table'] is _MAIN_TABLE:
+                col['table'] = from_table
+
+        # 9. Classification (Unit Logic)
         # Driven Table 기준 (LEFT/RIGHT OUTER 제외, INNER JOIN만 카운트)
         unit_type = "unitA"
         
@@ -237,6 +324,13 @@ class SQLQueryAnalyzer:
             unit_type = "unitB"
         else:
             unit_type = "unitA"
+
+        # 엔티티: CTE 를 제외한 실제 테이블 (등장 순서 유지, 중복 제거)
+        entities = list(dict.fromkeys(t.name for t in tables if t.name and t.name not in cte_names))
+
+        # 추출이 끝난 뒤 생성하므로 전체 트리 복사 생략 (생성기가 CTE 위치를 정리할 수 있음)
+        normalized_sql = ast.sql(copy=False)
+
         # 9. Construct JSON
         return {
             "query_id": query_id,
@@ -244,17 +338,20 @@ class SQLQueryAnalyzer:
             "description": "Auto-analyzed by sqlglot",
             "unit_type": unit_type,
             "unit_description": "Automated Unit Classification",
-            "entities": list(set(entities)),
+            "entities": entities,
             "presentation_type": "table",
             "presentation_config": {},
             "sql": {
                 "original": original_sql,
-                "normalized": ast.sql(),
+                "normalized": normalized_sql,
                 "structure": {
                     "select_columns": select_columns,
                     "from_table": from_table,
                     "joins": joins,
                     "where_conditions": where_conditions,
+                    "partition_keys": list(dict.fromkeys(
+                        c['column'].rsplit('.', 1)[-1] for c in where_conditions if c['type'] == "partition_key"
+                    )),
                     "group_by": group_by,
                     "order_by": order_by
                 }
@@ -263,27 +360,315 @@ class SQLQueryAnalyzer:
                 "created_at": datetime.now().isoformat(),
                 "tags": entities,
                 "complexity": "low",
-                "estimated_rows": "unknown"
+                "estimated_rows": "unknown",
+                "identity_hash": self._generate_identity_hash(from_table, [c['expression'] for c in select_columns])
             }
         }
 
-    def process_inbox(self):
-        """Inbox의 모든 파일 처리"""
-        files = [f for f in os.listdir(self.inbox_dir) if f.endswith('.sql') or f.endswith('.txt')]
+    @staticmethod
+    def _extract_select_column(expression: exp.Expression, select_columns: List[Dict[str, Any]]) -> Optional[int]:
+        """메인 SELECT 항목 하나를 select_columns 에 추가하고 인덱스 반환 (대상이 아니면 None)"""
+        if isinstance(expression, exp.Alias):
+            expr_sql = _sql(expression.this)
+            select_columns.append({
+                "alias": expression.alias,
+                "expression": expr_sql,
+                "table": _MAIN_TABLE, # 순회 후 FROM 테이블로 채움
+                "column": expr_sql,
+                "aggregation": None # 간단한 aggregation 체크 (순회 중 AggFunc 발견 시 설정)
+            })
+            return len(select_columns) - 1
+        if isinstance(expression, exp.Column):
+            select_columns.append({
+                "alias": expression.name,
+                "expression": _sql(expression),
+                "table": expression.table,
+                "column": expression.name,
+                "aggregation": None
+            })
+        return None
+
+    @staticmethod
+    def _extract_condition(cond: exp.Expression) -> Dict[str, Any]:
+        """WHERE 비교 조건 하나를 {column, operator, value, type} 으로 변환"""
+        if isinstance(cond, exp.Between):
+            operator = "BETWEEN"
+            low = cond.args.get('low')
+            high = cond.args.get('high')
+            val = f"{_sql(low)} AND {_sql(high)}" if low and high else "Unknown"
+
+        elif isinstance(cond, exp.In):
+            operator = "IN"
+            # args['expressions'] is a list of expressions (서브쿼리 IN 은 query 인자)
+            if cond.args.get('query'):
+                val = _sql(cond.args['query'])
+            else:
+                in_values = [_sql(e) for e in cond.args.get('expressions', [])]
+                val = f"({', '.join(in_values)})"
+
+        else:
+            # Binary Operators (EQ, GT, LT ...)
+            operator = _BINARY_OPERATORS[type(cond)]
+            val = _sql(cond.expression)
+
+        column = _sql(cond.this)
+        return {
+            "column": column,
+            "operator": operator,
+            "value": val,
+            "type": "partition_key" if column.rsplit('.', 1)[-1].lower() in _PARTITION_KEYS else "filter"
+        }
+
+    def create_executor(self, workers: int) -> ProcessPoolExecutor:
+        """분석용 프로세스 풀 생성 (워커마다 분석기를 한 번만 초기화)"""
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.cache is not None,))
+
+    def list_inbox(self) -> List[str]:
+        """Inbox의 처리 대상 파일 목록 (파일명 정렬 - 처리/집계 순서 고정)"""
+        return sorted(f for f in os.listdir(self.inbox_dir) if f.endswith('.sql') or f.endswith('.txt'))
+
+    def process_files(self, files: List[str], workers: int = 1, executor: Optional[Executor] = None) -> List[Dict[str, Any]]:
+        """
+        파일 목록 분석. workers > 1 (또는 executor 지정) 이면 파싱/분석은 프로세스 풀에서 병렬로 수행하고,
+        JSON 저장·파일 이동·성공/실패 집계는 메인 프로세스에서 파일명 순서대로 처리합니다.
+        
+        Returns:
+            파일별 처리 결과 목록 [{filename, query_id, success, cache_hit, elapsed, templates}]
+        """
+        outcomes = []
+
+        own_executor = executor is None and workers > 1
+        if own_executor:
+            executor = self.create_executor(workers)
+
+        try:
+            if executor is None:
+                results = (_timed_analyze(self, f) for f in files)
+            else:
+                # map()은 제출 순서대로 결과를 돌려주므로 커밋 순서가 완료 순서와 무관하게 고정됨
+                chunksize = max(1, len(files) // (max(workers, 1) * 8))
+                results = executor.map(_analyze_in_worker, files, chunksize=chunksize)
+
+            for filename, (result_json, cache_hit, error_log, elapsed) in zip(files, results):
+                templates = []
+                if result_json is not None:
+                    templates.append(self._commit_success(filename, result_json, cache_hit))
+                else:
+                    print(f"❌ 분석 실패: {filename} - {error_log.strip().splitlines()[-1]}")
+                    self._commit_failure(filename, error_log)
+
+                outcomes.append({
+                    "filename": filename,
+                    "query_id": self._parse_filename(filename)[0],
+                    "success": result_json is not None,
+                    "cache_hit": cache_hit,
+                    "elapsed": elapsed,
+                    "templates": templates
+                })
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        return outcomes
+
+    def analyze_dump(self, filename: str, executor: Optional[Executor] = None, window: int = 1) -> Dict[str, Any]:
+        """
+        다중 문장 SQL 덤프 파일을 스트리밍으로 분리하여 문장별로 분석 및 템플릿 생성.
+        - query_id: <파일 ID>_s<순번 4자리> (같은 덤프는 항상 같은 ID)
+        - 실패한 문장만 failed/<파일명>_s<순번>.sql 과 error.log 로 기록
+        - 덤프 파일은 성공 문장이 하나라도 있으면 success/, 없으면 failed/ 로 이동
+        executor 지정 시 최대 window 개 문장만 동시에 제출하여 메모리 사용량을 일정하게 유지합니다.
+        
+        Returns:
+            {filename, query_id, success, cache_hit, elapsed, templates, statements, failed_statements}
+        """
+        filepath = os.path.join(self.inbox_dir, filename)
+        file_id, question = self._parse_filename(filename)
+        file_stem = os.path.splitext(filename)[0]
+        print(f"🔍 덤프 분석 시작: {filename}")
+
+        started = time.perf_counter()
+        total = failed = cache_hits = 0
+        templates = []
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            jobs = (
+                (statement, f"{question} #{ordinal}", f"{file_id}_s{ordinal:04d}")
+                for ordinal, statement in iter_sql_statements(f)
+            )
+            if executor is None:
+                results = ((job, _timed_statement(self, job)) for job in jobs)
+            else:
+                results = _bounded_map(executor, _analyze_statement_in_worker, jobs, window)
+
+            for (statement, _, query_id), (result_json, cache_hit, error_log, _) in results:
+                total += 1
+                if result_json is not None:
+                    if cache_hit:
+                        cache_hits += 1
+                    else:
+                        self._store_cache(result_json)
+                    templates.append(self.save_to_json(result_json))
+                else:
+                    failed += 1
+                    self._write_failed_statement(f"{file_stem}_{query_id[len(file_id) + 1:]}.sql", statement, error_log)
+
+        success = total > failed
+        if success:
+            shutil.move(filepath, os.path.join(self.success_dir, filename))
+            print(f"✅ 덤프 처리 완료: {filename} ({total - failed}/{total} 문장 성공) -> success/")
+        else:
+            self._commit_failure(filename, f"성공한 문장이 없습니다. (전체 {total}개 문장)\n")
+
+        return {
+            "filename": filename,
+            "query_id": file_id,
+            "success": success,
+            "cache_hit": total > 0 and cache_hits == total,
+            "elapsed": time.perf_counter() - started,
+            "templates": templates,
+            "statements": total,
+            "failed_statements": failed
+        }
+
+    def _write_failed_statement(self, statement_filename: str, statement: str, error_log: str):
+        """실패한 문장 하나를 failed/ 에 별도 SQL 파일과 에러 로그로 기록"""
+        with open(os.path.join(self.failed_dir, statement_filename), 'w', encoding='utf-8') as f:
+            f.write(statement + "\n")
+        with open(os.path.join(self.failed_dir, f"{statement_filename}.error.log"), 'w', encoding='utf-8') as f:
+            f.write(error_log)
+        print(f"⚠️ 문장 분석 실패: {statement_filename} -> failed/ ({error_log.strip().splitlines()[-1]})")
+
+    def process_dumps(self, files: List[str], workers: int = 1, executor: Optional[Executor] = None) -> List[Dict[str, Any]]:
+        """덤프 파일 목록을 순서대로 처리 (문장 분석은 하나의 프로세스 풀을 공유)"""
+        own_executor = executor is None and workers > 1
+        if own_executor:
+            executor = self.create_executor(workers)
+        try:
+            return [self.analyze_dump(f, executor=executor, window=max(workers, 1) * 4) for f in files]
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+    def process_inbox(self, workers: Optional[int] = None, split_statements: Optional[bool] = None):
+        """Inbox의 모든 파일 처리 (split_statements: 파일을 다중 문장 덤프로 취급)"""
+        files = self.list_inbox()
         if not files:
             print("📭 Inbox가 비어있습니다.")
-            return
-            
-        print(f"🚀 Inbox 처리 시작 ({len(files)}개 파일)...")
-        success_count = 0
-        
-        for f in files:
-            if self.analyze_file(f):
-                success_count += 1
-                
+            return []
+
+        analyzer_cfg = CFG.get('analyzer', {})
+        if workers is None:
+            workers = analyzer_cfg.get('workers', 1)
+        if split_statements is None:
+            split_statements = analyzer_cfg.get('split_statements', False)
+        # 파일 단위 병렬화는 파일 수 이상의 워커가 필요 없음 (덤프 모드는 문장 단위)
+        workers = max(1, workers if split_statements else min(workers, len(files)))
+
+        mode = f"병렬 {workers} workers" if workers > 1 else "순차"
+        if split_statements:
+            mode += ", 다중 문장 덤프"
+        print(f"🚀 Inbox 처리 시작 ({len(files)}개 파일, {mode})...")
+
+        started = time.perf_counter()
+        if split_statements:
+            outcomes = self.process_dumps(files, workers=workers)
+        else:
+            outcomes = self.process_files(files, workers=workers)
+        wall_time = time.perf_counter() - started
+
+        success_count = sum(1 for o in outcomes if o['success'])
+        self._print_timing_summary(outcomes, wall_time)
         print(f"\n✨ 처리 완료: 성공 {success_count} / 전체 {len(files)}")
+        return outcomes
+
+    @staticmethod
+    def _print_timing_summary(outcomes: List[Dict[str, Any]], wall_time: float):
+        """파일별 분석 소요 시간 요약 출력"""
+        if not outcomes:
+            return
+
+        print("\n⏱️ 파일별 처리 시간:")
+        for o in outcomes:
+            mark = "♻️" if o.get('cache_hit') else ("✅" if o['success'] else "❌")
+            detail = ""
+            if 'statements' in o:
+                detail = f"  ({o['statements'] - o['failed_statements']}/{o['statements']} 문장)"
+            print(f"  {mark} {o['elapsed'] * 1000:9.1f} ms  {o['filename']}{detail}")
+
+        total = sum(o['elapsed'] for o in outcomes)
+        slowest = max(outcomes, key=lambda o: o['elapsed'])
+        cache_hits = sum(1 for o in outcomes if o.get('cache_hit'))
+        print(f"  - 분석 시간 합계: {total:.2f}s / 평균: {total / len(outcomes) * 1000:.1f} ms")
+        print(f"  - 캐시 재사용: {cache_hits} / {len(outcomes)}")
+        print(f"  - 최장: {slowest['filename']} ({slowest['elapsed'] * 1000:.1f} ms)")
+        print(f"  - 전체 경과(wall): {wall_time:.2f}s")
+
+
+# ============================================================================
+# 프로세스 풀 워커 (pickle 가능하도록 모듈 레벨에 정의)
+# ============================================================================
+_worker_analyzer: Optional[SQLQueryAnalyzer] = None
+
+
+def _init_worker(use_cache: bool = True):
+    """워커 프로세스당 분석기 1회 생성 (Ctrl+C 는 부모 프로세스가 처리)"""
+    global _worker_analyzer
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_analyzer = SQLQueryAnalyzer(use_cache=use_cache)
+
+
+def _analyze_in_worker(filename: str):
+    """워커 프로세스 진입점"""
+    return _timed_analyze(_worker_analyzer or SQLQueryAnalyzer(), filename)
+
+
+def _timed_analyze(analyzer: SQLQueryAnalyzer, filename: str):
+    """파싱/분석만 수행. 파일 이동·캐시 저장은 하지 않음 -> (result_json | None, cache_hit, error_log, elapsed)"""
+    started = time.perf_counter()
+    try:
+        result_json, cache_hit = analyzer._analyze_source(filename)
+        return result_json, cache_hit, None, time.perf_counter() - started
+    except Exception:
+        return None, False, traceback.format_exc(), time.perf_counter() - started
+
+
+def _analyze_statement_in_worker(job):
+    """워커 프로세스 진입점 (덤프 문장 단위)"""
+    return _timed_statement(_worker_analyzer or SQLQueryAnalyzer(), job)
+
+
+def _timed_statement(analyzer: SQLQueryAnalyzer, job):
+    """(sql, question, query_id) 문장 하나 분석 -> (result_json | None, cache_hit, error_log, elapsed)"""
+    sql_content, question, query_id = job
+    started = time.perf_counter()
+    try:
+        result_json, cache_hit = analyzer._analyze_cached(sql_content, question, query_id)
+        return result_json, cache_hit, None, time.perf_counter() - started
+    except Exception:
+        return None, False, traceback.format_exc(), time.perf_counter() - started
+
+
+def _bounded_map(executor: Executor, fn, items, window: int):
+    """입력을 한 번에 소비하지 않는 순서 보존 map: 최대 window 개만 제출 -> (item, result)"""
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+    while pending:
+        done_item, future = pending.popleft()
+        yield done_item, future.result()
 
 
 if __name__ == "__main__":
-    analyzer = SQLQueryAnalyzer()
-    analyzer.process_inbox()
+    parser = argparse.ArgumentParser(description="SQL Query to JSON Converter")
+    parser.add_argument("--workers", type=int, default=None, help="병렬 분석 프로세스 수 (기본: config analyzer.workers)")
+    parser.add_argument("--no-cache", action="store_true", help="분석 캐시를 사용하지 않고 모든 SQL을 재파싱")
+    parser.add_argument("--split-statements", action="store_true", default=None,
+                        help="inbox 파일을 다중 문장 덤프로 보고 문장별 템플릿 생성 (기본: config analyzer.split_statements)")
+    args = parser.parse_args()
+
+    analyzer = SQLQueryAnalyzer(use_cache=False if args.no_cache else None)
+    analyzer.process_inbox(workers=args.workers, split_statements=args.split_statements)
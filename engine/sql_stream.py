@@ -0,0 +1,93 @@
+"""
+SQL Statement Stream - 대용량 SQL 덤프 문장 분리기
+역할: 여러 SQL 문장이 담긴 덤프 파일을 일정 크기 청크 단위로 읽으며 세미콜론 기준으로 문장을 분리
+      (따옴표 리터럴 / -- 주석 / /* */ 주석 내부의 세미콜론은 무시, 파일 전체를 메모리에 올리지 않음)
+구동자: sql_analyzer.py (--split-statements 모드)
+"""
+
+import re
+from typing import Iterator, TextIO, Tuple
+
+# 일반 상태에서 의미 있는 토큰: 따옴표 시작, 문장 구분자, 주석 시작
+_NORMAL_TOKENS = re.compile(r"['\"`;]|--|/\*")
+_QUOTES = ("'", '"', '`')
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def _has_code(statement: str) -> bool:
+    """주석/공백만 있는 조각인지 확인"""
+    return bool(_COMMENTS.sub('', statement).strip())
+
+
+def iter_sql_statements(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, str]]:
+    """
+    텍스트 스트림에서 SQL 문장을 하나씩 생성 -> (순번(1부터), 문장)
+
+    버퍼에는 아직 끝나지 않은 현재 문장과 새로 읽은 청크만 유지됩니다.
+    """
+    buf = ''
+    start = 0      # 현재 문장의 시작 위치
+    pos = 0        # 스캔 위치
+    state = None   # None | 따옴표 문자 | '--' | '/*'
+    ordinal = 0
+    eof = False
+
+    while not eof:
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buf = buf[start:] + chunk
+            pos -= start
+            start = 0
+        else:
+            eof = True
+
+        while True:
+            if state is None:
+                m = _NORMAL_TOKENS.search(buf, pos)
+                if m is None:
+                    # 청크 경계에 걸친 '--' / '/*' 를 놓치지 않도록 마지막 한 글자는 남겨둠
+                    pos = len(buf) if eof else max(pos, len(buf) - 1)
+                    break
+                token = m.group()
+                if token == ';':
+                    statement = buf[start:m.start()]
+                    start = pos = m.end()
+                    if _has_code(statement):
+                        ordinal += 1
+                        yield ordinal, statement.strip()
+                else:
+                    state = token
+                    pos = m.end()
+
+            elif state in _QUOTES:
+                # '' 이스케이프는 닫힘 직후 다시 열림으로 처리됨
+                end = buf.find(state, pos)
+                if end < 0:
+                    pos = len(buf)
+                    break
+                state = None
+                pos = end + 1
+
+            elif state == '--':
+                end = buf.find('\n', pos)
+                if end < 0:
+                    pos = len(buf)
+                    break
+                state = None
+                pos = end + 1
+
+            else:  # '/*'
+                end = buf.find('*/', pos)
+                if end < 0:
+                    pos = len(buf) if eof else max(pos, len(buf) - 1)
+                    break
+                state = None
+                pos = end + 2
+
+    # 마지막 세미콜론 이후 남은 문장
+    statement = buf[start:]
+    if _has_code(statement):
+        ordinal += 1
+        yield ordinal, statement.strip()
@@ -0,0 +1,190 @@
+"""
+Template Vectors - 오프라인 템플릿 유사도 검색
+역할: 템플릿의 질문/엔티티/테이블/컬럼 별칭을 문자 n-gram 해싱으로 고정 차원 벡터로 변환하고,
+      전체 벡터를 unit_type 순으로 정렬된 연속 float32 행렬 파일로 내보내 메모리 매핑 후
+      한 번의 행렬-벡터 곱 + top-k 선택으로 가장 가까운 템플릿을 찾음 (외부 모델/네트워크 불필요)
+구동자: load_json_data.py (등록 시 벡터 생성/인덱스 내보내기), query_mcp_server.py (search_queries semantic 모드)
+"""
+
+import os
+import json
+import math
+import zlib
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_DIM = 128
+# 한글은 2글자 단어가 많아 2-gram 과 3-gram 을 함께 사용
+_NGRAM_SIZES = (2, 3)
+# 질문 문장이 검색어와 가장 직접적으로 대응하므로 가중치를 높게 둠
+_FIELD_WEIGHTS = {"question": 1.0, "entities": 0.5, "tables": 0.5, "aliases": 0.5}
+
+META_FILE = "meta.json"
+
+
+def _ngrams(text: str) -> Iterator[str]:
+    """소문자화/공백 정리 후 단어 경계를 포함한 문자 n-gram 생성"""
+    padded = f" {' '.join(text.lower().split())} "
+    for n in _NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            gram = padded[i:i + n]
+            if gram.strip():
+                yield gram
+
+
+def vectorize(fields: Dict[str, str], dim: int = DEFAULT_DIM) -> np.ndarray:
+    """
+    필드별 텍스트 -> L2 정규화된 float32 벡터 (feature hashing)
+    n-gram 마다 crc32 로 차원과 부호를 정해 sqrt(가중 빈도)를 더함
+    """
+    counts: Counter = Counter()
+    for name, text in fields.items():
+        if not text:
+            continue
+        weight = _FIELD_WEIGHTS.get(name, 0.5)
+        for gram in _ngrams(text):
+            counts[gram] += weight
+
+    vector = np.zeros(dim, dtype=np.float32)
+    if not counts:
+        return vector
+    indices = np.empty(len(counts), dtype=np.int64)
+    values = np.empty(len(counts), dtype=np.float32)
+    for i, (gram, count) in enumerate(counts.items()):
+        h = zlib.crc32(gram.encode("utf-8"))
+        indices[i] = h % dim
+        values[i] = math.sqrt(count) if h & 0x80000000 else -math.sqrt(count)
+    np.add.at(vector, indices, values)
+
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def template_fields(question: str, entities: Iterable[str], tables: Iterable[str], aliases: Iterable[str]) -> Dict[str, str]:
+    """템플릿 구성 요소 -> vectorize 입력"""
+    return {
+        "question": question or "",
+        "entities": " ".join(map(str, entities)),
+        "tables": " ".join(map(str, tables)),
+        "aliases": " ".join(a.strip("'\"") for a in aliases if a),
+    }
+
+
+def write_index(index_dir: str, rows: Iterable[Tuple[int, str, bytes]], count: int, dim: int) -> str:
+    """
+    (asset_id, unit_type, vector blob) 행을 unit_type 순으로 받아 인덱스 파일로 기록 -> 생성 번호 반환
+    - vectors_<gen>.npy: (count, dim) float32 행렬, ids_<gen>.npy: 행별 asset_id (int64)
+    - meta.json 을 마지막에 원자적으로 교체하므로 읽는 쪽은 항상 완성된 세대만 봄
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    generation = str(time.time_ns())
+    vectors_name = f"vectors_{generation}.npy"
+    ids_name = f"ids_{generation}.npy"
+
+    # open_memmap: 행을 스트리밍으로 기록 (전체 행렬을 메모리에 만들지 않음)
+    vectors = np.lib.format.open_memmap(os.path.join(index_dir, vectors_name), mode="w+", dtype=np.float32, shape=(count, dim))
+    ids = np.lib.format.open_memmap(os.path.join(index_dir, ids_name), mode="w+", dtype=np.int64, shape=(count,))
+    ranges: Dict[str, List[int]] = {}
+    written = 0
+    for asset_id, unit_type, blob in rows:
+        if written >= count:
+            break
+        vectors[written] = np.frombuffer(blob, dtype=np.float32)
+        ids[written] = asset_id
+        key = unit_type or ""
+        if key not in ranges:
+            ranges[key] = [written, written]
+        ranges[key][1] = written + 1
+        written += 1
+    vectors.flush()
+    ids.flush()
+    del vectors, ids
+
+    meta = {
+        "generation": generation,
+        "dim": dim,
+        "count": written,
+        "vectors": vectors_name,
+        "ids": ids_name,
+        "unit_type_ranges": ranges,
+    }
+    meta_tmp = os.path.join(index_dir, META_FILE + ".tmp")
+    with open(meta_tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(meta_tmp, os.path.join(index_dir, META_FILE))
+
+    # 이전 세대 정리 (이미 매핑 중인 프로세스는 unlink 후에도 기존 매핑을 계속 사용)
+    for name in os.listdir(index_dir):
+        if name.endswith(".npy") and generation not in name:
+            try:
+                os.remove(os.path.join(index_dir, name))
+            except OSError:
+                pass
+    return generation
+
+
+class _IndexSnapshot(NamedTuple):
+    """한 세대의 인덱스 (meta/벡터/ID 를 한 번에 교체하여 읽는 쪽이 세대가 섞인 조합을 보지 않음)"""
+    mtime: int
+    meta: dict
+    vectors: np.ndarray
+    ids: np.ndarray
+
+
+class TemplateVectorIndex:
+    """메모리 매핑된 템플릿 벡터 행렬 (meta.json 변경 시 자동 재로딩)"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._snapshot: Optional[_IndexSnapshot] = None
+
+    def _refresh(self) -> Optional[_IndexSnapshot]:
+        """meta.json 이 바뀌었으면 새 세대를 매핑해 스냅샷을 한 번의 대입으로 교체 -> 현재 스냅샷 (인덱스가 없으면 None)"""
+        meta_path = os.path.join(self.index_dir, META_FILE)
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.mtime != mtime:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.load(os.path.join(self.index_dir, meta["vectors"]), mmap_mode="r")
+            ids = np.load(os.path.join(self.index_dir, meta["ids"]), mmap_mode="r")
+            # 동시에 갱신한 다른 스레드와 경합해도 각자 완성된 스냅샷을 대입하므로 어느 쪽이 남아도 일관됨
+            snapshot = self._snapshot = _IndexSnapshot(mtime, meta, vectors, ids)
+        return snapshot
+
+    @property
+    def available(self) -> bool:
+        return self._refresh() is not None
+
+    def search(self, text: str, k: int = 10, unit_type: Optional[str] = None) -> List[Tuple[int, float]]:
+        """검색어와 코사인 유사도가 높은 템플릿 -> [(asset_id, score)] (유사도 내림차순)"""
+        # 스냅샷은 한 번만 읽음 (검색 도중 다른 스레드가 새 세대로 교체해도 이 검색은 같은 세대만 사용)
+        snapshot = self._refresh()
+        if snapshot is None or snapshot.meta["count"] == 0:
+            return []
+        meta = snapshot.meta
+
+        start, end = 0, meta["count"]
+        if unit_type:
+            # 행이 unit_type 순으로 정렬되어 있어 사전 필터는 연속 구간 슬라이스
+            if unit_type not in meta["unit_type_ranges"]:
+                return []
+            start, end = meta["unit_type_ranges"][unit_type]
+
+        query = vectorize({"question": text}, meta["dim"])
+        if not query.any():
+            return []
+        scores = snapshot.vectors[start:end] @ query
+
+        k = min(k, end - start)
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(snapshot.ids[start + i]), float(scores[i])) for i in top if scores[i] > 0]
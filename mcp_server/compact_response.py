@@ -0,0 +1,68 @@
+"""
+Compact Response - MCP 도구의 압축 JSON 응답 형식
+역할: response_format='compact' 로 호출된 도구 결과를 장식 없는 최소 JSON 으로 직렬화
+      - 구분자 공백 없음, 비ASCII 그대로 (한글을 \\uXXXX 로 늘리지 않음)
+      - fields 로 고른 키만 포함 (생략 시 도구별 기본 키)
+      - 행 단위 결과는 열 기준 배열 {"columns": [...], "values": [[열1 값...], [열2 값...]]} 로 키 반복 제거
+      - 오류/안내 문장은 {"error": ...} / {"message": ...} 로 감쌈 (장식 기호 제거)
+구동자: query_mcp_server.py (모든 도구)
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+RESPONSE_FORMATS = ("text", "compact")
+
+# 도구 문자열 응답의 오류 표식 (compact 에서 error 키로 분류)
+_ERROR_MARKS = ("❌", "⏱️", "🛑")
+
+
+def dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """'a,b, c' -> ['a', 'b', 'c'] (생략/빈 문자열이면 None)"""
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(',') if f.strip()]
+    return selected or None
+
+
+def pick(record: Dict[str, Any], fields: Optional[Sequence[str]], default: Sequence[str]) -> Dict[str, Any]:
+    """record 에서 fields(없으면 default) 키만 순서대로 (없는 키는 생략)"""
+    return {k: record[k] for k in (fields or default) if k in record}
+
+
+def columnar(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+    """행 목록 -> 열 기준 배열"""
+    rows = list(rows)
+    return {"columns": list(columns), "values": [[row[i] for row in rows] for i in range(len(columns))]}
+
+
+def records(items: Sequence[Dict[str, Any]], fields: Optional[Sequence[str]], default: Sequence[str]) -> Dict[str, Any]:
+    """레코드(dict) 목록 -> 고른 키의 열 기준 배열"""
+    keys = [k for k in (fields or default) if not items or k in items[0]]
+    return columnar(keys, ([item[k] for k in keys] for item in items))
+
+
+def project(columns: Sequence[str], rows: Sequence[Sequence[Any]],
+            fields: Optional[Sequence[str]]) -> Tuple[List[str], List[Sequence[Any]]]:
+    """결과 행에서 fields 에 있는 컬럼만 fields 순서로 (생략 또는 일치하는 컬럼이 없으면 전체)"""
+    index = [list(columns).index(f) for f in (fields or ()) if f in columns]
+    if not index:
+        return list(columns), list(rows)
+    return [columns[i] for i in index], [[row[i] for i in index] for row in rows]
+
+
+def respond(result: Any, response_format: str) -> str:
+    """도구 결과 -> 응답 문자열 (compact 면 dict 는 JSON, 문자열은 error/message 로 감쌈)"""
+    if response_format != "compact":
+        return result if isinstance(result, str) else dumps(result)
+    if isinstance(result, str):
+        text = result.strip()
+        for mark in _ERROR_MARKS:
+            if text.startswith(mark):
+                return dumps({"error": text[len(mark):].strip()})
+        return dumps({"message": text})
+    return dumps(result)
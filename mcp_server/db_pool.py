@@ -0,0 +1,254 @@
+"""
+DB Pool - MCP 서버용 SQLite 연결 풀
+역할: DB 파일별로 오래 유지되는 읽기 연결 풀과 직렬화된 단일 쓰기 연결을 관리하여,
+      도구 호출마다 sqlite3.connect/close 비용을 내지 않도록 함 (WAL, busy_timeout, cache_size, mmap_size 적용)
+구동자: query_mcp_server.py (query_db 및 쓰기 도구)
+"""
+
+import os
+import sys
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# 프로젝트 루트 추가 및 설정 로드
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+from config.loader import CFG
+
+
+class PoolTimeoutError(RuntimeError):
+    """acquire_timeout 동안 사용 가능한 읽기 연결이 없음"""
+
+
+class DatabasePool:
+    """DB 파일 하나에 대한 읽기 연결 풀 + 직렬화된 쓰기 연결"""
+
+    def __init__(
+        self,
+        path: str,
+        read_connections: int = 4,
+        acquire_timeout: float = 10.0,
+        busy_timeout_ms: int = 5000,
+        cache_size_kb: int = 16384,
+        mmap_size_mb: int = 256
+    ):
+        self.path = path
+        self.max_readers = max(1, read_connections)
+        self.acquire_timeout = acquire_timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size_mb = mmap_size_mb
+
+        # LIFO: 최근에 쓴(페이지 캐시가 따뜻한) 연결을 우선 재사용
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        # 쓰기 연결에 ATTACH 할 DB (스키마 이름 -> 경로): 여러 DB 에 걸친 쓰기를 한 연결/한 트랜잭션으로 처리
+        self._attachments: Dict[str, str] = {}
+
+        self._metrics = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "writes": 0,
+            "write_wait_seconds": 0.0,
+            "write_errors": 0,
+        }
+
+    def _open(self, readonly: bool) -> sqlite3.Connection:
+        """연결 생성 및 PRAGMA 적용 (스레드 간 이동을 허용하되 동시에 한 스레드만 사용)"""
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size={-int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size_mb) << 20}")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = self._open(readonly=False)
+            for name, path in self._attachments.items():
+                self._attach(self._writer, name, path)
+        return self._writer
+
+    @staticmethod
+    def _attach(conn: sqlite3.Connection, name: str, path: str):
+        conn.execute("ATTACH DATABASE ? AS " + name, (path,))
+        conn.execute(f"PRAGMA {name}.journal_mode=WAL")
+        conn.execute(f"PRAGMA {name}.synchronous=NORMAL")
+
+    def attach(self, name: str, path: str):
+        """
+        쓰기 연결에 다른 DB 파일을 스키마 이름으로 연결 (write() 블록에서 `name.테이블` 로 접근)
+        한 트랜잭션/한 COMMIT 으로 두 파일을 함께 갱신하지만, WAL 모드에서는 SQLite 가 파일별로 순서대로
+        커밋하므로 OS 장애 시 파일 간 원자성은 보장되지 않음 (호출 측이 한쪽만 반영된 상태를 허용하도록 설계)
+        """
+        if not name.isidentifier():
+            raise ValueError(f"잘못된 스키마 이름: {name}")
+        with self._writer_lock:
+            if self._attachments.get(name) == path:
+                return
+            if name in self._attachments:
+                raise ValueError(f"이미 다른 DB 가 {name} 으로 연결되어 있습니다: {self._attachments[name]}")
+            self._attachments[name] = path
+            if self._writer is not None:
+                self._attach(self._writer, name, path)
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_readers:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                # 읽기 연결보다 먼저 WAL 로 전환해 두어야 리더가 라이터를 막지 않음
+                with self._writer_lock:
+                    self._writer_connection()
+                return self._open(readonly=True)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        started = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            with self._lock:
+                self._metrics["timeouts"] += 1
+            raise PoolTimeoutError(f"{self.acquire_timeout}s 동안 사용 가능한 읽기 연결이 없습니다: {self.path}")
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._metrics["waited"] += 1
+            self._metrics["wait_seconds"] += waited
+            self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], waited)
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """읽기 연결 대여 (블록 종료 시 풀로 반환)"""
+        conn = self._acquire()
+        with self._lock:
+            self._metrics["acquired"] += 1
+            self._metrics["in_use"] += 1
+            self._metrics["peak_in_use"] = max(self._metrics["peak_in_use"], self._metrics["in_use"])
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self._metrics["in_use"] -= 1
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        쓰기 트랜잭션 (프로세스 내 쓰기는 하나의 연결로 직렬화)
+        BEGIN IMMEDIATE 로 시작해 블록이 정상 종료되면 COMMIT, 예외 시 ROLLBACK
+        """
+        started = time.perf_counter()
+        with self._writer_lock:
+            waited = time.perf_counter() - started
+            conn = self._writer_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                with self._lock:
+                    self._metrics["write_errors"] += 1
+                raise
+            finally:
+                with self._lock:
+                    self._metrics["writes"] += 1
+                    self._metrics["write_wait_seconds"] += waited
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 지표 스냅샷"""
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["created"] = self._created
+        snapshot["idle"] = self._idle.qsize()
+        snapshot["max_readers"] = self.max_readers
+        return snapshot
+
+    def close(self):
+        """유휴 연결과 쓰기 연결 종료 (대여 중인 연결은 반환 시 종료)"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_POOLS: Dict[str, DatabasePool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(path: str) -> DatabasePool:
+    """DB 경로별 공유 풀 (config database.pool 설정 적용, 최초 사용 시 생성)"""
+    pool = _POOLS.get(path)
+    if pool is not None:
+        return pool
+    with _POOLS_LOCK:
+        if path not in _POOLS:
+            pool_cfg = CFG.get('database', {}).get('pool', {})
+            _POOLS[path] = DatabasePool(
+                path,
+                read_connections=pool_cfg.get('read_connections', 4),
+                acquire_timeout=pool_cfg.get('acquire_timeout_seconds', 10.0),
+                busy_timeout_ms=pool_cfg.get('busy_timeout_ms', 5000),
+                cache_size_kb=pool_cfg.get('cache_size_kb', 16384),
+                mmap_size_mb=pool_cfg.get('mmap_size_mb', 256)
+            )
+        return _POOLS[path]
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """생성된 모든 풀의 지표 -> {db 경로: stats}"""
+    return {path: pool.stats() for path, pool in list(_POOLS.items())}
+
+
+@atexit.register
+def close_all():
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.close()
+        _POOLS.clear()
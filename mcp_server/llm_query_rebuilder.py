@@ -2,23 +2,151 @@
 SQL Rebuilder - 쿼리 재구성 엔진
 역할: DB에 저장된 쿼리 조각(SELECT, JOIN, WHERE 등)을 조합하여 실행 가능한 SQL 문장 생성
 구동자: LLM (mcp_server의 도구 호출을 통해 실시간으로 구동됨)
+
+WHERE 를 제외한 부분은 템플릿마다 고정이므로 compile() 로 한 번만 스켈레톤을 만들고,
+요청마다 render() 로 WHERE 절만 조립하여 끼워 넣습니다.
+render_bound() 는 조건 값을 ? 자리표시자로 바꾸고 값 목록을 따로 돌려주므로,
+같은 템플릿의 변형들이 하나의 SQL 형태(=대상 DB 의 prepared statement/실행 계획)를 공유합니다.
 """
-from typing import List, Dict, Any
+import re
+import json
+import hashlib
+from typing import List, Dict, Any, NamedTuple, Tuple
+
+# SQL 리터럴: '문자열'('' 이스케이프) 또는 숫자. 그 외(컬럼 참조, 함수, 서브쿼리 등)는 원문 그대로 둠
+_STRING_LITERAL = re.compile(r"'((?:[^']|'')*)'", re.DOTALL)
+_NUMBER_LITERAL = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_INTEGER_LITERAL = re.compile(r"[-+]?\d+")
+# 따옴표/괄호 밖의 구분자 탐색용 토큰
+_SPLIT_TOKENS = re.compile(r"'(?:[^']|'')*'|[(),]|\bAND\b", re.IGNORECASE | re.DOTALL)
+# 값이 모두 자리표시자로 바뀐 조건 조각: ?, (?, ?, ...), ? AND ?
+_PLACEHOLDERS_ONLY = re.compile(r"\?|\(\?(?:, \?)*\)|\? AND \?")
+
+
+def _parse_literal(text: str) -> Tuple[bool, Any]:
+    """SQL 리터럴 하나 -> (리터럴 여부, 파이썬 값)"""
+    text = text.strip()
+    m = _STRING_LITERAL.fullmatch(text)
+    if m:
+        return True, m.group(1).replace("''", "'")
+    if _NUMBER_LITERAL.fullmatch(text):
+        return True, int(text) if _INTEGER_LITERAL.fullmatch(text) else float(text)
+    return False, None
+
+
+def _join_keyword(join_type: Any) -> str:
+    """'LEFT' -> 'LEFT JOIN', 'INNER JOIN' 은 그대로 (분석기 버전에 따라 JOIN 키워드 포함 여부가 다름)"""
+    kind = " ".join(str(join_type or "").split())
+    return kind if kind.upper().endswith("JOIN") else f"{kind} JOIN".strip()
+
+
+def _split_top_level(text: str, separator: str) -> List[str]:
+    """따옴표/괄호 밖의 separator(',' 또는 'AND') 기준 분리"""
+    parts, depth, start = [], 0, 0
+    for m in _SPLIT_TOKENS.finditer(text):
+        token = m.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0 and token.upper() == separator:
+            parts.append(text[start:m.start()])
+            start = m.end()
+    parts.append(text[start:])
+    return parts
+
+
+def _sql_literal(value: Any) -> str:
+    """파이썬 값 -> SQL 리터럴 (문자열은 '' 이스케이프하여 인용)"""
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _bind_value(value: Any, params: List[Any], inline: bool = False) -> str:
+    """값 하나를 자리표시자로 (inline=True 면 정규화된 SQL 리터럴로, 리터럴이 아니면 원문 유지)"""
+    if isinstance(value, bool) or value is None:
+        return str(value).upper() if value is not None else "NULL"
+    if isinstance(value, (int, float)):
+        params.append(value)
+        return _sql_literal(value) if inline else "?"
+    text = str(value)
+    is_literal, parsed = _parse_literal(text)
+    if is_literal:
+        params.append(parsed)
+        return _sql_literal(parsed) if inline else "?"
+    return text.strip()
+
+
+def _bind_item(item: Any, params: List[Any], inline: bool = False) -> str:
+    """JSON 배열 항목 하나 (JSON 문자열은 '140' 처럼 숫자 모양이어도 SQL 조각이 아니라 문자열 값으로 바인딩)"""
+    if isinstance(item, str) and not _STRING_LITERAL.fullmatch(item.strip()):
+        params.append(item)
+        return _sql_literal(item) if inline else "?"
+    return _bind_value(item, params, inline)
+
+
+def _bind_condition(operator: str, value: Any, params: List[Any], inline: bool = False) -> str:
+    """연산자별 값 바인딩 (IN 목록 / BETWEEN 양 끝 확장, inline=True 면 자리표시자 대신 리터럴)"""
+    op = operator.strip().upper()
+    if op in ("IN", "NOT IN"):
+        if isinstance(value, (list, tuple)):
+            return "(" + ", ".join(_bind_item(item, params, inline) for item in value) + ")"
+        text = str(value).strip()
+        inner = text[1:-1] if text.startswith('(') and text.endswith(')') else text
+        # 서브쿼리 IN 은 바인딩하지 않음
+        if re.match(r"\s*SELECT\b", inner, re.IGNORECASE):
+            return text
+        items = _split_top_level(inner, ',')
+        return "(" + ", ".join(_bind_value(item, params, inline) for item in items) + ")"
+    if op in ("BETWEEN", "NOT BETWEEN"):
+        if isinstance(value, (list, tuple)) and len(value) == 2:
+            return f"{_bind_item(value[0], params, inline)} AND {_bind_item(value[1], params, inline)}"
+        bounds = _split_top_level(str(value), 'AND')
+        if len(bounds) == 2:
+            return f"{_bind_value(bounds[0], params, inline)} AND {_bind_value(bounds[1], params, inline)}"
+        return str(value)
+    return _bind_value(value, params, inline)
+
+
+class TemplateSkeleton(NamedTuple):
+    """WHERE 자리를 비워 둔 컴파일된 쿼리 (head: SELECT~JOIN, tail: GROUP BY/ORDER BY)"""
+    head: str
+    tail: Tuple[str, ...]
+
+    def render(self, where_conditions: List[Dict[str, Any]]) -> str:
+        """WHERE 절만 조립하여 스켈레톤에 삽입"""
+        where_clause = SQLRebuilder.render_where(where_conditions)
+        if where_clause:
+            return "\n".join((self.head, where_clause) + self.tail)
+        return "\n".join((self.head,) + self.tail)
+
+    def render_bound(self, where_conditions: List[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """WHERE 절을 자리표시자(?)로 조립 -> (SQL 형태, 순서대로의 바인딩 값 목록)"""
+        where_clause, params = SQLRebuilder.render_where_bound(where_conditions)
+        if where_clause:
+            return "\n".join((self.head, where_clause) + self.tail), params
+        return "\n".join((self.head,) + self.tail), params
+
+    @property
+    def version(self) -> str:
+        """스켈레톤 내용 해시 (템플릿 재마이그레이션이나 컴파일 방식 변경으로 SQL 이 바뀌면 달라짐)"""
+        return hashlib.sha256("\n".join((self.head,) + self.tail).encode('utf-8')).hexdigest()[:16]
+
 
 class SQLRebuilder:
     """SQL 구성 요소를 사용하여 SQL 쿼리를 재구성합니다."""
     
     @staticmethod
-    def rebuild(
+    def compile(
         select_columns: List[Dict[str, Any]],
         from_table: str,
         joins: List[Dict[str, Any]],
-        where_conditions: List[Dict[str, Any]],
         group_by: List[str] = None,
         order_by: List[str] = None
-    ) -> str:
+    ) -> TemplateSkeleton:
         """
-        구성 요소를 조합하여 SQL 문자열 생성
+        고정 구성 요소(SELECT, FROM, JOIN, GROUP BY, ORDER BY)를 스켈레톤으로 컴파일
         """
         # 1. SELECT 절
         select_parts = []
@@ -46,39 +174,91 @@ class SQLRebuilder:
         # 3. JOIN 절
         join_parts = []
         for join in joins:
-            join_parts.append(f"{join['join_type']} {join['table_name']} ON {join['on_condition']}")
+            join_parts.append(f"{_join_keyword(join['join_type'])} {join['table_name']} ON {join['on_condition']}")
         
         join_clause = "\n".join(join_parts)
         
-        # 4. WHERE 절
+        head_parts = [select_clause, from_clause]
+        if join_clause:
+            head_parts.append(join_clause)
+        
+        # 5. GROUP BY / 6. ORDER BY 절 (WHERE 뒤에 붙는 고정 부분)
+        tail_parts = []
+        if group_by:
+            tail_parts.append("GROUP BY " + ", ".join(group_by))
+        if order_by:
+            tail_parts.append("ORDER BY " + ", ".join(order_by))
+        
+        return TemplateSkeleton(head="\n".join(head_parts), tail=tuple(tail_parts))
+
+    @staticmethod
+    def render_where(where_conditions: List[Dict[str, Any]]) -> str:
+        """4. WHERE 절 (조건이 없으면 빈 문자열)"""
+        where_parts = [SQLRebuilder.render_condition(cond) for cond in where_conditions]
+        
+        if where_parts:
+            return "WHERE " + "\n  AND ".join(where_parts)
+        return ""
+
+    @staticmethod
+    def render_condition(cond: Dict[str, Any]) -> str:
+        """조건 하나 -> 리터럴 SQL 조각 (render_where_bound 와 같은 IN/BETWEEN 확장, 문자열 값은 인용)"""
+        col_name = cond.get('column') or cond.get('column_name')
+        return f"{col_name} {cond['operator']} {_bind_condition(cond['operator'], cond['value'], [], inline=True)}"
+
+    @staticmethod
+    def fingerprint(parent_query_id: str, category: str, where_conditions: List[Dict[str, Any]],
+                    template_version: str) -> str:
+        """
+        (원본 쿼리, 템플릿 버전, SELECT 카테고리, 정규화·정렬된 조건) -> sha256 지문
+        공백/대소문자(연산자), 리터럴 표기('' 이스케이프, 괄호 안 공백), 조건 순서, IN 목록의 값 순서/중복이 달라도 같은 지문
+        template_version(TemplateSkeleton.version)이 바뀌면 지문도 바뀌어 이전 스켈레톤으로 만든 생성 쿼리를 재사용하지 않음
+        """
+        canonical = []
+        for cond in where_conditions:
+            params: List[Any] = []
+            col_name = " ".join(str(cond.get('column') or cond.get('column_name')).split())
+            operator = " ".join(str(cond['operator']).split()).upper()
+            fragment = " ".join(_bind_condition(operator, cond['value'], params).split())
+            if operator in ("IN", "NOT IN") and _PLACEHOLDERS_ONLY.fullmatch(fragment):
+                # IN 목록은 집합이므로 값 순서/중복이 달라도 같은 지문 (렌더링되는 SQL 은 그대로)
+                params = [json.loads(v) for v in sorted({json.dumps(p, ensure_ascii=False) for p in params})]
+                fragment = "(" + ", ".join("?" * len(params)) + ")"
+            canonical.append([col_name, operator, fragment, params])
+        canonical.sort(key=lambda c: json.dumps(c, ensure_ascii=False))
+        payload = json.dumps([parent_query_id, template_version, category, canonical], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def literal_values(operator: str, value: Any) -> List[Any]:
+        """조건 값의 리터럴 목록 (IN 항목 / BETWEEN 양 끝 / 단일 값) -> 리터럴이 아닌 값이 섞이면 빈 목록"""
+        params: List[Any] = []
+        fragment = _bind_condition(operator, value, params)
+        return params if _PLACEHOLDERS_ONLY.fullmatch(fragment) else []
+
+    @staticmethod
+    def render_where_bound(where_conditions: List[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """4. WHERE 절 (값은 ? 자리표시자, IN/BETWEEN 은 값 개수만큼 확장) -> (절, 바인딩 값 목록)"""
         where_parts = []
+        params: List[Any] = []
         for cond in where_conditions:
             col_name = cond.get('column') or cond.get('column_name')
-            where_parts.append(f"{col_name} {cond['operator']} {cond['value']}")
+            where_parts.append(f"{col_name} {cond['operator']} {_bind_condition(cond['operator'], cond['value'], params)}")
         
-        where_clause = ""
         if where_parts:
-            where_clause = "WHERE " + "\n  AND ".join(where_parts)
-        
-        # 5. GROUP BY 절
-        group_by_clause = ""
-        if group_by:
-            group_by_clause = "GROUP BY " + ", ".join(group_by)
-            
-        # 6. ORDER BY 절
-        order_by_clause = ""
-        if order_by:
-            order_by_clause = "ORDER BY " + ", ".join(order_by)
-            
-        # 전체 쿼리 조합
-        query_parts = [select_clause, from_clause]
-        if join_clause:
-            query_parts.append(join_clause)
-        if where_clause:
-            query_parts.append(where_clause)
-        if group_by_clause:
-            query_parts.append(group_by_clause)
-        if order_by_clause:
-            query_parts.append(order_by_clause)
-            
-        return "\n".join(query_parts)
+            return "WHERE " + "\n  AND ".join(where_parts), params
+        return "", params
+
+    @staticmethod
+    def rebuild(
+        select_columns: List[Dict[str, Any]],
+        from_table: str,
+        joins: List[Dict[str, Any]],
+        where_conditions: List[Dict[str, Any]],
+        group_by: List[str] = None,
+        order_by: List[str] = None
+    ) -> str:
+        """
+        구성 요소를 조합하여 SQL 문자열 생성 (compile + render 1회성 경로)
+        """
+        return SQLRebuilder.compile(select_columns, from_table, joins, group_by, order_by).render(where_conditions)
@@ -0,0 +1,39 @@
+"""
+Page Token - 목록/검색 도구의 키셋 페이지 이어받기 토큰
+역할: 마지막으로 돌려준 행의 정렬 키와 요청 조건(scope)을 불투명한 문자열 하나로 묶어,
+      다음 호출이 OFFSET 없이 '정렬 키 다음' 부터 인덱스를 읽도록 함 (깊은 페이지도 페이지당 비용 일정)
+      - 형식: base64url(JSON [버전, 도구, scope, state]) - 서버에 상태를 남기지 않으므로 만료/재시작과 무관
+      - scope(검색어, 필터 등)가 현재 요청과 다르거나 형식이 깨진 토큰은 PageTokenError
+구동자: query_mcp_server.py (list_queries / search_queries)
+"""
+
+import json
+import base64
+import binascii
+from typing import Any, Dict, Sequence
+
+_VERSION = 1
+
+
+class PageTokenError(ValueError):
+    """해석할 수 없거나 다른 요청(도구/검색어/필터)의 페이지 토큰"""
+
+
+def encode(kind: str, scope: Sequence[Any], state: Dict[str, Any]) -> str:
+    """(도구, 요청 조건, 이어받을 위치) -> 토큰 문자열"""
+    raw = json.dumps([_VERSION, kind, list(scope), state], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode(token: str, kind: str, scope: Sequence[Any]) -> Dict[str, Any]:
+    """토큰 -> 이어받을 위치 (도구/요청 조건이 다르면 PageTokenError)"""
+    try:
+        raw = base64.urlsafe_b64decode(token.strip() + "=" * (-len(token.strip()) % 4))
+        version, token_kind, token_scope, state = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise PageTokenError("페이지 토큰 형식이 올바르지 않습니다")
+    if version != _VERSION or token_kind != kind or not isinstance(state, dict):
+        raise PageTokenError("이 도구의 페이지 토큰이 아닙니다")
+    if token_scope != list(scope):
+        raise PageTokenError("페이지 토큰이 현재 요청과 다른 조건(검색어/필터)으로 만들어졌습니다")
+    return state
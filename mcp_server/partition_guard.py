@@ -0,0 +1,186 @@
+"""
+Partition Guard - 파티션 키 조건 검사 및 파티션 분할 계획
+역할: 템플릿이 선언한 파티션 키(query_where_conditions.condition_type = 'partition_key') 조건이
+      생성 쿼리에서 빠져 사실 테이블 전체를 스캔하게 되는 요청을 막음
+      - missing_filter "reject": 수정/실행 요청 거부, "bound": 원본 템플릿의 파티션 조건을 자동으로 추가
+      - 파티션 키 범위(BETWEEN 날짜 범위, IN 목록)를 파티션 값별 '=' 조건 목록으로 나누어,
+        result_cursor.py 가 하위 쿼리를 병렬 실행한 뒤 이어 붙이도록 함
+        (파티션끼리 결과 행이 겹치지 않는 템플릿만: 집계가 없거나 GROUP BY 에 파티션 키가 있고, ORDER BY 가 없음)
+구동자: query_mcp_server.py (modify_where_conditions / execute_query)
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .llm_query_rebuilder import SQLRebuilder
+except ImportError:
+    from llm_query_rebuilder import SQLRebuilder
+
+
+class PartitionFilterError(ValueError):
+    """파티션 키 조건이 없어 사실 테이블 전체를 스캔하게 되는 요청 (reject 모드 또는 자동 추가 불가)"""
+
+
+# 파티션 범위를 닫는 연산자 (한쪽만 있는 범위 비교는 하한/상한이 모두 있어야 함)
+_BOUNDING_OPERATORS = frozenset(("=", "IN", "BETWEEN"))
+_LOWER_OPERATORS = frozenset((">", ">="))
+_UPPER_OPERATORS = frozenset(("<", "<="))
+
+
+def _bare_column(column: Any) -> str:
+    """'T.base_date' -> 'base_date' (테이블 별칭/인용 부호 제외, 소문자)"""
+    return str(column).rsplit('.', 1)[-1].strip().strip('"`[]').lower()
+
+
+def _condition_column(cond: Dict[str, Any]) -> str:
+    return cond.get('column') or cond.get('column_name')
+
+
+def _sql_literal(value: Any) -> Any:
+    """파티션 값 -> 조건 값 (문자열은 SQL 리터럴로 인용, 숫자는 그대로 바인딩)"""
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return value
+
+
+class PartitionGuard:
+    """파티션 키 조건 강제 + 범위 분할 (지표: 거부/자동 추가 횟수, 템플릿별 거부 횟수)"""
+
+    def __init__(
+        self,
+        missing_filter: str = "reject",
+        value_format: str = "%Y%m%d",
+        max_split_partitions: int = 31
+    ):
+        self.missing_filter = missing_filter if missing_filter in ("reject", "bound") else "reject"
+        self.value_format = value_format
+        self.max_split_partitions = max(0, max_split_partitions)
+        self._lock = threading.Lock()
+        self._metrics = {"rejected_modify": 0, "rejected_execute": 0, "bounded": 0}
+        self._rejected_by_template: Counter = Counter()
+
+    @staticmethod
+    def partition_keys(template) -> Tuple[str, ...]:
+        """템플릿이 선언한 파티션 키 컬럼명 (별칭 제외, 중복 제거)"""
+        return tuple(dict.fromkeys(_bare_column(c.column_name) for c in template.partition_conditions()))
+
+    @staticmethod
+    def is_bounded(key: str, conditions: Sequence[Dict[str, Any]]) -> bool:
+        """조건 목록이 파티션 키 key 의 범위를 닫는지 (=, IN, BETWEEN 또는 하한+상한 비교)"""
+        operators = {" ".join(str(c['operator']).split()).upper()
+                     for c in conditions if _bare_column(_condition_column(c)) == key}
+        return bool(operators & _BOUNDING_OPERATORS) or bool(operators & _LOWER_OPERATORS and operators & _UPPER_OPERATORS)
+
+    def enforce(self, template, conditions: List[Dict[str, Any]], stage: str,
+                can_bound: bool = True) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        파티션 키 조건 검사 -> (적용할 조건 목록, 자동 추가한 조건 목록)
+        stage: 'modify' | 'execute' (거부 지표 구분), can_bound=False 면 bound 모드여도 거부
+        빠진 키가 있고 자동 추가하지 않으면 PartitionFilterError
+        """
+        missing: Dict[str, Any] = {}
+        for cond in template.partition_conditions():
+            key = _bare_column(cond.column_name)
+            if not self.is_bounded(key, conditions):
+                missing.setdefault(key, []).append(cond)
+        if not missing:
+            return conditions, []
+
+        if self.missing_filter == "bound" and can_bound:
+            added = [
+                {"column": c.column_name, "operator": c.operator, "value": c.value, "type": "partition_key"}
+                for conds in missing.values() for c in conds
+            ]
+            with self._lock:
+                self._metrics["bounded"] += 1
+            return list(conditions) + added, added
+
+        with self._lock:
+            self._metrics[f"rejected_{stage}"] += 1
+            self._rejected_by_template[template.query_id] += 1
+        raise PartitionFilterError(
+            f"파티션 키 조건({', '.join(missing)})이 없어 {template.from_table} 전체를 스캔하게 되므로 거부했습니다"
+        )
+
+    def splittable(self, template) -> bool:
+        """파티션별 결과를 이어 붙여도 전체 결과와 같은 템플릿인지"""
+        if template.order_by:
+            return False
+        keys = set(self.partition_keys(template))
+        if template.group_by:
+            return any(_bare_column(g) in keys for g in template.group_by)
+        return not any(c.aggregation for c in template.select_columns)
+
+    def partition_values(self, operator: str, value: Any, limit: Optional[int] = None) -> List[Any]:
+        """
+        파티션 키 조건 하나가 가리키는 파티션 값 목록 (=: 1개, IN: 목록, BETWEEN: 일 단위 날짜)
+        열거할 수 없거나 limit(생략 시 max_split_partitions) 초과면 빈 목록
+        """
+        limit = self.max_split_partitions if limit is None else limit
+        op = " ".join(str(operator).split()).upper()
+        literals = SQLRebuilder.literal_values(op, value)
+        if op in ("=", "IN"):
+            values = list(dict.fromkeys(literals))
+        elif op == "BETWEEN" and len(literals) == 2:
+            values = self._date_range(literals[0], literals[1], limit)
+        else:
+            return []
+        return values if len(values) <= limit else []
+
+    def partition_range(self, template, conditions: List[Dict[str, Any]],
+                        limit: Optional[int] = None) -> Optional[Tuple[int, List[Any]]]:
+        """첫 번째로 열거 가능한 파티션 키 조건 -> (조건 위치, 파티션 값 목록), 없으면 None"""
+        keys = set(self.partition_keys(template))
+        for i, cond in enumerate(conditions):
+            if _bare_column(_condition_column(cond)) not in keys:
+                continue
+            values = self.partition_values(cond['operator'], cond['value'], limit)
+            if values:
+                return i, values
+        return None
+
+    @staticmethod
+    def with_partition(conditions: List[Dict[str, Any]], index: int, value: Any) -> List[Dict[str, Any]]:
+        """index 위치의 파티션 키 조건을 '= value' 로 바꾼 조건 목록"""
+        cond = conditions[index]
+        return conditions[:index] + [{**cond, "operator": "=", "value": _sql_literal(value)}] + conditions[index + 1:]
+
+    def _date_range(self, low: Any, high: Any, limit: int) -> List[Any]:
+        """BETWEEN 양 끝을 value_format 날짜로 해석하여 일 단위 열거 (값 타입 유지, limit + 1 개까지만)"""
+        try:
+            start = datetime.strptime(str(low), self.value_format)
+            end = datetime.strptime(str(high), self.value_format)
+        except ValueError:
+            return []
+        as_int = isinstance(low, int) and isinstance(high, int)
+        values = []
+        day = start
+        while day <= end and len(values) <= limit:
+            text = day.strftime(self.value_format)
+            values.append(int(text) if as_int else text)
+            day += timedelta(days=1)
+        return values
+
+    def split(self, template, conditions: List[Dict[str, Any]]) -> List[Tuple[Any, List[Dict[str, Any]]]]:
+        """
+        파티션 키 범위 조건 하나를 파티션 값별 '=' 조건으로 바꾼 (파티션 값, 조건 목록) 목록
+        분할할 수 없으면(템플릿 구조, 열거 불가, 파티션 1개 이하) 빈 목록
+        """
+        if self.max_split_partitions < 2 or not self.splittable(template):
+            return []
+        found = self.partition_range(template, conditions)
+        if found is None or len(found[1]) < 2:
+            return []
+        index, values = found
+        return [(value, self.with_partition(conditions, index, value)) for value in values]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["rejected"] = snapshot["rejected_modify"] + snapshot["rejected_execute"]
+            snapshot["rejected_by_template"] = dict(self._rejected_by_template.most_common(5))
+            snapshot["missing_filter"] = self.missing_filter
+        return snapshot
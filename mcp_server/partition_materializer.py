@@ -0,0 +1,248 @@
+"""
+Partition Materializer - 파티션별 집계 결과 머티리얼라이즈
+역할: GROUP BY 집계 템플릿의 결과를 파티션 값(base_date 등)별로 로컬 SQLite 파일에 보관하고,
+      다른 날짜 범위 요청이 오면 보관되지 않은 파티션만 대상 DB 에서 계산한 뒤
+      합칠 수 있는 집계(COUNT/SUM/TOTAL 은 더하기, MIN/MAX 는 최소/최대)를 그룹 키별로 병합
+      - 키: (템플릿 ID, 변형 키 = 파티션 조건을 뺀 나머지 조건/카테고리 지문, 파티션 값) + 템플릿 asset_id
+        (재마이그레이션되면 이전 파티션 결과는 무시되고 다시 계산하여 덮어씀)
+      - 최근 파티션(recent_days 이내)은 데이터가 계속 들어오므로 짧은 TTL(recent_ttl_seconds) 적용
+      - AVG, COUNT(DISTINCT ...), 식 안의 집계처럼 파티션별 결과로 합칠 수 없는 템플릿은 대상에서 제외
+구동자: query_mcp_server.py (execute_query)
+"""
+
+import os
+import re
+import json
+import time
+import pickle
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# SELECT 식 전체가 합칠 수 있는 집계 호출 하나인 경우 (별칭 제외 후 검사)
+_MERGEABLE_CALL = re.compile(r"(COUNT|SUM|TOTAL|MIN|MAX)\s*\((.*)\)", re.IGNORECASE | re.DOTALL)
+# 그 외 집계 함수 (식 안에 있으면 파티션별 결과로 합칠 수 없음)
+_ANY_AGGREGATE = re.compile(r"\b(COUNT|SUM|TOTAL|MIN|MAX|AVG|GROUP_CONCAT|STRING_AGG)\s*\(", re.IGNORECASE)
+_TRAILING_ALIAS = re.compile(r"\s+AS\s+\S.*$", re.IGNORECASE | re.DOTALL)
+_ORDER_ITEM = re.compile(r"^(.*?)(?:\s+(ASC|DESC))?$", re.IGNORECASE | re.DOTALL)
+
+_MERGE_KINDS = {"COUNT": "sum", "SUM": "sum", "TOTAL": "sum", "MIN": "min", "MAX": "max"}
+
+
+class AggregatePlan(NamedTuple):
+    """병합 계획: 컬럼별 방식(None 이면 그룹 키, 'sum' | 'min' | 'max'), 정렬 (컬럼 위치, 내림차순 여부)"""
+    kinds: Tuple[Optional[str], ...]
+    order: Tuple[Tuple[int, bool], ...]
+
+
+def _balanced(text: str) -> bool:
+    depth = 0
+    for ch in text:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def _strip_alias(expression: str) -> str:
+    return _TRAILING_ALIAS.sub("", expression.strip())
+
+
+def _merge_kind(expression: Optional[str], aggregation: Optional[str]) -> Optional[str]:
+    """SELECT 식 하나의 병합 방식 -> None(그룹 키) | 'sum' | 'min' | 'max' | '' (합칠 수 없는 집계)"""
+    expr = _strip_alias(expression or "")
+    m = _MERGEABLE_CALL.fullmatch(expr)
+    if m and _balanced(m.group(2)) and not m.group(2).lstrip().upper().startswith("DISTINCT"):
+        return _MERGE_KINDS[m.group(1).upper()]
+    if aggregation or _ANY_AGGREGATE.search(expr):
+        return ""
+    return None
+
+
+def _output_index(select_columns: Sequence[Any], item: str) -> Optional[int]:
+    """식 또는 별칭이 item 인 결과 컬럼 위치 (없으면 None)"""
+    target = " ".join(item.split())
+    for i, c in enumerate(select_columns):
+        names = {" ".join(_strip_alias(c.expression or "").split()), (c.alias or "").strip("'\"")}
+        if target in names or target.strip("'\"") in names:
+            return i
+    return None
+
+
+def aggregate_plan(select_columns: Sequence[Any], order_by: Sequence[str],
+                   group_by: Sequence[str] = ()) -> Optional[AggregatePlan]:
+    """
+    SELECT 컬럼(template_cache.SelectColumn) + ORDER BY + GROUP BY -> 병합 계획
+    집계가 없거나, 합칠 수 없는 집계가 있거나, ORDER BY 항목을 결과 컬럼에서 찾을 수 없거나,
+    GROUP BY 식이 집계가 아닌 결과 컬럼이 아니면 None
+    (선택하지 않은 컬럼으로 묶으면 결과 행만으로는 그룹을 구분할 수 없어 서로 다른 그룹이 합쳐짐)
+    """
+    kinds = tuple(_merge_kind(c.expression, c.aggregation) for c in select_columns)
+    if "" in kinds or not any(kinds):
+        return None
+    for item in group_by:
+        index = _output_index(select_columns, item)
+        if index is None or kinds[index] is not None:
+            return None
+
+    order = []
+    for item in order_by:
+        m = _ORDER_ITEM.match(item.strip())
+        index = _output_index(select_columns, m.group(1))
+        if index is None:
+            return None
+        order.append((index, (m.group(2) or "").upper() == "DESC"))
+    return AggregatePlan(kinds, tuple(order))
+
+
+def merge_rows(plan: AggregatePlan, partitions: Sequence[Sequence[tuple]]) -> List[tuple]:
+    """파티션별 GROUP BY 결과 -> 그룹 키별로 집계를 합친 결과 (그룹 최초 등장 순서, ORDER BY 가 있으면 정렬)"""
+    key_index = [i for i, kind in enumerate(plan.kinds) if kind is None]
+    groups: Dict[tuple, list] = {}
+    for rows in partitions:
+        for row in rows:
+            key = tuple(row[i] for i in key_index)
+            merged = groups.get(key)
+            if merged is None:
+                groups[key] = list(row)
+                continue
+            for i, kind in enumerate(plan.kinds):
+                value, current = row[i], merged[i]
+                if kind is None or value is None:
+                    continue
+                if current is None:
+                    merged[i] = value
+                elif kind == "sum":
+                    merged[i] = current + value
+                elif kind == "min":
+                    merged[i] = min(current, value)
+                else:
+                    merged[i] = max(current, value)
+
+    result = [tuple(row) for row in groups.values()]
+    # 여러 정렬 키는 뒤에서부터 안정 정렬 (SQLite 처럼 NULL 은 오름차순에서 먼저)
+    for index, descending in reversed(plan.order):
+        result.sort(key=lambda r: (r[index] is not None, r[index] if r[index] is not None else 0), reverse=descending)
+    return result
+
+
+class PartitionMaterializer:
+    """파티션별 집계 결과 저장소 (SQLite 파일, 스레드 간 공유 연결 + 락)"""
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 86400.0,
+        recent_days: int = 1,
+        recent_ttl_seconds: float = 300.0,
+        value_format: str = "%Y%m%d",
+        max_partitions: int = 366
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.recent_days = max(0, recent_days)
+        self.recent_ttl_seconds = recent_ttl_seconds
+        self.value_format = value_format
+        self.max_partitions = max(1, max_partitions)
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0, "full_reuse": 0, "partitions_reused": 0, "partitions_computed": 0,
+            "partitions_stored": 0, "stale": 0, "rows_merged": 0,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS partition_aggregates (
+                template_id TEXT NOT NULL,
+                variant_key TEXT NOT NULL,
+                partition_value TEXT NOT NULL,
+                asset_id INTEGER,
+                columns TEXT,
+                row_count INTEGER,
+                payload BLOB,
+                created_at REAL,
+                expires_at REAL,
+                PRIMARY KEY (template_id, variant_key, partition_value)
+            )
+        """)
+        self._conn.execute("DELETE FROM partition_aggregates WHERE expires_at <= ?", (time.time(),))
+
+    def _ttl_for(self, value: Any) -> float:
+        """최근 파티션(오늘 기준 recent_days 이내)은 짧은 TTL"""
+        if self.recent_days:
+            try:
+                day = datetime.strptime(str(value), self.value_format)
+            except ValueError:
+                return self.ttl_seconds
+            if day.date() > date.today() - timedelta(days=self.recent_days):
+                return self.recent_ttl_seconds
+        return self.ttl_seconds
+
+    def load(self, template_id: str, asset_id: int, variant_key: str,
+             values: Sequence[Any]) -> Dict[Any, Tuple[Tuple[str, ...], Tuple[tuple, ...]]]:
+        """보관된 파티션 결과 {파티션 값: (컬럼, 행)} (만료/다른 asset_id 는 제외)"""
+        encoded = {json.dumps(v, ensure_ascii=False): v for v in values}
+        found: Dict[Any, Tuple[Tuple[str, ...], Tuple[tuple, ...]]] = {}
+        now = time.time()
+        with self._lock:
+            self._metrics["requests"] += 1
+            keys = list(encoded)
+            for chunk_start in range(0, len(keys), 500):
+                chunk = keys[chunk_start:chunk_start + 500]
+                rows = self._conn.execute(
+                    f"SELECT partition_value, asset_id, columns, payload, expires_at FROM partition_aggregates "
+                    f"WHERE template_id = ? AND variant_key = ? AND partition_value IN ({', '.join('?' * len(chunk))})",
+                    [template_id, variant_key] + chunk
+                ).fetchall()
+                for value, row_asset, columns, payload, expires_at in rows:
+                    if row_asset != asset_id or expires_at <= now:
+                        self._metrics["stale"] += 1
+                        continue
+                    found[encoded[value]] = (tuple(json.loads(columns)), pickle.loads(payload))
+            self._metrics["partitions_reused"] += len(found)
+            self._metrics["partitions_computed"] += len(values) - len(found)
+            if len(found) == len(values):
+                self._metrics["full_reuse"] += 1
+        return found
+
+    def store(self, template_id: str, asset_id: int, variant_key: str, value: Any,
+              columns: Sequence[str], rows: Sequence[tuple]):
+        """파티션 하나의 전체 집계 결과 저장 (같은 키는 덮어씀)"""
+        now = time.time()
+        payload = pickle.dumps(tuple(map(tuple, rows)), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO partition_aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (template_id, variant_key, json.dumps(value, ensure_ascii=False), asset_id,
+                 json.dumps(list(columns), ensure_ascii=False), len(rows), payload, now, now + self._ttl_for(value))
+            )
+            self._metrics["partitions_stored"] += 1
+
+    def record_merge(self, rows: int):
+        with self._lock:
+            self._metrics["rows_merged"] += rows
+
+    def invalidate_template(self, template_id: str) -> int:
+        """템플릿의 모든 파티션 결과 삭제 -> 삭제 수"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM partition_aggregates WHERE template_id = ?", (template_id,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+            stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(row_count), 0), COUNT(DISTINCT template_id) FROM partition_aggregates"
+            ).fetchone()
+        snapshot["stored_partitions"], snapshot["stored_rows"], snapshot["templates"] = stored
+        return snapshot
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -17,24 +17,46 @@ Query Server - SQL Query RAG 시스템 메인 컨트롤러 (MCP 서버)
 """
 
 import os
+import re
 import sys
 import sqlite3
 import json
-from typing import Optional, List, Dict, Any
+import atexit
+import threading
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple, Union
 import argparse
 
+import anyio
+
 # 프로젝트 루트를 Python 경로에 추가 및 설정 로드
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 from config.loader import CFG
+from engine.template_vectors import TemplateVectorIndex
 
 from mcp.server.fastmcp import FastMCP
 try:
     from .llm_query_rebuilder import SQLRebuilder
+    from .db_pool import get_pool, pool_stats
+    from .template_cache import QueryTemplate, TemplateCache
+    from .result_cursor import CursorNotFoundError, QueryCancelledError, QueryTimeoutError, ResultCursorRegistry
+    from .result_cache import ResultCache
+    from .partition_guard import PartitionFilterError, PartitionGuard
+    from .partition_materializer import PartitionMaterializer, aggregate_plan, merge_rows
+    from .compact_response import RESPONSE_FORMATS, columnar, parse_fields, pick, project, records, respond
+    from . import page_token
 except ImportError:
     from llm_query_rebuilder import SQLRebuilder
+    from db_pool import get_pool, pool_stats
+    from template_cache import QueryTemplate, TemplateCache
+    from result_cursor import CursorNotFoundError, QueryCancelledError, QueryTimeoutError, ResultCursorRegistry
+    from result_cache import ResultCache
+    from partition_guard import PartitionFilterError, PartitionGuard
+    from partition_materializer import PartitionMaterializer, aggregate_plan, merge_rows
+    from compact_response import RESPONSE_FORMATS, columnar, parse_fields, pick, project, records, respond
+    import page_token
 
 # MCP 서버 초기화
 mcp = FastMCP("SQL-Query-RAG-Server")
@@ -42,11 +64,39 @@ mcp = FastMCP("SQL-Query-RAG-Server")
 # 데이터베이스 경로
 DB_PATH = CFG['DB_PATH']
 GEN_DB_PATH = CFG['GEN_DB_PATH']
+TARGET_DB_PATH = CFG['TARGET_DB_PATH']
+
+# 유사도 검색 인덱스 (load_json_data.py 가 내보낸 벡터 행렬을 메모리 매핑, 갱신 시 자동 재로딩)
+VECTOR_INDEX = TemplateVectorIndex(CFG['VECTOR_INDEX_PATH'])
+
+
+# 바인딩 SQL 도입 이전에 만들어진 생성 DB 에 추가할 컬럼
+_GENERATED_COLUMNS = {
+    "sql_shape": "TEXT",      # 값이 ? 로 치환된 SQL (같은 템플릿 변형끼리 공유)
+    "bound_params": "TEXT",   # sql_shape 의 ? 순서대로의 값 (JSON 배열)
+    "fingerprint": "TEXT",    # (원본 쿼리, 템플릿 버전, 카테고리, 정규화·정렬된 조건) 지문 -> 동일 요청 재사용
+    "category": "TEXT",       # SELECT 카테고리 (실행 시 파티션 조건 추가/분할을 위해 스켈레톤을 다시 렌더링)
+}
 
 
 def initialize_generated_db():
     """generated_queries 테이블이 포함된 별도 DB 초기화"""
     if os.path.exists(GEN_DB_PATH):
+        conn = sqlite3.connect(GEN_DB_PATH)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(generated_queries)")}
+        for column, col_type in _GENERATED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE generated_queries ADD COLUMN {column} {col_type}")
+        # 이전 행은 지문이 NULL 이므로 유니크 인덱스와 충돌하지 않음
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_gen_fingerprint ON generated_queries(fingerprint)")
+        # 카테고리 컬럼 이전 행은 설명("Modified from X at <category> level")에서 복원
+        conn.execute("""
+            UPDATE generated_queries
+            SET category = replace(substr(description, instr(description, ' at ') + 4), ' level', '')
+            WHERE category IS NULL AND description LIKE 'Modified from % at % level'
+        """)
+        conn.commit()
+        conn.close()
         return
 
     print(f"📦 초기 생성 쿼리 DB 생성 중... ({GEN_DB_PATH})")
@@ -62,6 +112,10 @@ def initialize_generated_db():
             question TEXT,
             description TEXT,
             normalized_sql TEXT,
+            sql_shape TEXT,
+            bound_params TEXT,
+            fingerprint TEXT,
+            category TEXT,
             created_at TEXT,
             tags TEXT
         )
@@ -80,74 +134,404 @@ def initialize_generated_db():
     """)
     
     cursor.execute("CREATE INDEX idx_gen_query_id ON generated_queries(query_id)")
+    cursor.execute("CREATE UNIQUE INDEX idx_gen_fingerprint ON generated_queries(fingerprint)")
+    conn.commit()
+    conn.close()
+
+
+def initialize_catalog_state():
+    """
+    TB_CATALOG_STATE 가 없는 이전 마스터 DB 에 세대 테이블 추가 (템플릿 캐시가 조회할 때마다 읽음)
+    load_json_data.py create_tables 와 같은 정의, 마스터 DB 가 아직 없으면 마이그레이션 때 생성되므로 건너뜀
+    """
+    if not os.path.exists(DB_PATH):
+        return
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS TB_CATALOG_STATE (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO TB_CATALOG_STATE (id, generation) VALUES (1, 0)")
     conn.commit()
     conn.close()
 
 
 # 초기화 실행
 initialize_generated_db()
+initialize_catalog_state()
+
+
+def _db_path(db_type: str) -> str:
+    return DB_PATH if db_type == 'master' else GEN_DB_PATH
 
 
 def query_db(query: str, params=(), db_type: str = 'master') -> Any:
-    """SQLite 쿼리 실행 헬퍼 (master 또는 gen)"""
-    path = DB_PATH if db_type == 'master' else GEN_DB_PATH
+    """SQLite 쿼리 실행 헬퍼 (master 또는 gen, 풀의 읽기 연결 사용)"""
+    path = _db_path(db_type)
     
     if not os.path.exists(path):
         return f"Error: DB file not found at {path}"
     
-    conn = sqlite3.connect(path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
     try:
-        cursor.execute(query, params)
-        rv = cursor.fetchall()
-        conn.close()
-        return rv
+        with get_pool(path).read() as conn:
+            return conn.execute(query, params).fetchall()
     except Exception as e:
-        conn.close()
         return f"[{db_type}] Query Error: {str(e)}"
 
 
+# 도구 실행 스레드: 읽기 작업은 제한된 개수의 작업 스레드에서, 쓰기는 한 번에 하나씩(단일 쓰기 레인) 실행하여
+# 이벤트 루프(SSE 의 모든 클라이언트가 공유)를 막지 않음
+_server_cfg = CFG.get('server', {})
+_READ_LIMITER = anyio.CapacityLimiter(_server_cfg.get('worker_threads', 16))
+_WRITE_LIMITER = anyio.CapacityLimiter(1)
+
+
+async def _run_blocking(fn, *args, cancellable: bool = False):
+    """
+    동기 함수를 읽기 작업 스레드에서 실행
+    cancellable=True 면 fn 의 마지막 인자로 cancel_event 를 넘기고, 요청이 취소되면(클라이언트 취소/연결 종료)
+    이를 설정하여 대상 DB 실행을 즉시 중단시킴
+    """
+    if not cancellable:
+        return await anyio.to_thread.run_sync(fn, *args, limiter=_READ_LIMITER)
+    cancel_event = threading.Event()
+    try:
+        return await anyio.to_thread.run_sync(fn, *args, cancel_event, abandon_on_cancel=True, limiter=_READ_LIMITER)
+    except anyio.get_cancelled_exc_class():
+        cancel_event.set()
+        raise
+
+
+async def _run_write(fn, *args):
+    """쓰기 작업을 단일 쓰기 레인에서 실행 (쓰기끼리 순서대로 처리되어 읽기 작업 스레드를 점유하지 않음)"""
+    return await anyio.to_thread.run_sync(fn, *args, limiter=_WRITE_LIMITER)
+
+
+# 응답 형식: 'text' (장식된 요약 문장) | 'compact' (최소 JSON, compact_response.py), 도구 인자로 호출마다 선택
+_DEFAULT_RESPONSE_FORMAT = _server_cfg.get('response_format', 'text')
+# 목록형 도구(search_queries / list_queries)의 limit 상한
+_MAX_LIMIT = _server_cfg.get('max_limit', 100)
+
+
+def _response_format(response_format: Optional[str]) -> str:
+    """도구 인자 -> 응답 형식 (생략/알 수 없는 값이면 설정 기본값)"""
+    fmt = (response_format or _DEFAULT_RESPONSE_FORMAT).strip().lower()
+    return fmt if fmt in RESPONSE_FORMATS else 'text'
+
+
+def _clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(limit or 10, _MAX_LIMIT))
+
+
+# 마스터 템플릿 캐시 (카탈로그 세대 번호가 바뀌면 자동 무효화)
+TEMPLATE_CACHE = TemplateCache(get_pool(DB_PATH), max_entries=CFG.get('template_cache', {}).get('max_entries', 1024))
+
+# 생성 쿼리 저장은 마스터 쓰기 연결에 생성 DB 를 ATTACH 하여 한 트랜잭션으로 처리
+get_pool(DB_PATH).attach('gen', GEN_DB_PATH)
+
+
+# 대상 DB 실행 결과 캐시 (SQL + 파라미터 키, 템플릿별 TTL, 바이트 예산 LRU, 선택적 SQLite 스필)
+_cache_cfg = CFG.get('result_cache', {})
+RESULT_CACHE = ResultCache(
+    max_bytes=int(_cache_cfg.get('max_bytes_mb', 64)) << 20,
+    max_entry_rows=_cache_cfg.get('max_entry_rows', 10000),
+    ttl_seconds=_cache_cfg.get('ttl_seconds', 300),
+    template_ttl=_cache_cfg.get('template_ttl_seconds', {}),
+    spill_path=CFG['RESULT_SPILL_PATH'] if _cache_cfg.get('spill_enabled') else None,
+    spill_max_bytes=int(_cache_cfg.get('spill_max_mb', 256)) << 20
+) if _cache_cfg.get('enabled', True) else None
+if RESULT_CACHE is not None:
+    atexit.register(RESULT_CACHE.close)
+
+# 대상 DB 실행기 (페이지 단위 fetchmany + 이어받기 커서)
+_target_cfg = CFG.get('target_database', {})
+RESULT_CURSORS = ResultCursorRegistry(
+    TARGET_DB_PATH,
+    page_size=_target_cfg.get('page_size', 100),
+    max_page_size=_target_cfg.get('max_page_size', 1000),
+    ttl_seconds=_target_cfg.get('cursor_ttl_seconds', 300),
+    max_open=_target_cfg.get('max_open_cursors', 16),
+    busy_timeout_ms=CFG.get('database', {}).get('pool', {}).get('busy_timeout_ms', 5000),
+    result_cache=RESULT_CACHE,
+    timeout_seconds=_target_cfg.get('timeout_seconds', 30),
+    max_rows=_target_cfg.get('max_rows', 100000),
+    partition_workers=CFG.get('partition', {}).get('parallel_workers', 4)
+)
+atexit.register(RESULT_CURSORS.close_all)
+
+# 파티션 키 조건 강제 (빠지면 거부 또는 원본 파티션 조건 자동 추가) + 범위 분할 실행
+_partition_cfg = CFG.get('partition', {})
+PARTITION_GUARD = PartitionGuard(
+    missing_filter=_partition_cfg.get('missing_filter', 'reject'),
+    value_format=_partition_cfg.get('value_format', '%Y%m%d'),
+    max_split_partitions=_partition_cfg.get('max_split_partitions', 31)
+)
+
+# GROUP BY 집계 템플릿의 파티션별 결과 저장소 (다른 날짜 범위는 빠진 파티션만 계산 후 병합)
+_materialize_cfg = CFG.get('materialization', {})
+MATERIALIZER = PartitionMaterializer(
+    CFG['MATERIALIZATION_PATH'],
+    ttl_seconds=_materialize_cfg.get('ttl_seconds', 86400),
+    recent_days=_materialize_cfg.get('recent_days', 1),
+    recent_ttl_seconds=_materialize_cfg.get('recent_ttl_seconds', 300),
+    value_format=_partition_cfg.get('value_format', '%Y%m%d'),
+    max_partitions=_materialize_cfg.get('max_partitions', 366)
+) if _materialize_cfg.get('enabled', True) else None
+if MATERIALIZER is not None:
+    atexit.register(MATERIALIZER.close)
+
+
+def get_template(query_id: str) -> Optional[QueryTemplate]:
+    """마스터 템플릿 조회 (캐시 경유, 없으면 None)"""
+    if not os.path.exists(DB_PATH):
+        return None
+    return TEMPLATE_CACHE.get(query_id)
+
+
+def _compile_skeleton(template: QueryTemplate, category: str):
+    """템플릿 + SELECT 카테고리 -> WHERE 자리만 비운 스켈레톤"""
+    return SQLRebuilder.compile(
+        select_columns=[c._asdict() for c in template.columns_for(category)],
+        from_table=template.from_table,
+        joins=[j._asdict() for j in template.joins],
+        group_by=list(template.group_by),
+        order_by=list(template.order_by)
+    )
+
+
+def get_template_skeleton(query_id: str, category: str):
+    """(마스터 템플릿, 컴파일된 스켈레톤) 조회 (캐시 경유, 없으면 (None, None))"""
+    if not os.path.exists(DB_PATH):
+        return None, None
+    return TEMPLATE_CACHE.get_skeleton(query_id, category, _compile_skeleton)
+
+
+# 생성 쿼리 중복 제거 지표 (프로세스 시작 이후 누적)
+_DEDUP_STATS = {"reused": 0, "created": 0}
+_DEDUP_LOCK = threading.Lock()
+
+
+def _count_dedup(key: str):
+    with _DEDUP_LOCK:
+        _DEDUP_STATS[key] += 1
+
+
+def _find_generated_by_fingerprint(conn, fingerprint: str) -> Optional[str]:
+    """같은 지문으로 이미 생성된 쿼리 ID (없으면 None, conn 은 생성 DB 를 gen 으로 ATTACH 한 쓰기 연결)"""
+    row = conn.execute("SELECT query_id FROM gen.generated_queries WHERE fingerprint = ?", (fingerprint,)).fetchone()
+    return row[0] if row else None
+
+
 # ============================================================================
 # Tool 1: 쿼리 검색 (자연어)
 # ============================================================================
+# 검색 인덱스 컬럼 가중치 (question, description, entities, tags, aliases)
+_SEARCH_WEIGHTS = (3.0, 1.0, 1.5, 1.5, 1.0)
+# trigram 토크나이저는 3글자 미만 검색어를 인덱스로 찾을 수 없음
+_MIN_TRIGRAM_LENGTH = 3
+# 매칭 문서가 많은 광범위 검색어는 최근 등록된 후보 N개 안에서만 BM25 순위 계산 (지연 상한)
+_MAX_CANDIDATES = CFG.get('search', {}).get('max_candidates', 2000)
+
+
+def _search_terms(search_text: str) -> List[str]:
+    """인덱스로 찾을 수 있는(3글자 이상) 검색어를 FTS5 문자열 리터럴로 변환"""
+    terms = [t for t in search_text.split() if len(t) >= _MIN_TRIGRAM_LENGTH]
+    return ['"' + t.replace('"', '""') + '"' for t in dict.fromkeys(terms)]
+
+
+def _search_window(match: str) -> Union[str, List[int]]:
+    """
+    BM25 순위를 계산할 후보 rowid 범위 [하한, 상한]
+    하한: 매칭 문서가 많은 광범위 검색어는 최근 등록된 후보 _MAX_CANDIDATES 개까지 (doclist 만 읽으므로 BM25 계산보다 훨씬 저렴)
+    상한: 첫 페이지 시점의 최대 자산 ID (페이지 토큰에 고정하여 이후 등록된 템플릿이 다음 페이지에 끼어들지 않도록)
+    """
+    cutoff = query_db(
+        "SELECT rowid FROM TB_QUERY_SEARCH WHERE TB_QUERY_SEARCH MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+        (match, _MAX_CANDIDATES - 1), db_type='master'
+    )
+    latest = query_db("SELECT COALESCE(MAX(id), 0) AS id FROM TB_QUERY_ASSET", db_type='master')
+    if isinstance(cutoff, str) or isinstance(latest, str):
+        return cutoff if isinstance(cutoff, str) else latest
+    return [cutoff[0][0] if cutoff else 0, latest[0]['id']]
+
+
+def _ranked_search(match: str, unit_type: Optional[str], limit: int, window: List[int],
+                   after_id: Optional[int] = None) -> Any:
+    """
+    FTS5 MATCH + BM25 상위 limit 개를 고른 뒤 자산 정보 조인 (bm25 는 작을수록 관련도 높음)
+    after_id: 이전 페이지 마지막 행의 asset_id - 그 다음 순위부터 (OFFSET 없이 키셋으로 이어받음)
+              bm25 는 테이블 전체 통계(행 수/평균 길이)로 계산되어 페이지 사이의 등록/보관만으로도 값이 바뀌므로,
+              기준 점수는 토큰에 저장하지 않고 같은 쿼리 안에서 그 자산의 현재 점수를 다시 계산해 사용
+    """
+    sql = f"""
+        WITH ranked AS (
+            SELECT s.rowid AS asset_id, bm25(TB_QUERY_SEARCH, {', '.join(map(str, _SEARCH_WEIGHTS))}) AS score
+            FROM TB_QUERY_SEARCH s
+            {'JOIN TB_QUERY_ASSET f ON f.id = s.rowid' if unit_type else ''}
+            WHERE TB_QUERY_SEARCH MATCH ? AND s.rowid BETWEEN ? AND ? {'AND f.unit_type = ?' if unit_type else ''}
+        )
+        SELECT a.query_id, a.question, a.description, a.unit_type, a.entities, a.tags, a.created_at, r.asset_id, r.score
+        FROM (
+            SELECT asset_id, score FROM ranked
+            {'WHERE (score, asset_id) > (SELECT score, asset_id FROM ranked WHERE asset_id = ?)' if after_id is not None else ''}
+            ORDER BY score, asset_id
+            LIMIT ?
+        ) r
+        JOIN TB_QUERY_ASSET a ON a.id = r.asset_id
+        ORDER BY r.score, r.asset_id
+    """
+    params = [match, window[0], window[1]] + ([unit_type] if unit_type else []) + ([after_id] if after_id is not None else []) + [limit]
+    return query_db(sql, tuple(params), db_type='master')
+
+
+def _recent_search(search_text: str, unit_type: Optional[str], limit: int, after: Optional[List[Any]] = None) -> Any:
+    """
+    짧은 검색어(3글자 미만)의 부분 일치 검색 (최근 등록 순, limit 개를 찾으면 스캔 중단)
+    (created_at, query_id) 인덱스를 역순으로 읽으며, after(이전 페이지 마지막 행의 키) 다음부터 이어서 스캔
+    """
+    sql = """
+        SELECT query_id, question, description, unit_type, entities, tags, created_at
+        FROM TB_QUERY_ASSET
+        WHERE (question LIKE ? OR description LIKE ? OR entities LIKE ? OR tags LIKE ?)
+    """
+    params = [f"%{search_text}%", f"%{search_text}%", f"%{search_text}%", f"%{search_text}%"]
+    if unit_type:
+        sql += " AND unit_type = ?"
+        params.append(unit_type)
+    if after:
+        sql += " AND (created_at, query_id) < (?, ?)"
+        params.extend(after)
+    sql += " ORDER BY created_at DESC, query_id DESC LIMIT ?"
+    params.append(limit)
+    return query_db(sql, tuple(params), db_type='master')
+
+
+def _semantic_search(search_text: str, unit_type: Optional[str], limit: int) -> Any:
+    """벡터 유사도 상위 limit 개 템플릿 조회 (유사도 순서 유지)"""
+    hits = VECTOR_INDEX.search(search_text, k=limit, unit_type=unit_type)
+    if not hits:
+        return []
+    asset_ids = [asset_id for asset_id, _ in hits]
+    rows = query_db(
+        f"""SELECT id, query_id, question, description, unit_type, entities, tags, created_at
+            FROM TB_QUERY_ASSET WHERE id IN ({','.join('?' * len(asset_ids))})""",
+        tuple(asset_ids), db_type='master'
+    )
+    if isinstance(rows, str):
+        return rows
+    by_id = {r['id']: r for r in rows}
+    return [by_id[asset_id] for asset_id in asset_ids if asset_id in by_id]
+
+
+def _page_label(count: int, more: bool, continued: bool) -> str:
+    """목록 제목의 개수 표시 (첫 페이지가 전부면 '총 N개')"""
+    if not more and not continued:
+        return f"총 {count}개"
+    return f"{count}개{', 더 있음' if more else ', 마지막 페이지'}"
+
+
+# compact 응답의 기본 필드
+_SEARCH_FIELDS = ("query_id", "question", "unit_type")
+
+
 @mcp.tool()
-def search_queries(search_text: str, unit_type: Optional[str] = None) -> str:
+async def search_queries(
+    search_text: str,
+    unit_type: Optional[str] = None,
+    limit: int = 10,
+    mode: str = 'text',
+    cursor: Optional[str] = None,
+    response_format: Optional[str] = None,
+    fields: Optional[str] = None
+) -> str:
     """
     자연어로 기존 SQL 쿼리 템플릿을 검색합니다. 사용자의 질문과 가장 유사한 구조의 쿼리를 찾는 데 사용하세요.
+    결과는 관련도 순으로 정렬됩니다.
     
     Args:
-        search_text: 검색 키워드 (예: '노선별 이용객', '정류장 위치'). 질문, 설명, 연관 엔티티 내에서 검색합니다.
+        search_text: 검색 키워드 (예: '노선별 이용객', '정류장 위치'). 질문, 설명, 연관 엔티티, 태그, 컬럼 별칭 내에서 검색합니다.
         unit_type: 쿼리의 복잡도 필터 ('unitA': 단순, 'unitB': 상세, 'unitC': 복합). 생략 가능.
+        limit: 페이지당 결과 수 (기본: 10, 최대 설정값 max_limit)
+        mode: 'text' (키워드 일치, BM25 순위) 또는 'semantic' (표현이 달라도 질문/엔티티/테이블/컬럼 구성이 비슷한 템플릿을 벡터 유사도로 검색, 상위 limit 개만)
+        cursor: 이전 응답의 다음 페이지 토큰 (같은 search_text / unit_type / mode 로 호출, 생략 시 첫 페이지)
+        response_format: 'text' (요약 문장) 또는 'compact' (열 기준 JSON: count, more, cursor, columns, values)
+        fields: compact 에서 포함할 필드 (쉼표 구분, 기본: query_id,question,unit_type / 그 외 description,entities,tags,created_at)
     
     Returns:
-        검색된 쿼리 목록 (ID, 질문, 분류 등)
+        검색된 쿼리 목록 (ID, 질문, 분류 등)과 다음 페이지 토큰
     """
+    fmt = _response_format(response_format)
+    result = await _run_blocking(_search_queries, search_text, unit_type, limit, mode, cursor, fmt, parse_fields(fields))
+    return respond(result, fmt)
+
+
+def _search_queries(search_text: str, unit_type: Optional[str] = None, limit: int = 10, mode: str = 'text',
+                    cursor: Optional[str] = None, response_format: str = 'text',
+                    fields: Optional[List[str]] = None) -> Union[str, Dict[str, Any]]:
     try:
-        # 검색 쿼리 구성 (설명과 질문에 가중치를 둠)
-        sql = """
-            SELECT query_id, question, description, unit_type, entities, tags, created_at
-            FROM TB_QUERY_ASSET
-            WHERE (question LIKE ? OR description LIKE ? OR entities LIKE ? OR tags LIKE ?)
-        """
-        params = [f"%{search_text}%", f"%{search_text}%", f"%{search_text}%", f"%{search_text}%"]
-        
-        if unit_type:
-            sql += " AND unit_type = ?"
-            params.append(unit_type)
-        
-        sql += " ORDER BY created_at DESC"
-        
-        rows = query_db(sql, tuple(params), db_type='master')
+        # 한 개 더 조회하여 limit 이후 결과가 있는지(more) 판단
+        limit = _clamp_limit(limit)
+        state = page_token.decode(cursor, "search", [search_text, unit_type, mode]) if cursor else None
+        terms = _search_terms(search_text)
+        next_state = None
+        if mode == 'semantic':
+            if not VECTOR_INDEX.available:
+                return "❌ 유사도 검색 인덱스가 없습니다. load_json_data.py 로 템플릿을 등록하면 생성됩니다."
+            if state is not None:
+                return "❌ 유사도 검색(semantic)은 다음 페이지를 지원하지 않습니다. limit 을 늘려 다시 검색하세요."
+            rows = _semantic_search(search_text, unit_type, limit + 1)
+        elif terms:
+            if state is not None:
+                if 'after_id' not in state:
+                    raise page_token.PageTokenError("이전 형식의 검색 페이지 토큰입니다")
+                match, window = state['match'], state['window']
+                rows = _ranked_search(match, unit_type, limit + 1, window, state['after_id'])
+                if not rows and not query_db("SELECT 1 FROM TB_QUERY_SEARCH WHERE TB_QUERY_SEARCH MATCH ? AND rowid = ?",
+                                             (match, state['after_id']), db_type='master'):
+                    # 기준 행이 보관/삭제되어 점수를 다시 계산할 수 없으면 빈 페이지 대신 재검색 안내
+                    return "❌ 이전 페이지의 마지막 템플릿이 보관/삭제되어 이어서 검색할 수 없습니다. 첫 페이지부터 다시 검색하세요."
+            else:
+                # 모든 검색어를 포함하는 템플릿 우선, 없으면 일부만 포함하는 템플릿으로 완화
+                for match in dict.fromkeys((" ".join(terms), " OR ".join(terms))):
+                    window = _search_window(match)
+                    if isinstance(window, str):
+                        return window
+                    rows = _ranked_search(match, unit_type, limit + 1, window)
+                    if rows:
+                        break
+            if not isinstance(rows, str) and len(rows) > limit:
+                last = rows[limit - 1]
+                next_state = {"match": match, "window": window, "after_id": last['asset_id']}
+        else:
+            rows = _recent_search(search_text, unit_type, limit + 1, state['after'] if state else None)
+            if not isinstance(rows, str) and len(rows) > limit:
+                next_state = {"after": [rows[limit - 1]['created_at'], rows[limit - 1]['query_id']]}
         
         if isinstance(rows, str):
             return rows
+        more = len(rows) > limit
+        rows = rows[:limit]
+        token = page_token.encode("search", [search_text, unit_type, mode], next_state) if next_state else None
+
+        if response_format == 'compact':
+            items = [{
+                "query_id": r['query_id'],
+                "question": r['question'],
+                "description": r['description'],
+                "unit_type": r['unit_type'],
+                "entities": json.loads(r['entities']) if r['entities'] else [],
+                "tags": r['tags'].split(',') if r['tags'] else [],
+                "created_at": r['created_at'],
+            } for r in rows]
+            return {"count": len(items), "more": more, "cursor": token, **records(items, fields, _SEARCH_FIELDS)}
         
         if not rows:
-            return f"🔍 '{search_text}'에 대한 검색 결과가 없습니다."
+            return f"🔍 '{search_text}'에 대한 {'추가 ' if state else ''}검색 결과가 없습니다."
         
         # 결과 포맷팅
-        summary = f"🔍 '{search_text}' 검색 결과 (총 {len(rows)}개)\n\n"
+        summary = f"🔍 '{search_text}' 검색 결과 ({_page_label(len(rows), more, state is not None)})\n\n"
         
         for r in rows:
             entities = json.loads(r['entities']) if r['entities'] else []
@@ -161,21 +545,26 @@ def search_queries(search_text: str, unit_type: Optional[str] = None) -> str:
             if entities:
                 summary += f"   엔티티: {', '.join(entities)}\n"
             summary += "\n"
+        if token:
+            summary += f"➡️ 다음 페이지: search_queries(..., cursor='{token}')\n"
         
         return summary
         
+    except page_token.PageTokenError as e:
+        return f"❌ {str(e)} (cursor 없이 다시 검색하세요)"
     except Exception as e:
         return f"❌ 검색 실패: {str(e)}"
 
 
-
-
-
 # ============================================================================
 # Tool 2: 쿼리 상세 조회
 # ============================================================================
+# compact 응답의 기본 필드 (수정 전 확인에 필요한 조건/카테고리 위주)
+_DETAIL_FIELDS = ("id", "question", "unit_type", "partition_keys", "where", "select")
+
+
 @mcp.tool()
-def get_query_details(query_id: str) -> str:
+async def get_query_details(query_id: str, response_format: Optional[str] = None, fields: Optional[str] = None) -> str:
     """
     특정 쿼리의 상세 구조 및 파라미터 정보를 조회합니다. 쿼리 수정(modify_where_conditions) 전 필수 단계입니다.
     
@@ -186,96 +575,133 @@ def get_query_details(query_id: str) -> str:
     
     Args:
         query_id: 조회할 쿼리 ID (예: 'q_001')
+        response_format: 'text' (요약 문장) 또는 'compact' (JSON, where/joins 는 열 기준 배열, select 는 카테고리별 별칭 목록)
+        fields: compact 에서 포함할 필드 (쉼표 구분, 기본: id,question,unit_type,partition_keys,where,select /
+                그 외 description,parent,entities,complexity,from,joins,presentation,sql,sql_shape,params,
+                created_at,modified_at,modification_count)
     
     Returns:
         쿼리의 논리적 구조, 파라미터, 재생성된 SQL 등의 상세 정보
     """
+    fmt = _response_format(response_format)
+    return respond(await _run_blocking(_get_query_details, query_id, fmt, parse_fields(fields)), fmt)
+
+
+def _compact_details(template: QueryTemplate, generated, conditions, counters, fields: Optional[List[str]]) -> Dict[str, Any]:
+    """상세 정보 -> compact 응답 (fields 로 고른 키만)"""
+    select: Dict[str, List[str]] = {}
+    for col in template.select_columns:
+        select.setdefault(col.category, []).append(col.alias)
+    record = {
+        "id": generated['query_id'] if generated else template.query_id,
+        "question": generated['question'] if generated else template.question,
+        "description": generated['description'] if generated else template.description,
+        "unit_type": 'Generated' if generated else template.unit_type,
+        "parent": template.query_id if generated else None,
+        "entities": list(template.entities or []),
+        "complexity": template.complexity,
+        "from": template.from_table,
+        "joins": columnar(("type", "table", "on"), [(j.join_type, j.table_name, j.on_condition) for j in template.joins]),
+        "partition_keys": list(PARTITION_GUARD.partition_keys(template)),
+        "where": columnar(("column", "operator", "value", "type"),
+                          [(c['column_name'], c['operator'], c['value'], c['condition_type']) for c in conditions]),
+        "select": select,
+        "presentation": {"type": template.presentation_type, "chart": template.chart_type},
+        "sql": generated['normalized_sql'] if generated else template.normalized_sql,
+        "sql_shape": generated['sql_shape'] if generated else None,
+        "params": json.loads(generated['bound_params'] or '[]') if generated else None,
+        "created_at": generated['created_at'] if generated else template.created_at,
+        "modified_at": counters['modified_at'] if counters else None,
+        "modification_count": counters['modification_count'] if counters else None,
+    }
+    return pick(record, fields, _DETAIL_FIELDS)
+
+
+def _get_query_details(query_id: str, response_format: str = 'text',
+                       fields: Optional[List[str]] = None) -> Union[str, Dict[str, Any]]:
     try:
-        # 쿼리 메타데이터 조회 (마스터 및 생성 테이블 모두 확인)
-        rows = query_db("SELECT * FROM TB_QUERY_ASSET WHERE query_id = ?", (query_id,), db_type='master')
-        if not rows or isinstance(rows, str):
+        # 템플릿 조회 (마스터는 캐시, 없으면 생성 DB 확인)
+        template = get_template(query_id)
+        generated = None
+        if template is None:
             rows = query_db("SELECT * FROM generated_queries WHERE query_id = ?", (query_id,), db_type='gen')
-            is_generated = True
-        else:
-            is_generated = False
-        
-        if isinstance(rows, str) or not rows:
-            return f"❌ 쿼리를 찾을 수 없습니다: {query_id}"
-        
-        query = rows[0]
-        entities = json.loads(query['entities']) if not is_generated and query['entities'] else []
-        presentation_config = json.loads(query['presentation_config']) if not is_generated and query['presentation_config'] else {}
-        
-        # 실제 원본 query_id (조인/컬럼 조회용)
-        base_query_id = query['parent_query_id'] if is_generated else query_id
-
-        # JOIN 정보 조회 (고정 - 항상 마스터 DB)
-        joins = query_db("SELECT * FROM query_joins WHERE query_id = ?", (base_query_id,), db_type='master')
-        
-        # WHERE 조건 조회
-        if is_generated:
+            if isinstance(rows, str) or not rows:
+                return f"❌ 쿼리를 찾을 수 없습니다: {query_id}"
+            generated = rows[0]
+            # JOIN / SELECT 구조는 원본(마스터) 템플릿 기준
+            template = get_template(generated['parent_query_id'])
+            if template is None:
+                return f"❌ 원본 쿼리를 찾을 수 없습니다: {generated['parent_query_id']}"
             conditions = query_db("SELECT * FROM generated_query_where_conditions WHERE query_id = ?", (query_id,), db_type='gen')
+            conditions = [] if isinstance(conditions, str) else conditions
+            counters = None
         else:
-            conditions = query_db("SELECT * FROM query_where_conditions WHERE query_id = ?", (query_id,), db_type='master')
-        
-        # SELECT 컬럼 조회 (카테고리별 - 항상 마스터 DB)
-        select_cols = query_db("SELECT * FROM query_select_columns WHERE query_id = ? ORDER BY category, id", (base_query_id,), db_type='master')
+            conditions = [c._asdict() for c in template.where_conditions]
+            # 수정 횟수는 서버가 갱신하는 값이므로 캐시하지 않고 직접 조회
+            counters = query_db("SELECT modified_at, modification_count FROM TB_QUERY_ASSET WHERE query_id = ?", (query_id,), db_type='master')
+            counters = counters[0] if counters and not isinstance(counters, str) else None
+
+        if response_format == 'compact':
+            return _compact_details(template, generated, conditions, counters, fields)
         
         # 상세 정보 포맷팅
         details = f"""
 📋 쿼리 상세 정보
 
-🆔 ID: {query['query_id']}
-❓ 질문: {query['question']}
-📝 설명: {query['description'] or '없음'}
+🆔 ID: {generated['query_id'] if generated else template.query_id}
+❓ 질문: {generated['question'] if generated else template.question}
+📝 설명: {(generated['description'] if generated else template.description) or '없음'}
 
 🏷️ 분류:
-  - 타입: {query.get('unit_type', 'Generated')} ({query.get('unit_description', '수정된 쿼리')})
-  - 엔티티: {', '.join(entities) if entities else '없음'}
-  - 복잡도: {query.get('complexity', 'N/A')}
+  - 타입: {'Generated' if generated else template.unit_type} ({f'{template.query_id} 에서 수정된 쿼리' if generated else template.unit_description})
+  - 엔티티: {', '.join(template.entities) if template.entities else '없음'}
+  - 복잡도: {template.complexity or 'N/A'}
 
 🔧 SQL 구조:
-  - FROM: {query['from_table']}
-  - JOINs: {len(joins) if not isinstance(joins, str) else 0}개
+  - FROM: {template.from_table}
+  - JOINs: {len(template.joins)}개
 """
         
         # JOIN 정보 (고정, 수정 불가)
-        if joins and not isinstance(joins, str) and len(joins) > 0:
+        if template.joins:
             details += "\n  📎 JOIN 관계 (고정, 수정 불가):\n"
-            for join in joins:
-                details += f"    - {join['join_type']} {join['table_name']}\n"
-                details += f"      ON {join['on_condition']}\n"
+            for join in template.joins:
+                details += f"    - {join.join_type} {join.table_name}\n"
+                details += f"      ON {join.on_condition}\n"
         
         # WHERE 조건 (수정 가능)
-        if conditions and not isinstance(conditions, str):
+        if conditions:
             details += "\n  🔍 WHERE 조건 (수정 가능):\n"
             for cond in conditions:
                 details += f"    - {cond['column_name']} {cond['operator']} {cond['value']} ({cond['condition_type']})\n"
         
         # SELECT 컬럼 정보
-        if select_cols and not isinstance(select_cols, str):
+        if template.select_columns:
             details += "\n  📊 SELECT 컬럼 (카테고리별):\n"
             current_cat = None
-            for col in select_cols:
-                if col['category'] != current_cat:
-                    current_cat = col['category']
+            for col in template.select_columns:
+                if col.category != current_cat:
+                    current_cat = col.category
                     details += f"    [{current_cat}]\n"
-                details += f"      - {col['alias']} ({col['expression']})\n"
+                details += f"      - {col.alias} ({col.expression})\n"
 
         # Presentation
         details += f"\n📈 Presentation:\n"
-        details += f"  - 타입: {query['presentation_type']}\n"
-        details += f"  - 차트: {presentation_config.get('chart_type', 'N/A')}\n"
+        details += f"  - 타입: {template.presentation_type}\n"
+        details += f"  - 차트: {template.chart_type or 'N/A'}\n"
         
         # SQL
-        details += f"\n📝 정규화된 SQL:\n{query['normalized_sql']}\n"
+        details += f"\n📝 정규화된 SQL:\n{generated['normalized_sql'] if generated else template.normalized_sql}\n"
+        if generated and generated['sql_shape']:
+            details += f"\n🔗 바인딩 SQL:\n{generated['sql_shape']}\n"
+            details += f"  - 파라미터: {generated['bound_params']}\n"
         
         # 메타데이터
         details += f"\n📅 메타데이터:\n"
-        details += f"  - 생성일: {query['created_at']}\n"
-        if query['modified_at']:
-            details += f"  - 수정일: {query['modified_at']}\n"
-            details += f"  - 수정 횟수: {query['modification_count']}\n"
+        details += f"  - 생성일: {generated['created_at'] if generated else template.created_at}\n"
+        if counters and counters['modified_at']:
+            details += f"  - 수정일: {counters['modified_at']}\n"
+            details += f"  - 수정 횟수: {counters['modification_count']}\n"
         
         return details
         
@@ -286,12 +712,38 @@ def get_query_details(query_id: str) -> str:
 # ============================================================================
 # Tool 3: WHERE 조건 수정
 # ============================================================================
+class _DuplicateRequest(Exception):
+    """쓰기 트랜잭션 안에서 같은 지문의 생성 쿼리를 발견 (롤백 후 재사용)"""
+
+    def __init__(self, query_id: str):
+        super().__init__(query_id)
+        self.query_id = query_id
+
+
+def _generated_exists(conn, query_id: str) -> bool:
+    return conn.execute("SELECT 1 FROM gen.generated_queries WHERE query_id = ?", (query_id,)).fetchone() is not None
+
+
+def _reused_summary(query_id: str, existing_id: str, response_format: str = 'text') -> Union[str, Dict[str, Any]]:
+    if response_format == 'compact':
+        return {"query_id": existing_id, "parent": query_id, "reused": True}
+    return f"""
+♻️ 동일한 조건으로 생성된 쿼리가 이미 있어 재사용합니다.
+
+📋 원본 쿼리: {query_id}
+📝 기존 쿼리: {existing_id}
+
+💡 get_query_details('{existing_id}')로 상세 정보를 확인하세요.
+"""
+
+
 @mcp.tool()
-def modify_where_conditions(
+async def modify_where_conditions(
     query_id: str,
     new_conditions: str,
     user_question: str = "",
-    category: str = 'all'
+    category: str = 'all',
+    response_format: Optional[str] = None
 ) -> str:
     """
     기존 쿼리의 WHERE 조건을 변경하거나 프레젠테이션 수준을 조정하여 새로운 SQL을 생성합니다.
@@ -302,87 +754,142 @@ def modify_where_conditions(
                        형식: '[{"column": "테이블.컬럼", "operator": "=", "value": "값", "type": "filter"}]'
         user_question: 사용자가 입력한 원래 자연어 질문 (검증 및 로깅용)
         category: 출력할 데이터 수준 ('basic': 요약 정보, 'detail': 상세 정보, 'all': 모든 정보)
+        response_format: 'text' (요약 문장) 또는 'compact' (JSON: query_id, parent, reused, params, partition_added, partition_splits)
     
     Returns:
         새로 생성된 쿼리의 ID와 변경 사항 요약
     """
+    # 조회/SQL 조립은 읽기 작업 스레드에서, 저장은 단일 쓰기 레인에서 실행
+    fmt = _response_format(response_format)
+    plan = await _run_blocking(_prepare_modification, query_id, new_conditions, user_question, category, fmt)
+    if isinstance(plan, dict) and "template" in plan:
+        plan = await _run_write(_apply_modification, plan)
+    return respond(plan, fmt)
+
+
+def _prepare_modification(query_id: str, new_conditions: str, user_question: str, category: str,
+                          response_format: str = 'text') -> Union[str, Dict[str, Any]]:
+    """
+    읽기 단계: 템플릿 조회, 조건 파싱, 중복 확인, SQL 조립
+    -> 바로 돌려줄 응답(오류 문자열/재사용) 또는 _apply_modification 에 넘길 저장 계획 ("template" 키가 있는 dict)
+    """
     try:
-        # 기존 쿼리 조회
-        rows = query_db("SELECT * FROM TB_QUERY_ASSET WHERE query_id = ?", (query_id,), db_type='master')
-        
-        if isinstance(rows, str) or not rows:
+        # 기존 쿼리 조회 (구조/스켈레톤은 캐시)
+        query, skeleton = get_template_skeleton(query_id, category)
+        if query is None:
             return f"❌ 쿼리를 찾을 수 없습니다: {query_id}"
         
-        query = rows[0]
-        
         # 새로운 조건 파싱
         try:
             conditions_list = json.loads(new_conditions)
         except:
             return "❌ 조건 형식이 올바르지 않습니다. JSON 배열 형식이어야 합니다."
         
-        # 새로운 쿼리 ID 생성
-        new_query_id = f"{query_id}_modified_{query['modification_count'] + 1}"
-        
-        # 트랜잭션 시작 (여기서는 2개의 DB를 다룸)
-        # 1. 마스터에서 읽기
-        cols_rows = query_db("SELECT * FROM query_select_columns WHERE query_id = ? AND category = ?", (query_id, category), db_type='master')
-        if not cols_rows or isinstance(cols_rows, str):
-            cols_rows = query_db("SELECT * FROM query_select_columns WHERE query_id = ? AND category = 'all'", (query_id,), db_type='master')
-        
-        cols = [dict(r) for r in cols_rows] if not isinstance(cols_rows, str) else []
-        
-        joins_rows = query_db("SELECT * FROM query_joins WHERE query_id = ?", (query_id,), db_type='master')
-        joins = [dict(r) for r in joins_rows] if not isinstance(joins_rows, str) else []
+        # 파티션 키 조건이 빠지면 사실 테이블 전체 스캔 -> 거부 또는 원본 파티션 조건 자동 추가
+        try:
+            conditions_list, partition_added = PARTITION_GUARD.enforce(query, conditions_list, "modify")
+        except PartitionFilterError as e:
+            print(f"🧱 전체 스캔 거부 (수정): template={query_id}", file=sys.stderr)
+            return f"❌ {str(e)}\n💡 파티션 키({', '.join(PARTITION_GUARD.partition_keys(query))}) 조건을 = / IN / BETWEEN 으로 함께 지정하세요."
         
-        # 2. 생성 DB에 쓰기
-        conn_gen = sqlite3.connect(GEN_DB_PATH)
-        cursor_gen = conn_gen.cursor()
+        # 동일 요청(원본과 그 템플릿 버전, 카테고리, 정규화된 조건)이면 기존 생성 쿼리를 쓰기 없이 재사용
+        fingerprint = SQLRebuilder.fingerprint(query_id, category, conditions_list, skeleton.version)
+        existing = query_db("SELECT query_id FROM generated_queries WHERE fingerprint = ?", (fingerprint,), db_type='gen')
+        if existing and not isinstance(existing, str):
+            _count_dedup("reused")
+            return _reused_summary(query_id, existing[0]['query_id'], response_format)
+
+        # 새 SQL 생성 (컴파일된 스켈레톤에 WHERE 절만 삽입)
+        # 표시용 리터럴 SQL + 실행용 바인딩 SQL 형태/파라미터를 함께 보관
+        sql_shape, bound_params = skeleton.render_bound(conditions_list)
+        return {
+            "query_id": query_id,
+            "template": query,
+            "category": category,
+            "response_format": response_format,
+            "user_question": user_question,
+            "conditions": conditions_list,
+            "partition_added": partition_added,
+            "partition_splits": len(PARTITION_GUARD.split(query, conditions_list)),
+            "fingerprint": fingerprint,
+            "new_sql": skeleton.render(conditions_list),
+            "sql_shape": sql_shape,
+            "bound_params": bound_params,
+        }
         
-        # 3. 마스터 DB 업데이트 (수정 횟수)
-        conn_master = sqlite3.connect(DB_PATH)
-        cursor_master = conn_master.cursor()
+    except Exception as e:
+        return f"❌ 쿼리 수정 실패: {str(e)}"
 
-        try:
-            # 새 SQL 생성
-            new_sql = SQLRebuilder.rebuild(
-                select_columns=cols,
-                from_table=query['from_table'],
-                joins=joins,
-                where_conditions=conditions_list,
-                group_by=json.loads(query['group_by']) if query['group_by'] else [],
-                order_by=json.loads(query['order_by']) if query['order_by'] else []
-            )
+
+def _apply_modification(plan: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+    """쓰기 단계: 생성 쿼리 저장 + 마스터 수정 횟수 갱신 -> 응답"""
+    query_id, query, conditions_list = plan["query_id"], plan["template"], plan["conditions"]
+    try:
+        # 마스터 쓰기 연결 하나에 생성 DB 를 gen 으로 ATTACH 하여 한 트랜잭션(BEGIN IMMEDIATE ~ COMMIT 1회)으로 저장
+        # 블록이 정상 종료되면 COMMIT, 예외 시 두 DB 모두 ROLLBACK
+        with get_pool(DB_PATH).write() as conn:
+            # 조회와 쓰기 사이 다른 요청이 같은 조건을 먼저 저장했으면 재사용 (쓰기 락 안에서 재확인)
+            existing_id = _find_generated_by_fingerprint(conn, plan["fingerprint"])
+            if existing_id is not None:
+                raise _DuplicateRequest(existing_id)
+
+            # 새로운 쿼리 ID 할당: 수정 횟수 증가와 새 값 읽기를 한 문장으로 (동시 요청끼리 같은 번호를 받지 않음)
+            allocated = conn.execute(
+                "UPDATE TB_QUERY_ASSET SET modification_count = modification_count + 1 WHERE query_id = ? RETURNING modification_count",
+                (query_id,)
+            ).fetchall()
+            if not allocated:
+                return f"❌ 쿼리를 찾을 수 없습니다: {query_id}"
+            # 재마이그레이션으로 수정 횟수가 초기화되었거나, WAL 모드에서 파일별 커밋 사이 장애로 생성 DB 만 반영된 경우
+            # 이미 쓰인 번호를 건너뛰고 수정 횟수를 맞춤 (반대로 마스터만 반영되면 번호 하나가 비는 것으로 끝남)
+            modification_count = allocated[0][0]
+            while _generated_exists(conn, f"{query_id}_modified_{modification_count}"):
+                modification_count += 1
+            if modification_count != allocated[0][0]:
+                conn.execute("UPDATE TB_QUERY_ASSET SET modification_count = ? WHERE query_id = ?", (modification_count, query_id))
+            new_query_id = f"{query_id}_modified_{modification_count}"
 
             # 1. 생성된 쿼리 메타데이터 저장 (Generated DB)
-            cursor_gen.execute("""
-                INSERT INTO generated_queries (
+            conn.execute("""
+                INSERT INTO gen.generated_queries (
                     query_id, parent_query_id, question, description,
-                    normalized_sql, created_at, tags
-                ) VALUES (?, ?, ?, ?, ?, datetime('now'), ?)
+                    normalized_sql, sql_shape, bound_params, fingerprint, category, created_at, tags
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), ?)
             """, (
                 new_query_id, 
                 query_id, 
-                user_question if user_question else f"RE: {query['question']}", 
-                f"Modified from {query_id} at {category} level",
-                new_sql,
-                query['tags']
+                plan["user_question"] if plan["user_question"] else f"RE: {query.question}", 
+                f"Modified from {query_id} at {plan['category']} level",
+                plan["new_sql"],
+                plan["sql_shape"],
+                json.dumps(plan["bound_params"], ensure_ascii=False),
+                plan["fingerprint"],
+                plan["category"],
+                query.tags
             ))
-            
+        
             # 2. 새로운 WHERE 조건 저장 (Generated DB)
-            for cond in conditions_list:
-                cursor_gen.execute("""
-                    INSERT INTO generated_query_where_conditions (query_id, column_name, operator, value, condition_type)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (new_query_id, cond['column'], cond['operator'], cond['value'], cond.get('type', 'filter')))
-            
-            # 3. 마스터 테이블의 수정 횟수 업데이트
-            cursor_master.execute("UPDATE TB_QUERY_ASSET SET modification_count = modification_count + 1 WHERE query_id = ?", (query_id,))
-            
-            conn_gen.commit()
-            conn_master.commit()
-            
-            summary = f"""
+            conn.executemany("""
+                INSERT INTO gen.generated_query_where_conditions (query_id, column_name, operator, value, condition_type)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(
+                new_query_id, cond['column'], cond['operator'],
+                cond['value'] if isinstance(cond['value'], str) else json.dumps(cond['value'], ensure_ascii=False),
+                cond.get('type', 'filter')
+            ) for cond in conditions_list])
+        _count_dedup("created")
+
+        if plan["response_format"] == 'compact':
+            return {
+                "query_id": new_query_id,
+                "parent": query_id,
+                "reused": False,
+                "params": len(plan["bound_params"]),
+                "partition_added": plan["partition_added"],
+                "partition_splits": plan["partition_splits"],
+            }
+        
+        summary = f"""
 ✅ 쿼리 수정 완료!
 
 📋 원본 쿼리: {query_id}
@@ -390,22 +897,23 @@ def modify_where_conditions(
 
 🔄 수정된 조건:
 """
-            for cond in conditions_list:
-                summary += f"  - {cond['column']} {cond['operator']} {cond['value']}\n"
-            
-            summary += f"\n💾 새 쿼리가 데이터베이스에 저장되었습니다."
-            summary += f"\n\n💡 get_query_details('{new_query_id}')로 상세 정보를 확인하세요."
-            
-            return summary
-            
-        except Exception as e:
-            if 'conn_gen' in locals(): conn_gen.rollback()
-            if 'conn_master' in locals(): conn_master.rollback()
-            return f"❌ 쿼리 수정 실패: {str(e)}"
-        finally:
-            if 'conn_gen' in locals(): conn_gen.close()
-            if 'conn_master' in locals(): conn_master.close()
+        for cond in conditions_list:
+            summary += f"  - {SQLRebuilder.render_condition(cond)}\n"
         
+        if plan["partition_added"]:
+            summary += "📌 파티션 조건 자동 추가 (전체 스캔 방지): " + ", ".join(
+                SQLRebuilder.render_condition(c) for c in plan["partition_added"]) + "\n"
+        if plan["partition_splits"]:
+            summary += f"🧩 실행 시 파티션 {plan['partition_splits']}개로 나누어 병렬 실행합니다.\n"
+        summary += f"\n🔗 바인딩 파라미터 {len(plan['bound_params'])}개 (SQL 형태는 값과 분리 저장)"
+        summary += f"\n💾 새 쿼리가 데이터베이스에 저장되었습니다."
+        summary += f"\n\n💡 get_query_details('{new_query_id}')로 상세 정보를 확인하세요."
+        
+        return summary
+        
+    except _DuplicateRequest as dup:
+        _count_dedup("reused")
+        return _reused_summary(query_id, dup.query_id, plan["response_format"])
     except Exception as e:
         return f"❌ 쿼리 수정 실패: {str(e)}"
 
@@ -414,37 +922,76 @@ def modify_where_conditions(
 # Tool 4: 쿼리 목록 조회
 # ============================================================================
 @mcp.tool()
-def list_queries(unit_type: Optional[str] = None, limit: int = 10) -> str:
+async def list_queries(
+    unit_type: Optional[str] = None,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    response_format: Optional[str] = None,
+    fields: Optional[str] = None
+) -> str:
     """
-    저장된 쿼리 목록을 조회합니다.
+    저장된 쿼리 목록을 최근 등록 순으로 조회합니다.
     
     Args:
         unit_type: 쿼리 타입 필터 (unitA, unitB, unitC) - 선택
-        limit: 최대 결과 수 (기본: 10)
+        limit: 페이지당 결과 수 (기본: 10, 최대 설정값 max_limit)
+        cursor: 이전 응답의 다음 페이지 토큰 (같은 unit_type 으로 호출, 생략 시 첫 페이지)
+        response_format: 'text' (요약 문장) 또는 'compact' (열 기준 JSON: count, more, cursor, columns, values)
+        fields: compact 에서 포함할 필드 (쉼표 구분, 기본: query_id,question,unit_type / 그 외 entities,created_at)
     
     Returns:
-        쿼리 목록
+        쿼리 목록과 다음 페이지 토큰
     """
+    fmt = _response_format(response_format)
+    return respond(await _run_blocking(_list_queries, unit_type, limit, cursor, fmt, parse_fields(fields)), fmt)
+
+
+def _list_queries(unit_type: Optional[str] = None, limit: int = 10, cursor: Optional[str] = None,
+                  response_format: str = 'text', fields: Optional[List[str]] = None) -> Union[str, Dict[str, Any]]:
     try:
+        limit = _clamp_limit(limit)
+        state = page_token.decode(cursor, "list", [unit_type]) if cursor else None
         sql = "SELECT query_id, question, unit_type, entities, created_at FROM TB_QUERY_ASSET"
-        params = []
+        where, params = [], []
         
         if unit_type:
-            sql += " WHERE unit_type = ?"
+            where.append("unit_type = ?")
             params.append(unit_type)
+        # 키셋: 이전 페이지 마지막 행의 (created_at, query_id) 다음부터 (인덱스 idx_asset_created / idx_asset_unit_created)
+        if state is not None:
+            where.append("(created_at, query_id) < (?, ?)")
+            params.extend(state['after'])
+        if where:
+            sql += " WHERE " + " AND ".join(where)
         
-        sql += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
+        # 한 개 더 조회하여 limit 이후 결과가 있는지(more) 판단
+        sql += " ORDER BY created_at DESC, query_id DESC LIMIT ?"
+        params.append(limit + 1)
         
         rows = query_db(sql, tuple(params), db_type='master')
         
         if isinstance(rows, str):
             return rows
+        more = len(rows) > limit
+        rows = rows[:limit]
+        token = page_token.encode(
+            "list", [unit_type], {"after": [rows[-1]['created_at'], rows[-1]['query_id']]}
+        ) if more else None
+
+        if response_format == 'compact':
+            items = [{
+                "query_id": q['query_id'],
+                "question": q['question'],
+                "unit_type": q['unit_type'],
+                "entities": json.loads(q['entities']) if q['entities'] else [],
+                "created_at": q['created_at'],
+            } for q in rows]
+            return {"count": len(items), "more": more, "cursor": token, **records(items, fields, _SEARCH_FIELDS)}
         
         if not rows:
-            return "📭 저장된 쿼리가 없습니다."
+            return "📭 더 이상 저장된 쿼리가 없습니다." if state else "📭 저장된 쿼리가 없습니다."
         
-        summary = f"📚 저장된 쿼리 목록 (총 {len(rows)}개)\n\n"
+        summary = f"📚 저장된 쿼리 목록 ({_page_label(len(rows), more, state is not None)})\n\n"
         
         for q in rows:
             entities = json.loads(q['entities']) if q['entities'] else []
@@ -454,9 +1001,13 @@ def list_queries(unit_type: Optional[str] = None, limit: int = 10) -> str:
             if entities:
                 summary += f"   엔티티: {', '.join(entities)}\n"
             summary += "\n"
+        if token:
+            summary += f"➡️ 다음 페이지: list_queries(..., cursor='{token}')\n"
         
         return summary
         
+    except page_token.PageTokenError as e:
+        return f"❌ {str(e)} (cursor 없이 다시 조회하세요)"
     except Exception as e:
         return f"❌ 쿼리 목록 조회 실패: {str(e)}"
 
@@ -464,19 +1015,38 @@ def list_queries(unit_type: Optional[str] = None, limit: int = 10) -> str:
 # ============================================================================
 # Tool 5: 시스템 상태 확인
 # ============================================================================
+# compact 응답의 기본 섹션
+_STATUS_FIELDS = ("catalog", "target", "result_cache")
+
+
 @mcp.tool()
-def check_system_status() -> str:
+async def check_system_status(response_format: Optional[str] = None, fields: Optional[str] = None) -> str:
     """
     SQL Query RAG 시스템의 상태를 확인합니다.
     
+    Args:
+        response_format: 'text' (요약 문장) 또는 'compact' (섹션별 지표 JSON)
+        fields: compact 에서 포함할 섹션 (쉼표 구분, 기본: catalog,target,result_cache /
+                그 외 template_cache,pools,dedup,batch,partition_guard,materialization)
+    
     Returns:
         시스템 상태 정보
     """
+    fmt = _response_format(response_format)
+    return respond(await _run_blocking(_check_system_status, fmt, parse_fields(fields)), fmt)
+
+
+def _count(rows) -> Optional[int]:
+    """COUNT(*) 조회 결과 -> 값 (오류면 None)"""
+    return rows[0]['cnt'] if not isinstance(rows, str) else None
+
+
+def _check_system_status(response_format: str = 'text', fields: Optional[List[str]] = None) -> Union[str, Dict[str, Any]]:
     try:
         # 전체 쿼리 수
-        total_queries = query_db("SELECT COUNT(*) as cnt FROM TB_QUERY_ASSET", db_type='master')
+        total_queries = _count(query_db("SELECT COUNT(*) as cnt FROM TB_QUERY_ASSET", db_type='master'))
         # 생성된 쿼리 수
-        total_gen_queries = query_db("SELECT COUNT(*) as cnt FROM generated_queries", db_type='gen')
+        total_gen_queries = _count(query_db("SELECT COUNT(*) as cnt FROM generated_queries", db_type='gen'))
         
         # 타입별 통계 (마스터)
         stats = query_db("""
@@ -484,30 +1054,117 @@ def check_system_status() -> str:
             FROM TB_QUERY_ASSET 
             GROUP BY unit_type
         """, db_type='master')
+        by_unit_type = {row['unit_type']: row['count'] for row in stats} if not isinstance(stats, str) else {}
         
         # JOIN 관계 수
-        total_joins = query_db("SELECT COUNT(*) as cnt FROM query_joins", db_type='master')
+        total_joins = _count(query_db("SELECT COUNT(*) as cnt FROM query_joins", db_type='master'))
         
         # WHERE 조건 수
-        total_conditions = query_db("SELECT COUNT(*) as cnt FROM query_where_conditions", db_type='master')
+        total_conditions = _count(query_db("SELECT COUNT(*) as cnt FROM query_where_conditions", db_type='master'))
+
+        # 구성 요소별 지표
+        cache = TEMPLATE_CACHE.stats()
+        pools = pool_stats()
+        with _DEDUP_LOCK:
+            dedup = dict(_DEDUP_STATS)
+        exec_stats = RESULT_CURSORS.stats()
+        with _BATCH_LOCK:
+            batch = dict(_BATCH_STATS)
+        guard = PARTITION_GUARD.stats()
+        mz = MATERIALIZER.stats() if MATERIALIZER is not None else None
+        rc = RESULT_CACHE.stats() if RESULT_CACHE is not None else None
+
+        if response_format == 'compact':
+            return pick({
+                "catalog": {"master": total_queries, "generated": total_gen_queries, "by_unit_type": by_unit_type,
+                            "joins": total_joins, "where_conditions": total_conditions},
+                "template_cache": cache,
+                "pools": {os.path.basename(path): m for path, m in pools.items()},
+                "dedup": dedup,
+                "target": {"path": TARGET_DB_PATH, "exists": os.path.exists(TARGET_DB_PATH), **exec_stats},
+                "batch": batch,
+                "partition_guard": guard,
+                "materialization": mz,
+                "result_cache": rc,
+            }, fields, _STATUS_FIELDS)
         
         status = f"""
 🔧 SQL Query RAG 시스템 상태
 
 📁 마스터 DB: {DB_PATH}
 📁 생성 DB: {GEN_DB_PATH}
-📊 마스터 쿼리: {total_queries[0]['cnt'] if not isinstance(total_queries, str) else 'N/A'}개
-📊 생성된 쿼리: {total_gen_queries[0]['cnt'] if not isinstance(total_gen_queries, str) else 'N/A'}개
+📊 마스터 쿼리: {total_queries if total_queries is not None else 'N/A'}개
+📊 생성된 쿼리: {total_gen_queries if total_gen_queries is not None else 'N/A'}개
 
 📈 마스터 쿼리 분류 통계:
 """
         
-        if not isinstance(stats, str):
-            for row in stats:
-                status += f"  - {row['unit_type']}: {row['count']}개\n"
+        for unit, count in by_unit_type.items():
+            status += f"  - {unit}: {count}개\n"
         
-        status += f"\n - 총 JOIN 관계 (고정): {total_joins[0]['cnt'] if not isinstance(total_joins, str) else 'N/A'}개"
-        status += f"\n - 총 WHERE 조건 (수정 가능): {total_conditions[0]['cnt'] if not isinstance(total_conditions, str) else 'N/A'}개"
+        status += f"\n - 총 JOIN 관계 (고정): {total_joins if total_joins is not None else 'N/A'}개"
+        status += f"\n - 총 WHERE 조건 (수정 가능): {total_conditions if total_conditions is not None else 'N/A'}개"
+
+        # 템플릿 캐시 지표
+        lookups = cache['hits'] + cache['misses']
+        status += (f"\n\n🗃️ 템플릿 캐시: {cache['entries']}/{cache['max_entries']}개, "
+                   f"적중 {cache['hits']}회 / 미적중 {cache['misses']}회"
+                   f" (적중률 {cache['hits'] / lookups * 100 if lookups else 0:.1f}%), "
+                   f"스켈레톤 {cache['skeletons']}개, 제거 {cache['evictions']}회, 무효화 {cache['invalidations']}회 (세대 {cache['generation']})")
+
+        # 연결 풀 지표
+        if pools:
+            status += "\n\n🔌 연결 풀:"
+            for path, m in pools.items():
+                avg_wait_ms = m['wait_seconds'] / m['waited'] * 1000 if m['waited'] else 0.0
+                status += (f"\n  - {os.path.basename(path)}: 읽기 연결 {m['created']}/{m['max_readers']} "
+                           f"(사용 중 {m['in_use']}, 최대 {m['peak_in_use']}), 대여 {m['acquired']}회, "
+                           f"대기 {m['waited']}회 (평균 {avg_wait_ms:.1f}ms), 타임아웃 {m['timeouts']}회, "
+                           f"쓰기 {m['writes']}회 (실패 {m['write_errors']}회)")
+
+        # 생성 쿼리 중복 제거 지표
+        reused, created = dedup['reused'], dedup['created']
+        requests_total = reused + created
+        status += (f"\n\n♻️ 생성 쿼리 중복 제거: 재사용 {reused}회 / 신규 {created}회"
+                   f" (적중률 {reused / requests_total * 100 if requests_total else 0:.1f}%)")
+
+        # 대상 DB 실행 지표
+        status += (f"\n\n🚀 대상 DB: {TARGET_DB_PATH}{'' if os.path.exists(TARGET_DB_PATH) else ' (없음)'}"
+                   f"\n  - 실행 {exec_stats['executed']}회, 페이지 {exec_stats['pages']}개, 행 {exec_stats['rows']}개, "
+                   f"열린 커서 {exec_stats['open_cursors']}개 (만료 {exec_stats['expired']}회, 정리 {exec_stats['evicted']}회)"
+                   f"\n  - 시간 초과 {exec_stats['timeouts']}회, 취소 {exec_stats['cancelled']}회, 행 상한 도달 {exec_stats['truncated']}회")
+        if exec_stats['timeouts_by_label']:
+            status += "\n  - 시간 초과 템플릿: " + ", ".join(f"{k}({v})" for k, v in exec_stats['timeouts_by_label'].items())
+
+        # 배치 실행 지표
+        status += (f"\n\n🧪 변형 일괄 실행: {batch['batches']}회, 변형 {batch['variants']}개 -> 대상 DB 실행 {batch['statements']}회 "
+                   f"(IN 목록 {batch['in_list']}회, UNION ALL {batch['union_all']}회, 단일 {batch['single']}회)")
+
+        # 파티션 가드 지표
+        status += (f"\n\n🧱 파티션 가드 ({guard['missing_filter']}): 전체 스캔 거부 {guard['rejected']}회 "
+                   f"(수정 {guard['rejected_modify']}회 / 실행 {guard['rejected_execute']}회), 조건 자동 추가 {guard['bounded']}회, "
+                   f"분할 실행 {exec_stats['partitioned']}회 (하위 쿼리 {exec_stats['partition_queries']}개)")
+        if guard['rejected_by_template']:
+            status += "\n  - 거부 템플릿: " + ", ".join(f"{k}({v})" for k, v in guard['rejected_by_template'].items())
+
+        # 파티션 집계 머티리얼라이즈 지표
+        if mz is not None:
+            partitions_total = mz['partitions_reused'] + mz['partitions_computed']
+            status += (f"\n\n🧮 파티션 집계 머티리얼라이즈: 요청 {mz['requests']}회 (전부 재사용 {mz['full_reuse']}회), "
+                       f"파티션 재사용 {mz['partitions_reused']}개 / 계산 {mz['partitions_computed']}개 "
+                       f"(재사용률 {mz['partitions_reused'] / partitions_total * 100 if partitions_total else 0:.1f}%), "
+                       f"보관 {mz['stored_partitions']}개 ({mz['stored_rows']}행, 템플릿 {mz['templates']}개), 무효 {mz['stale']}회")
+
+        # 결과 캐시 지표
+        if rc is not None:
+            lookups = rc['hits'] + rc['misses']
+            status += (f"\n\n💾 결과 캐시: {rc['entries']}개, {rc['bytes'] / 1e6:.1f}/{rc['max_bytes'] / 1e6:.0f}MB, "
+                       f"적중 {rc['hits']}회 / 미적중 {rc['misses']}회 (적중률 {rc['hits'] / lookups * 100 if lookups else 0:.1f}%), "
+                       f"절약 {rc['bytes_saved'] / 1e6:.2f}MB ({rc['rows_saved']}행), 제거 {rc['evictions']}회, 무효 {rc['stale']}회")
+            if rc['spill_enabled']:
+                status += f"\n  - 스필: {rc['spill_bytes'] / 1e6:.1f}MB, 내려보냄 {rc['spilled']}회, 스필 적중 {rc['spill_hits']}회"
+        else:
+            status += "\n\n💾 결과 캐시: 비활성"
         status += "\n\n✅ 시스템 정상 작동 중"
         
         return status
@@ -519,43 +1176,472 @@ def check_system_status() -> str:
 # ============================================================================
 # Tool 6: 쿼리 실행
 # ============================================================================
+def _time_budget(unit_type: Optional[str], timeout_seconds: Optional[float]) -> Optional[float]:
+    """unit_type 별 시간 예산 (설정 없으면 기본값), 호출 인자는 그보다 짧게만 지정 가능"""
+    budget = _target_cfg.get('unit_type_timeout_seconds', {}).get(unit_type, _target_cfg.get('timeout_seconds', 30))
+    if timeout_seconds and timeout_seconds > 0:
+        return min(timeout_seconds, budget) if budget else timeout_seconds
+    return budget
+
+
+def _stored_value(text: Optional[str]) -> Any:
+    """생성 쿼리 조건 값 복원 (문자열이 아닌 값은 JSON 으로 저장됨, SQL 조각은 그대로)"""
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        return text
+    return value if isinstance(value, (list, int, float)) and not isinstance(value, bool) else text
+
+
+class _PartitionPlan(NamedTuple):
+    """생성 쿼리의 파티션 실행 계획"""
+    sql: str
+    params: List[Any]
+    statements: List[Tuple[str, List[Any]]]          # 분할 실행할 파티션별 (SQL, 파라미터), 없으면 단일 실행
+    materialize: Optional[Dict[str, Any]] = None     # 파티션별 집계 머티리얼라이즈 계획
+
+
+def _partition_plan(query_id: str, category: Optional[str], template: QueryTemplate, sql: str, params: List[Any]) -> _PartitionPlan:
+    """
+    생성 쿼리의 파티션 실행 계획
+    저장된 조건에 파티션 키 조건이 없으면 PartitionFilterError (bound 모드는 원본 파티션 조건을 더해 다시 렌더링,
+    카테고리를 알 수 없는 이전 행은 다시 렌더링할 수 없으므로 거부)
+    합칠 수 있는 GROUP BY 집계 템플릿은 머티리얼라이즈, 그 외 파티션 범위는 분할 실행
+    """
+    stored = query_db(
+        "SELECT column_name AS column, operator, value, condition_type AS type "
+        "FROM generated_query_where_conditions WHERE query_id = ? ORDER BY id",
+        (query_id,), db_type='gen'
+    )
+    if isinstance(stored, str):
+        return _PartitionPlan(sql, params, [])
+    conditions = [{**dict(r), "value": _stored_value(r['value'])} for r in stored]
+    conditions, added = PARTITION_GUARD.enforce(template, conditions, "execute", can_bound=category is not None)
+    if category is None:
+        return _PartitionPlan(sql, params, [])
+
+    _, skeleton = get_template_skeleton(template.query_id, category)
+    if added:
+        sql, params = skeleton.render_bound(conditions)
+
+    materialize = _materialize_plan(template, category, conditions, skeleton)
+    if materialize is not None:
+        return _PartitionPlan(sql, params, [], materialize)
+    splits = PARTITION_GUARD.split(template, conditions)
+    return _PartitionPlan(sql, params, [skeleton.render_bound(part) for _, part in splits])
+
+
+def _materialize_plan(template: QueryTemplate, category: str, conditions: List[Dict[str, Any]], skeleton) -> Optional[Dict[str, Any]]:
+    """
+    파티션별 집계 머티리얼라이즈 계획 (대상이 아니면 None)
+    변형 키: 파티션 조건을 뺀 나머지 조건 + 카테고리 지문 (같은 변형의 다른 날짜 범위끼리 파티션 결과 공유)
+    """
+    if MATERIALIZER is None or not template.group_by:
+        return None
+    plan = aggregate_plan(template.columns_for(category), template.order_by, template.group_by)
+    found = PARTITION_GUARD.partition_range(template, conditions, MATERIALIZER.max_partitions)
+    if plan is None or found is None:
+        return None
+    index, values = found
+    return {
+        "plan": plan,
+        "variant": SQLRebuilder.fingerprint(template.query_id, category, conditions[:index] + conditions[index + 1:],
+                                            skeleton.version),
+        "values": values,
+        "statements": [skeleton.render_bound(PARTITION_GUARD.with_partition(conditions, index, v)) for v in values],
+    }
+
+
+def _execute_materialized(template: QueryTemplate, materialize: Dict[str, Any], page_size: Optional[int],
+                          budget: Optional[float], max_rows: Optional[int], cancel_event: threading.Event):
+    """
+    보관된 파티션 결과 + 빠진 파티션만 병렬 계산 -> 병합 결과 첫 페이지
+    빠진 파티션 결과의 합계가 행 상한을 넘으면(행 예산에 걸려 일부 파티션이 잘림) 병합이 불완전하므로
+    None (호출자가 단일 실행으로 대체)
+    """
+    values = materialize["values"]
+    stored = MATERIALIZER.load(template.query_id, template.asset_id, materialize["variant"], values)
+    missing = [i for i, v in enumerate(values) if v not in stored]
+    columns = next(iter(stored.values()))[0] if stored else ()
+    if missing:
+        columns, parts = RESULT_CURSORS.run_parallel(
+            [materialize["statements"][i] for i in missing], label=template.query_id,
+            timeout=budget, cancel_event=cancel_event
+        )
+        if sum(len(rows) for rows in parts) > RESULT_CURSORS.max_rows:
+            return None
+        for i, rows in zip(missing, parts):
+            MATERIALIZER.store(template.query_id, template.asset_id, materialize["variant"], values[i], columns, rows)
+            stored[values[i]] = (columns, rows)
+
+    merged = merge_rows(materialize["plan"], [stored[v][1] for v in values])
+    MATERIALIZER.record_merge(len(merged))
+    return RESULT_CURSORS.serve_rows(columns, merged, page_size, template.query_id, max_rows, cached=not missing)
+
+
 @mcp.tool()
-def execute_query(query_id: str) -> str:
+async def execute_query(
+    query_id: str,
+    page_size: Optional[int] = None,
+    timeout_seconds: Optional[float] = None,
+    max_rows: Optional[int] = None,
+    response_format: Optional[str] = None,
+    fields: Optional[str] = None
+) -> str:
     """
-    저장된 쿼리를 실행하여 결과를 가져옵니다.
+    저장된 쿼리를 대상 DB 에서 실행하여 결과의 첫 페이지를 가져옵니다.
+    결과가 더 있으면 응답의 cursor 값을 fetch_next_page 에 넘겨 다음 페이지를 받으세요.
     
     Args:
         query_id: 실행할 쿼리 ID
+        page_size: 페이지당 행 수 (생략 시 설정값, 최대 max_page_size)
+        timeout_seconds: 호출(첫 페이지 및 이후 각 페이지)당 시간 예산 (초, 쿼리 분류별 설정값보다 길게 줄 수 없음)
+        max_rows: 전체 결과 행 상한 (설정값보다 크게 줄 수 없음, 초과분은 버리고 truncated 표시)
+        response_format: 'text' (요약 한 줄 + 행 기준 JSON) 또는 'compact' (열 기준 JSON: columns, values, ...)
+        fields: compact 에서 돌려줄 결과 컬럼 (쉼표 구분, 생략 시 전체)
     
     Returns:
-        쿼리 실행 결과 (JSON 형식)
+        쿼리 실행 결과 페이지 (JSON 형식: columns, rows, page, offset, cursor, truncated)
     """
+    fmt = _response_format(response_format)
+    result = await _run_blocking(_execute_query, query_id, page_size, timeout_seconds, max_rows,
+                                 fmt, parse_fields(fields), cancellable=True)
+    return respond(result, fmt)
+
+
+def _execute_query(query_id: str, page_size: Optional[int], timeout_seconds: Optional[float],
+                   max_rows: Optional[int], response_format: str, fields: Optional[List[str]],
+                   cancel_event: threading.Event) -> Union[str, Dict[str, Any]]:
+    template_id = query_id
     try:
         # 쿼리 조회 (마스터 및 생성 테이블 모두 확인)
-        rows = query_db("SELECT normalized_sql FROM TB_QUERY_ASSET WHERE query_id = ?", (query_id,), db_type='master')
+        # 생성 쿼리는 바인딩 SQL 형태 + 파라미터로 실행 (같은 템플릿 변형끼리 문장 캐시 공유)
+        rows = query_db("SELECT normalized_sql, query_id AS template_id FROM TB_QUERY_ASSET WHERE query_id = ?", (query_id,), db_type='master')
         if not rows or isinstance(rows, str):
-            rows = query_db("SELECT normalized_sql FROM generated_queries WHERE query_id = ?", (query_id,), db_type='gen')
+            rows = query_db(
+                "SELECT normalized_sql, sql_shape, bound_params, category, parent_query_id AS template_id "
+                "FROM generated_queries WHERE query_id = ?",
+                (query_id,), db_type='gen'
+            )
         
         if isinstance(rows, str) or not rows:
             return f"❌ 쿼리를 찾을 수 없습니다: {query_id}"
         
-        sql = rows[0]['normalized_sql']
+        row = rows[0]
+        template_id = row['template_id']
+        if 'sql_shape' in row.keys() and row['sql_shape']:
+            sql, params = row['sql_shape'], json.loads(row['bound_params'] or '[]')
+        else:
+            sql, params = row['normalized_sql'], []
+        
+        # 결과 캐시 범위: 원본 템플릿의 현재 asset_id (재마이그레이션되면 기존 캐시 항목은 무효)
+        template = get_template(template_id)
+        cache_scope = (template.query_id, template.asset_id) if template is not None else None
         
-        # 실제 데이터베이스 연결 (여기서는 예시로 sql_queries.db 자체에서 혹은 별도 DB에서 실행)
-        # 쿼리 RAG 시스템이므로 실제 업무 DB에 연결되어야 함.
-        # 여기서는 동작 확인을 위해 샘플 DB(bus_data.db 등)가 있다고 가정하거나 
-        # 결과를 시뮬레이션 할 수 있음.
+        # 생성 쿼리: 파티션 키 조건 검사(빠지면 거부/자동 추가) 및 파티션 범위 분할
+        plan = _PartitionPlan(sql, params, [])
+        if 'sql_shape' in row.keys() and template is not None and template.partition_conditions():
+            plan = _partition_plan(query_id, row['category'], template, sql, params)
+        sql, params, statements = plan.sql, plan.params, plan.statements
         
-        # 현재는 DB_PATH가 sql_queries.db (메타데이터 DB)이므로 
-        # 실제 데이터가 있는 DB가 따로 필요함.
-        # 유저 요청에 따라 현재 동작 확인을 위해 dummy 결과를 반환함.
+        if not os.path.exists(TARGET_DB_PATH):
+            return f"❌ 대상 DB 파일이 없습니다: {TARGET_DB_PATH} (config target_database.path 확인)"
         
-        return f"🚀 쿼리 실행 시뮬레이션 ({query_id}):\n\nSQL:\n{sql}\n\n✅ 실행 결과: [Data Table Content...]"
+        budget = _time_budget(template.unit_type if template else None, timeout_seconds)
+        page = None
+        if plan.materialize is not None:
+            page = _execute_materialized(template, plan.materialize, page_size, budget, max_rows, cancel_event)
+        if page is None and statements:
+            page = RESULT_CURSORS.execute_partitioned(
+                statements, page_size=page_size, label=template_id, cache_scope=cache_scope, cache_sql=(sql, params),
+                timeout=budget, max_rows=max_rows, cancel_event=cancel_event
+            )
+        elif page is None:
+            page = RESULT_CURSORS.execute(
+                sql, params, page_size=page_size, label=template_id, cache_scope=cache_scope,
+                timeout=budget, max_rows=max_rows, cancel_event=cancel_event
+            )
+        return _format_page(query_id, page, response_format, fields)
         
+    except PartitionFilterError as e:
+        print(f"🧱 전체 스캔 거부 (실행): template={template_id} query={query_id}", file=sys.stderr)
+        return f"❌ {str(e)} (파티션 키 조건을 포함하여 modify_where_conditions 로 다시 생성하세요)"
+    except QueryTimeoutError as e:
+        print(f"⏱️ 쿼리 시간 초과: template={template_id} query={query_id} ({e})", file=sys.stderr)
+        return f"⏱️ 실행 시간 초과: {str(e)} (조건을 좁히거나 max_rows 를 줄여 다시 실행하세요)"
+    except QueryCancelledError as e:
+        print(f"🛑 쿼리 실행 취소: template={template_id} query={query_id}", file=sys.stderr)
+        return f"🛑 {str(e)}"
     except Exception as e:
         return f"❌ 실행 실패: {str(e)}"
 
 
+@mcp.tool()
+async def fetch_next_page(cursor: str, response_format: Optional[str] = None, fields: Optional[str] = None) -> str:
+    """
+    execute_query 결과의 다음 페이지를 가져옵니다.
+    
+    Args:
+        cursor: 이전 응답의 cursor 값 (마지막 페이지에서는 null 이므로 더 호출할 필요 없음)
+        response_format: 'text' 또는 'compact' (execute_query 와 같은 형식)
+        fields: compact 에서 돌려줄 결과 컬럼 (쉼표 구분, 생략 시 전체)
+    
+    Returns:
+        다음 결과 페이지 (JSON 형식)
+    """
+    fmt = _response_format(response_format)
+    return respond(await _run_blocking(_fetch_next_page, cursor, fmt, parse_fields(fields), cancellable=True), fmt)
+
+
+def _fetch_next_page(cursor: str, response_format: str, fields: Optional[List[str]],
+                     cancel_event: threading.Event) -> Union[str, Dict[str, Any]]:
+    try:
+        page = RESULT_CURSORS.fetch(cursor, cancel_event=cancel_event)
+        return _format_page(None, page, response_format, fields)
+    except CursorNotFoundError as e:
+        return f"❌ {str(e)} (execute_query 로 다시 실행하세요)"
+    except QueryTimeoutError as e:
+        print(f"⏱️ 쿼리 시간 초과 (다음 페이지): {e}", file=sys.stderr)
+        return f"⏱️ 실행 시간 초과: {str(e)}"
+    except QueryCancelledError as e:
+        return f"🛑 {str(e)}"
+    except Exception as e:
+        return f"❌ 페이지 조회 실패: {str(e)}"
+
+
+def _format_page(query_id: Optional[str], page, response_format: str = 'text',
+                 fields: Optional[List[str]] = None) -> Union[str, Dict[str, Any]]:
+    """결과 페이지 -> 도구 응답 (text: 요약 한 줄 + 행 기준 JSON, compact: 열 기준 dict)"""
+    if response_format == 'compact':
+        return {
+            **columnar(*project(page.columns, page.rows, fields)),
+            "page": page.page,
+            "offset": page.offset,
+            "cursor": page.cursor,
+            "truncated": page.truncated,
+            "cached": page.cached,
+        }
+    body = json.dumps({
+        "columns": page.columns,
+        "rows": page.rows,
+        "page": page.page,
+        "offset": page.offset,
+        "cursor": page.cursor,
+        "truncated": page.truncated,
+    }, ensure_ascii=False, default=str)
+    title = f"🚀 쿼리 실행 결과 ({query_id})" if query_id else "🚀 쿼리 실행 결과"
+    if page.cached:
+        title += " [캐시]"
+    more = "다음 페이지: fetch_next_page(cursor)" if page.cursor else ("행 상한 도달, 나머지 생략" if page.truncated else "마지막 페이지")
+    return f"{title}: {page.page}페이지, {page.offset + 1}~{page.offset + len(page.rows)}행 ({more})\n{body}"
+
+
+# ============================================================================
+# Tool 7: 조건 세트 일괄 실행 (변형 비교)
+# ============================================================================
+_batch_cfg = CFG.get('batch', {})
+# 배치 실행 지표 (프로세스 시작 이후 누적): 요청, 변형 수, 실행 문장 수, 합친 방식별 횟수
+_BATCH_STATS = {"batches": 0, "variants": 0, "statements": 0, "in_list": 0, "union_all": 0, "single": 0}
+_BATCH_LOCK = threading.Lock()
+_SELECT_ALIAS = re.compile(r"\s+AS\s+", re.IGNORECASE)
+
+
+def _condition_key(cond: Dict[str, Any]) -> Tuple[str, str, str]:
+    """조건 비교용 정규화 키 (컬럼/연산자 공백·대소문자, 값 JSON 표기)"""
+    column = " ".join(str(cond.get('column') or cond.get('column_name')).split())
+    operator = " ".join(str(cond['operator']).split()).upper()
+    return column, operator, json.dumps(cond['value'], ensure_ascii=False)
+
+
+def _in_list_fusion(template: QueryTemplate, category: str, variants: List[List[Dict[str, Any]]]):
+    """
+    변형들이 '=' 조건 하나의 값만 다르고 그 컬럼이 결과에 있으면 IN 목록 하나로 합침
+    (집계 템플릿은 그 컬럼이 GROUP BY 키일 때만 - 아니면 변형들이 같은 집계 행으로 합쳐져 나눌 수 없음)
+    -> (합친 조건 목록, 결과 컬럼 위치, 변형별 값 문자열) 또는 None
+    """
+    first = variants[0]
+    if len(variants) < 2 or any(len(v) != len(first) for v in variants):
+        return None
+    keys = [[_condition_key(c) for c in v] for v in variants]
+    differing = {i for k in keys[1:] for i, (a, b) in enumerate(zip(keys[0], k)) if a != b}
+    if len(differing) != 1:
+        return None
+    index = differing.pop()
+    if any(k[index][:2] != (keys[0][index][0], "=") for k in keys):
+        return None
+    literals = [SQLRebuilder.literal_values("=", v[index]['value']) for v in variants]
+    if any(len(values) != 1 for values in literals):
+        return None
+
+    column = keys[0][index][0]
+    aggregated = bool(template.group_by) or any(c.aggregation for c in template.columns_for(category))
+    if aggregated and column not in {" ".join(g.split()) for g in template.group_by}:
+        return None
+    output = next((i for i, c in enumerate(template.columns_for(category))
+                   if " ".join(_SELECT_ALIAS.split(c.expression or "")[0].split()) == column), None)
+    if output is None:
+        return None
+    fused = list(first)
+    fused[index] = {**first[index], "operator": "IN", "value": [v[index]['value'] for v in variants]}
+    return fused, output, [str(values[0]) for values in literals]
+
+
+@mcp.tool()
+async def batch_execute_variants(
+    query_id: str,
+    condition_sets: str,
+    category: str = 'all',
+    rows_per_variant: Optional[int] = None,
+    timeout_seconds: Optional[float] = None,
+    response_format: Optional[str] = None,
+    fields: Optional[str] = None
+) -> str:
+    """
+    하나의 템플릿에 여러 WHERE 조건 세트를 적용한 변형들을 한 번에 실행하고 결과를 변형별로 돌려줍니다.
+    노선 10개, 날짜 30일 비교처럼 modify_where_conditions + execute_query 를 여러 번 호출하는 대신 사용하세요.
+    (변형은 저장하지 않으므로 이후 단독 실행/상세 조회가 필요한 변형만 modify_where_conditions 로 생성)
+    
+    Args:
+        query_id: 기반이 되는 원본 쿼리 ID
+        condition_sets: 변형별 WHERE 조건 배열들의 JSON 배열 문자열.
+                        형식: '[[{"column": "R.route_nm", "operator": "=", "value": "'140'"}, ...], [...]]'
+        category: 출력할 데이터 수준 ('basic', 'detail', 'all')
+        rows_per_variant: 변형별로 돌려줄 최대 행 수 (생략 시 설정값, 전체 행 수는 row_count 로 표시)
+        timeout_seconds: 실행 시간 예산 (초, 쿼리 분류별 설정값보다 길게 줄 수 없음)
+        response_format: 'text' (요약 한 줄 + JSON) 또는 'compact' (조건 반복 없이 변형별 열 기준 values)
+        fields: compact 에서 돌려줄 결과 컬럼 (쉼표 구분, 생략 시 전체)
+    
+    Returns:
+        변형별 결과 (JSON 형식: columns, fused, variants[{variant, conditions, row_count, rows, truncated}])
+    """
+    fmt = _response_format(response_format)
+    result = await _run_blocking(_batch_execute_variants, query_id, condition_sets, category, rows_per_variant,
+                                 timeout_seconds, fmt, parse_fields(fields), cancellable=True)
+    return respond(result, fmt)
+
+
+def _batch_execute_variants(query_id: str, condition_sets: str, category: str, rows_per_variant: Optional[int],
+                            timeout_seconds: Optional[float], response_format: str, fields: Optional[List[str]],
+                            cancel_event: threading.Event) -> Union[str, Dict[str, Any]]:
+    try:
+        # 템플릿/스켈레톤은 한 번만 조회 (캐시 경유)
+        template, skeleton = get_template_skeleton(query_id, category)
+        if template is None:
+            return f"❌ 쿼리를 찾을 수 없습니다: {query_id}"
+        try:
+            variants = json.loads(condition_sets)
+            if not isinstance(variants, list) or not variants or not all(isinstance(v, list) for v in variants):
+                raise ValueError
+        except ValueError:
+            return "❌ 조건 세트 형식이 올바르지 않습니다. 조건 배열들의 JSON 배열이어야 합니다."
+        max_variants = _batch_cfg.get('max_variants', 50)
+        if len(variants) > max_variants:
+            return f"❌ 변형은 한 번에 최대 {max_variants}개까지 실행할 수 있습니다 (요청 {len(variants)}개)"
+
+        # 파티션 키 조건 검사 (변형마다, 빠지면 거부 또는 자동 추가)
+        for i, conds in enumerate(variants):
+            try:
+                variants[i], _ = PARTITION_GUARD.enforce(template, conds, "execute")
+            except PartitionFilterError as e:
+                print(f"🧱 전체 스캔 거부 (배치): template={query_id} variant={i}", file=sys.stderr)
+                return f"❌ 변형 {i}: {str(e)}"
+
+        # 같은 조건 세트는 한 번만 실행
+        unique: Dict[str, int] = {}
+        owner = [unique.setdefault(SQLRebuilder.fingerprint(query_id, category, conds, skeleton.version), i) for i, conds in enumerate(variants)]
+        distinct = sorted(set(owner))
+
+        if not os.path.exists(TARGET_DB_PATH):
+            return f"❌ 대상 DB 파일이 없습니다: {TARGET_DB_PATH} (config target_database.path 확인)"
+
+        # 변형들을 한 문장으로: '=' 값만 다르면 IN 목록 (결과 컬럼 값으로 분배), 그 외는 변형 번호를 붙인 UNION ALL
+        fusion = _in_list_fusion(template, category, [variants[i] for i in distinct])
+        if len(distinct) == 1:
+            fused = "single"
+            sql, params = skeleton.render_bound(variants[distinct[0]])
+        elif fusion is not None:
+            fused = "in_list"
+            sql, params = skeleton.render_bound(fusion[0])
+        else:
+            fused = "union_all"
+            parts, params = [], []
+            for i in distinct:
+                part_sql, part_params = skeleton.render_bound(variants[i])
+                parts.append(f"SELECT {i} AS batch_variant, * FROM (\n{part_sql}\n)")
+                params.extend(part_params)
+            sql = "\nUNION ALL\n".join(parts)
+
+        columns, rows, truncated, cached = RESULT_CURSORS.fetch_all(
+            sql, params, label=query_id, cache_scope=(template.query_id, template.asset_id),
+            timeout=_time_budget(template.unit_type, timeout_seconds), cancel_event=cancel_event
+        )
+
+        # 결과를 변형별로 분배 (행 순서 유지)
+        grouped: Dict[int, List[tuple]] = {i: [] for i in distinct}
+        if fused == "single":
+            grouped[distinct[0]] = rows
+        elif fused == "in_list":
+            _, output, values = fusion
+            by_value: Dict[str, List[int]] = {}
+            for i, value in zip(distinct, values):
+                by_value.setdefault(value, []).append(i)
+            for row in rows:
+                for i in by_value.get(str(row[output]), ()):
+                    grouped[i].append(row)
+        else:
+            columns = columns[1:]
+            for row in rows:
+                grouped[row[0]].append(row[1:])
+
+        with _BATCH_LOCK:
+            _BATCH_STATS["batches"] += 1
+            _BATCH_STATS["variants"] += len(variants)
+            _BATCH_STATS["statements"] += 0 if cached else 1
+            _BATCH_STATS[fused] += 1
+
+        limit = rows_per_variant if rows_per_variant and rows_per_variant > 0 else _batch_cfg.get('rows_per_variant', 100)
+        if response_format == 'compact':
+            # 변형 조건은 호출자가 보낸 순서 그대로이므로 반복하지 않음 (variants[i] = condition_sets[i])
+            selected = [project(columns, grouped[owner[i]][:limit], fields) for i in range(len(variants))]
+            return {
+                "columns": selected[0][0] if selected else list(columns),
+                "fused": fused,
+                "cached": cached,
+                "truncated": truncated,
+                "variants": [{
+                    "row_count": len(grouped[owner[i]]),
+                    "truncated": len(grouped[owner[i]]) > limit,
+                    "values": columnar(*selected[i])["values"],
+                } for i in range(len(variants))],
+            }
+        body = json.dumps({
+            "columns": columns,
+            "fused": fused,
+            "truncated": truncated,
+            "variants": [{
+                "variant": i,
+                "conditions": variants[i],
+                "row_count": len(grouped[owner[i]]),
+                "rows": grouped[owner[i]][:limit],
+                "truncated": len(grouped[owner[i]]) > limit,
+            } for i in range(len(variants))],
+        }, ensure_ascii=False, default=str)
+        title = f"🧪 변형 일괄 실행 결과 ({query_id}): 변형 {len(variants)}개 (고유 {len(distinct)}개) -> 문장 1개 ({fused})"
+        if cached:
+            title += " [캐시]"
+        if truncated:
+            title += " (행 상한 도달, 일부 변형 결과 생략 가능)"
+        return f"{title}\n{body}"
+
+    except QueryTimeoutError as e:
+        print(f"⏱️ 쿼리 시간 초과 (배치): template={query_id} ({e})", file=sys.stderr)
+        return f"⏱️ 실행 시간 초과: {str(e)} (변형 수를 줄이거나 조건을 좁혀 다시 실행하세요)"
+    except QueryCancelledError as e:
+        return f"🛑 {str(e)}"
+    except Exception as e:
+        return f"❌ 일괄 실행 실패: {str(e)}"
+
+
 # ============================================================================
 # 서버 실행
 # ============================================================================
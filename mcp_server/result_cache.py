@@ -0,0 +1,213 @@
+"""
+Result Cache - execute_query 결과 캐시
+역할: 최종 SQL + 바인딩 파라미터를 키로 대상 DB 실행 결과(컬럼 + 전체 행)를 보관하여, 여러 LLM 세션이
+      같은 인기 템플릿/조건을 반복 실행할 때 대상 DB 를 다시 조회하지 않도록 함
+      - 템플릿별 TTL, 전체 바이트 예산 내 LRU 제거, (선택) 제거된 항목을 로컬 SQLite 파일로 내려 보관
+      - 항목에 원본 템플릿의 asset_id 를 기록하여 템플릿이 재마이그레이션(새 asset_id)되면 무효 처리
+구동자: result_cursor.py (ResultCursorRegistry), query_mcp_server.py (설정/상태 표시)
+"""
+
+import os
+import json
+import time
+import sys
+import pickle
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class CachedResult(NamedTuple):
+    columns: Tuple[str, ...]
+    rows: Tuple[tuple, ...]
+    template_id: str
+    asset_id: int
+    expires_at: float           # time.time() 기준 (스필 파일에 기록되므로 벽시계 사용)
+    size: int                   # 메모리 점유 추정 바이트 (예산 계산 기준)
+
+
+def _estimate_size(columns: Tuple[str, ...], rows: Tuple[tuple, ...]) -> int:
+    """행 튜플 + 값 객체의 메모리 크기 추정 (공유 문자열도 각각 계산하므로 보수적)"""
+    getsizeof = sys.getsizeof
+    size = getsizeof(rows) + sum(map(getsizeof, columns))
+    for row in rows:
+        size += getsizeof(row) + sum(map(getsizeof, row))
+    return size
+
+
+class ResultCache:
+    """메모리 LRU (바이트 예산) + 선택적 SQLite 스필"""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 << 20,
+        max_entry_rows: int = 10000,
+        ttl_seconds: float = 300.0,
+        template_ttl: Optional[Dict[str, float]] = None,
+        spill_path: Optional[str] = None,
+        spill_max_bytes: int = 256 << 20
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_rows = max_entry_rows
+        self.ttl_seconds = ttl_seconds
+        self.template_ttl = dict(template_ttl or {})
+        self.spill_max_bytes = spill_max_bytes
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0, "misses": 0, "stores": 0, "evictions": 0, "stale": 0,
+            "bytes_saved": 0, "rows_saved": 0, "spill_hits": 0, "spilled": 0,
+        }
+
+        self._spill: Optional[sqlite3.Connection] = None
+        self._spill_bytes = 0
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path), exist_ok=True)
+            self._spill = sqlite3.connect(spill_path, check_same_thread=False, isolation_level=None)
+            self._spill.execute("PRAGMA journal_mode=WAL")
+            self._spill.execute("PRAGMA synchronous=OFF")
+            self._spill.execute("""
+                CREATE TABLE IF NOT EXISTS result_spill (
+                    cache_key TEXT PRIMARY KEY,
+                    template_id TEXT,
+                    asset_id INTEGER,
+                    expires_at REAL,
+                    size INTEGER,
+                    last_used REAL,
+                    payload BLOB
+                )
+            """)
+            self._spill.execute("CREATE INDEX IF NOT EXISTS idx_spill_last_used ON result_spill(last_used)")
+            # 만료분은 시작 시 정리 후 남은 용량 계산
+            self._spill.execute("DELETE FROM result_spill WHERE expires_at <= ?", (time.time(),))
+            self._spill_bytes = self._spill.execute("SELECT COALESCE(SUM(size), 0) FROM result_spill").fetchone()[0]
+
+    @staticmethod
+    def make_key(sql: str, params: Sequence[Any] = ()) -> str:
+        payload = json.dumps([sql, list(params)], ensure_ascii=False, default=str, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, template_id: str) -> float:
+        """템플릿별 TTL (설정이 없으면 기본값, 0 이하면 캐시하지 않음)"""
+        return self.template_ttl.get(template_id, self.ttl_seconds)
+
+    def get(self, key: str, template_id: str, asset_id: int) -> Optional[CachedResult]:
+        """유효한 캐시 결과 (만료/템플릿 재마이그레이션이면 None)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now and entry.asset_id == asset_id:
+                    self._entries.move_to_end(key)
+                    self._record_hit(entry)
+                    return entry
+                self._drop(key)
+                self._metrics["stale"] += 1
+
+            if self._spill is not None:
+                entry = self._spill_load(key)
+                if entry is not None:
+                    if entry.expires_at > now and entry.asset_id == asset_id:
+                        self._metrics["spill_hits"] += 1
+                        self._record_hit(entry)
+                        self._insert(key, entry)
+                        return entry
+                    self._metrics["stale"] += 1
+
+            self._metrics["misses"] += 1
+            return None
+
+    def put(self, key: str, template_id: str, asset_id: int, columns: Sequence[str], rows: List[tuple]) -> bool:
+        """전체 결과 저장 (행 수/바이트 예산 초과 또는 TTL 0 이면 저장하지 않음)"""
+        ttl = self.ttl_for(template_id)
+        if ttl <= 0 or len(rows) > self.max_entry_rows:
+            return False
+        columns, rows = tuple(columns), tuple(map(tuple, rows))
+        size = _estimate_size(columns, rows)
+        if size > self.max_bytes:
+            return False
+        entry = CachedResult(columns, rows, template_id, asset_id, time.time() + ttl, size)
+        with self._lock:
+            self._insert(key, entry)
+            self._metrics["stores"] += 1
+        return True
+
+    def invalidate_template(self, template_id: str) -> int:
+        """템플릿의 모든 항목 제거 -> 제거 수"""
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if e.template_id == template_id]
+            for key in keys:
+                self._drop(key)
+            if self._spill is not None:
+                self._spill.execute("DELETE FROM result_spill WHERE template_id = ?", (template_id,))
+                self._spill_bytes = self._spill.execute("SELECT COALESCE(SUM(size), 0) FROM result_spill").fetchone()[0]
+        return len(keys)
+
+    def _record_hit(self, entry: CachedResult):
+        self._metrics["hits"] += 1
+        self._metrics["bytes_saved"] += entry.size
+        self._metrics["rows_saved"] += len(entry.rows)
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _insert(self, key: str, entry: CachedResult):
+        """메모리에 넣고 예산 초과분은 오래된 순으로 제거 (스필 사용 시 파일로 이동)"""
+        self._drop(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self._metrics["evictions"] += 1
+            if self._spill is not None and old.expires_at > time.time():
+                self._spill_store(old_key, old)
+
+    def _spill_store(self, key: str, entry: CachedResult):
+        payload = pickle.dumps((entry.columns, entry.rows), protocol=pickle.HIGHEST_PROTOCOL)
+        previous = self._spill.execute("SELECT size FROM result_spill WHERE cache_key = ?", (key,)).fetchone()
+        self._spill.execute(
+            "INSERT OR REPLACE INTO result_spill VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, entry.template_id, entry.asset_id, entry.expires_at, entry.size, time.time(), payload)
+        )
+        self._spill_bytes += entry.size - (previous[0] if previous else 0)
+        self._metrics["spilled"] += 1
+        while self._spill_bytes > self.spill_max_bytes:
+            victim = self._spill.execute("SELECT cache_key, size FROM result_spill ORDER BY last_used LIMIT 1").fetchone()
+            if victim is None:
+                break
+            self._spill.execute("DELETE FROM result_spill WHERE cache_key = ?", (victim[0],))
+            self._spill_bytes -= victim[1]
+
+    def _spill_load(self, key: str) -> Optional[CachedResult]:
+        """스필 파일에서 꺼냄 (꺼낸 항목은 파일에서 삭제, 유효하면 호출자가 메모리로 승격)"""
+        row = self._spill.execute(
+            "SELECT template_id, asset_id, expires_at, size, payload FROM result_spill WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._spill.execute("DELETE FROM result_spill WHERE cache_key = ?", (key,))
+        self._spill_bytes -= row[3]
+        columns, rows = pickle.loads(row[4])
+        return CachedResult(columns, rows, row[0], row[1], row[2], row[3])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._bytes
+            snapshot["max_bytes"] = self.max_bytes
+            snapshot["spill_enabled"] = self._spill is not None
+            snapshot["spill_bytes"] = self._spill_bytes
+        return snapshot
+
+    def close(self):
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
@@ -0,0 +1,488 @@
+"""
+Result Cursor - 대상 DB 쿼리 실행 및 페이지 단위 결과 스트리밍
+역할: 설정된 대상 DB(로컬에서는 SQLite 파일)에 읽기 전용 연결로 쿼리를 실행하고, 결과를 fetchmany 로
+      고정 크기 페이지씩만 가져옴. 남은 행이 있으면 커서를 열어 둔 채 이어받기 토큰을 발급하여
+      다음 호출에서 이어서 읽도록 함 (전체 결과를 메모리에 올리거나 한 응답으로 직렬화하지 않음)
+      결과 캐시(result_cache.py)가 연결되어 있으면 적중 시 캐시된 행을 같은 방식으로 페이지 단위 제공하고,
+      끝까지 읽은 결과 중 max_entry_rows 이하인 것을 캐시에 저장
+      호출(실행/다음 페이지)마다 시간 예산을 두어 SQLite progress handler 로 초과 시 중단하고,
+      호출자가 넘긴 cancel_event 가 설정되면(클라이언트 취소/연결 종료) 같은 경로로 즉시 중단
+      (다른 엔진은 드라이버의 statement timeout / 별도 스레드에서의 cancel 호출이 같은 역할)
+      파티션별로 나눈 하위 쿼리(partition_guard.py)는 별도 연결로 병렬 실행한 뒤 순서대로 이어 붙여
+      같은 페이지 방식으로 제공 (모든 하위 쿼리가 행 예산 하나를 나눠 써서, 이어 붙인 순서 기준
+      앞쪽 max_rows + 1 행까지만 메모리에 모음)
+구동자: query_mcp_server.py (execute_query / fetch_next_page)
+"""
+
+import time
+import sqlite3
+import secrets
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    from .result_cache import ResultCache
+except ImportError:
+    from result_cache import ResultCache
+
+
+class CursorNotFoundError(LookupError):
+    """이어받기 토큰이 없거나 만료됨 (결과를 끝까지 읽었거나 TTL 초과/개수 제한으로 정리됨)"""
+
+
+class QueryTimeoutError(TimeoutError):
+    """호출 시간 예산 초과로 대상 DB 실행을 중단함 (커서는 닫힘)"""
+
+
+class QueryCancelledError(RuntimeError):
+    """호출자 취소(클라이언트 취소/연결 종료)로 대상 DB 실행을 중단함 (커서는 닫힘)"""
+
+# progress handler 호출 간격 (SQLite VM 명령 수) - 작을수록 중단 반응이 빠르고 오버헤드가 큼
+_PROGRESS_STEPS = 10000
+
+# 파티션 하위 쿼리가 한 번에 읽는 행 수 (행 예산 확인 간격) - 하위 쿼리별 초과 보관량의 상한
+_PARTITION_CHUNK = 1000
+
+
+class ResultPage(NamedTuple):
+    columns: Tuple[str, ...]
+    rows: List[tuple]
+    page: int
+    offset: int                 # 이 페이지 첫 행의 0 기반 위치
+    cursor: Optional[str]       # 다음 페이지 토큰 (마지막 페이지면 None)
+    cached: bool = False        # 결과 캐시에서 제공됨
+    truncated: bool = False     # max_rows 에 도달하여 남은 행을 버림
+
+
+class _CachedRows:
+    """캐시된 행을 커서처럼 읽기 (fetchmany/close)"""
+
+    def __init__(self, rows: Tuple[tuple, ...]):
+        self._rows = rows
+        self._pos = 0
+
+    def fetchmany(self, size: int) -> List[tuple]:
+        chunk = list(self._rows[self._pos:self._pos + size])
+        self._pos += len(chunk)
+        return chunk
+
+    def close(self):
+        self._rows = ()
+
+
+class _AnyEvent:
+    """여러 중단 신호 중 하나라도 설정되면 설정된 것으로 봄 (호출자 취소 + 다른 하위 쿼리 실패)"""
+
+    def __init__(self, *events: Optional[threading.Event]):
+        self._events = [e for e in events if e is not None]
+
+    def is_set(self) -> bool:
+        return any(e.is_set() for e in self._events)
+
+
+class _OpenCursor:
+    """대기 중인 결과 커서 (대상 DB 연결 하나를 점유, 캐시 적중이면 연결 없음)"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection], cursor, columns: Tuple[str, ...], page_size: int, label: str):
+        self.conn = conn
+        self.cursor = cursor
+        self.columns = columns
+        self.page_size = page_size
+        self.label = label
+        self.page = 0
+        self.offset = 0
+        self.expires_at = 0.0
+        self.lock = threading.Lock()
+        self.cached = False
+        # 결과 캐시 저장용 (캐시 키, (템플릿 ID, asset_id), 지금까지 읽은 행) - 저장 대상이 아니면 None
+        self.collect: Optional[Tuple[str, Tuple[str, int], List[tuple]]] = None
+        # 실행 제한: 호출당 시간 예산(초), 최대 행 수, 현재 호출의 마감 시각과 취소 신호
+        self.timeout: Optional[float] = None
+        self.max_rows = 0
+        self.deadline: Optional[float] = None
+        self.cancel_event: Optional[threading.Event] = None
+        self.interrupted: Optional[str] = None
+        if conn is not None:
+            conn.set_progress_handler(self._progress, _PROGRESS_STEPS)
+
+    def _progress(self) -> int:
+        """SQLite 가 주기적으로 호출 -> 0 이 아니면 실행 중단 (sqlite3.OperationalError: interrupted)"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self.interrupted = "cancelled"
+            return 1
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.interrupted = "timeout"
+            return 1
+        return 0
+
+    def arm(self, timeout: Optional[float], cancel_event: Optional[threading.Event]):
+        """이번 호출의 마감 시각/취소 신호 설정 (timeout 이 None 이면 실행 시 정한 예산 유지)"""
+        if timeout is not None:
+            self.timeout = timeout
+        self.deadline = time.monotonic() + self.timeout if self.timeout else None
+        self.cancel_event = cancel_event
+        self.interrupted = None
+
+    def close(self):
+        try:
+            self.cursor.close()
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+
+
+class ResultCursorRegistry:
+    """대상 DB 실행기 + 이어받기 토큰별 열린 커서 관리 (TTL, 최대 개수 초과 시 오래된 것부터 정리)"""
+
+    def __init__(
+        self,
+        path: str,
+        page_size: int = 100,
+        max_page_size: int = 1000,
+        ttl_seconds: float = 300.0,
+        max_open: int = 16,
+        busy_timeout_ms: int = 5000,
+        result_cache: Optional[ResultCache] = None,
+        timeout_seconds: Optional[float] = 30.0,
+        max_rows: int = 100000,
+        partition_workers: int = 4
+    ):
+        self.path = path
+        self.page_size = max(1, page_size)
+        self.max_page_size = max(self.page_size, max_page_size)
+        self.ttl_seconds = ttl_seconds
+        self.max_open = max(1, max_open)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.result_cache = result_cache
+        self.timeout_seconds = timeout_seconds
+        self.max_rows = max(1, max_rows)
+        # 파티션 하위 쿼리 실행 스레드 (전체 요청이 공유하여 대상 DB 동시 연결 수를 제한)
+        self._partition_pool = ThreadPoolExecutor(max_workers=max(1, partition_workers), thread_name_prefix="partition")
+        self._open: "OrderedDict[str, _OpenCursor]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "executed": 0, "pages": 0, "rows": 0, "expired": 0, "evicted": 0,
+            "timeouts": 0, "cancelled": 0, "truncated": 0, "partitioned": 0, "partition_queries": 0,
+        }
+        self._timeouts_by_label: Counter = Counter()
+
+    def _connect(self) -> sqlite3.Connection:
+        """읽기 전용 연결 (대상 DB 를 실수로 수정하지 않도록 mode=ro + query_only)"""
+        conn = sqlite3.connect(f"{Path(self.path).resolve().as_uri()}?mode=ro", uri=True,
+                               timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _purge(self, now: float):
+        """만료된 커서 정리 (레지스트리 락 보유 상태에서 호출)"""
+        for token in [t for t, c in self._open.items() if c.expires_at <= now]:
+            self._open.pop(token).close()
+            self._metrics["expired"] += 1
+
+    def execute(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        page_size: Optional[int] = None,
+        label: str = "",
+        cache_scope: Optional[Tuple[str, int]] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> ResultPage:
+        """
+        쿼리 실행 후 첫 페이지 반환 (남은 행이 있으면 page.cursor 로 이어받기)
+        cache_scope=(원본 템플릿 ID, asset_id) 를 주면 결과 캐시를 조회/저장
+        timeout 은 이 실행과 이후 각 페이지 호출의 시간 예산(초, 생략 시 레지스트리 기본값),
+        max_rows 는 전체 결과 행 상한 (레지스트리 기본값보다 크게 줄 수 없음)
+        """
+        size = min(max(1, page_size or self.page_size), self.max_page_size)
+        key = None
+        if self.result_cache is not None and cache_scope is not None:
+            key = ResultCache.make_key(sql, params)
+            cached = self.result_cache.get(key, *cache_scope)
+            if cached is not None:
+                return self.serve_rows(cached.columns, cached.rows, size, label, max_rows, cached=True)
+
+        conn = self._connect()
+        entry = _OpenCursor(conn, None, (), size, label)
+        entry.max_rows = self._row_limit(max_rows)
+        entry.arm(self._time_budget(timeout), cancel_event)
+        with self._lock:
+            self._metrics["executed"] += 1
+        try:
+            # SELECT 는 execute 에서 첫 행까지 실행되므로 여기서부터 시간 예산 적용
+            entry.cursor = conn.execute(sql, tuple(params))
+        except Exception as e:
+            conn.close()
+            raise self._interrupt_error(entry, e)
+        entry.columns = tuple(d[0] for d in entry.cursor.description or ())
+        if key is not None:
+            entry.collect = (key, cache_scope, [])
+        return self._next_page(None, entry)
+
+    def fetch_all(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        label: str = "",
+        cache_scope: Optional[Tuple[str, int]] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Tuple[Tuple[str, ...], List[tuple], bool, bool]:
+        """
+        쿼리 하나를 끝까지 읽음 (커서/페이지 없이) -> (컬럼, 행, 잘림 여부, 캐시 적중 여부)
+        여러 변형을 한 문장으로 합친 배치 실행처럼 결과 전체를 호출자가 나누어야 할 때 사용
+        """
+        limit = self._row_limit(max_rows)
+        key = None
+        if self.result_cache is not None and cache_scope is not None:
+            key = ResultCache.make_key(sql, params)
+            cached = self.result_cache.get(key, *cache_scope)
+            if cached is not None:
+                return cached.columns, list(cached.rows[:limit]), len(cached.rows) > limit, True
+
+        conn = self._connect()
+        entry = _OpenCursor(conn, None, (), 0, label)
+        entry.arm(self._time_budget(timeout), cancel_event)
+        with self._lock:
+            self._metrics["executed"] += 1
+        try:
+            cursor = conn.execute(sql, tuple(params))
+            columns = tuple(d[0] for d in cursor.description or ())
+            rows = cursor.fetchmany(limit + 1)
+        except Exception as e:
+            raise self._interrupt_error(entry, e)
+        finally:
+            conn.close()
+
+        truncated = len(rows) > limit
+        rows = rows[:limit]
+        with self._lock:
+            self._metrics["rows"] += len(rows)
+            if truncated:
+                self._metrics["truncated"] += 1
+        if key is not None and not truncated:
+            self.result_cache.put(key, cache_scope[0], cache_scope[1], columns, rows)
+        return columns, rows, truncated, False
+
+    def execute_partitioned(
+        self,
+        statements: Sequence[Tuple[str, Sequence[Any]]],
+        page_size: Optional[int] = None,
+        label: str = "",
+        cache_scope: Optional[Tuple[str, int]] = None,
+        cache_sql: Optional[Tuple[str, Sequence[Any]]] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> ResultPage:
+        """
+        파티션별 하위 쿼리 (SQL, 파라미터) 목록을 병렬 실행하고, 목록 순서대로 이어 붙여 첫 페이지 반환
+        cache_sql=(분할 전 SQL, 파라미터) 를 주면 분할하지 않은 실행과 같은 키로 결과 캐시를 조회/저장
+        """
+        size = min(max(1, page_size or self.page_size), self.max_page_size)
+        limit = self._row_limit(max_rows)
+        key = None
+        if self.result_cache is not None and cache_scope is not None and cache_sql is not None:
+            key = ResultCache.make_key(*cache_sql)
+            cached = self.result_cache.get(key, *cache_scope)
+            if cached is not None:
+                return self.serve_rows(cached.columns, cached.rows, size, label, limit, cached=True)
+
+        columns, parts = self.run_parallel(statements, label, timeout, limit, cancel_event)
+        merged = [row for rows in parts for row in rows]
+        entry = _OpenCursor(None, _CachedRows(tuple(merged)), columns, size, label)
+        entry.max_rows = limit
+        if key is not None:
+            entry.collect = (key, cache_scope, [])
+        return self._next_page(None, entry)
+
+    def run_parallel(
+        self,
+        statements: Sequence[Tuple[str, Sequence[Any]]],
+        label: str = "",
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Tuple[Tuple[str, ...], List[List[tuple]]]:
+        """
+        하위 쿼리들을 공유 스레드 풀에서 각자의 읽기 전용 연결로 실행 -> (컬럼, 하위 쿼리별 행 목록)
+        행 예산은 하위 쿼리 전체가 공유: 목록 순서로 이어 붙였을 때 앞쪽 max_rows + 1 행만 보관하고
+        (앞 하위 쿼리가 예산을 채우면 뒤 하위 쿼리의 행은 버리고 읽기도 멈춤), 합계가 max_rows 를 넘으면 잘린 결과
+        시간 예산은 모든 하위 쿼리가 같은 마감 시각을 공유하고, 하나가 실패하면 나머지도 중단
+        """
+        keep = self._row_limit(max_rows) + 1
+        chunk = min(keep, _PARTITION_CHUNK)
+        budget = self._time_budget(timeout)
+        deadline = time.monotonic() + budget if budget else None
+        failed = threading.Event()
+        interrupt = _AnyEvent(cancel_event, failed)
+        parts: List[List[tuple]] = [[] for _ in statements]
+        parts_lock = threading.Lock()
+
+        def claim(index: int, rows: List[tuple]) -> bool:
+            """읽은 행을 보관하고 예산 밖 행을 버림 -> 이 하위 쿼리가 더 읽어야 하면 True"""
+            with parts_lock:
+                parts[index].extend(rows)
+                start, more = 0, False
+                for i, held in enumerate(parts):
+                    del held[max(0, keep - start):]
+                    start += len(held)
+                    if i == index:
+                        # 앞쪽 하위 쿼리들의 행은 늘기만 하므로 여기서 예산이 차면 이 하위 쿼리의 뒷부분은 필요 없음
+                        more = start < keep
+                return more
+
+        def run(index: int):
+            sql, params = statements[index]
+            conn = self._connect()
+            part = _OpenCursor(conn, None, (), 0, label)
+            part.arm(budget, interrupt)
+            part.deadline = deadline
+            try:
+                cursor = conn.execute(sql, tuple(params))
+                while True:
+                    rows = cursor.fetchmany(chunk)
+                    if not claim(index, rows) or len(rows) < chunk:
+                        break
+                return tuple(d[0] for d in cursor.description or ()), None
+            except Exception as e:
+                failed.set()
+                return (), (part, e)
+            finally:
+                conn.close()
+
+        with self._lock:
+            self._metrics["executed"] += 1
+            self._metrics["partitioned"] += 1
+            self._metrics["partition_queries"] += len(statements)
+        outcomes = list(self._partition_pool.map(run, range(len(statements))))
+
+        errors = [error for _, error in outcomes if error is not None]
+        if errors:
+            # 다른 하위 쿼리 실패로 중단된 것이 아닌 원인 오류를 보고 (시간 초과/취소 집계는 한 번만)
+            part, error = next((pe for pe in errors if pe[0].interrupted != "cancelled"), errors[0])
+            if part.interrupted == "cancelled" and not (cancel_event is not None and cancel_event.is_set()):
+                part.interrupted = None
+            raise self._interrupt_error(part, error)
+
+        columns: Tuple[str, ...] = next((cols for cols, _ in outcomes if cols), ())
+        return columns, parts
+
+    def serve_rows(self, columns: Sequence[str], rows: Sequence[tuple], page_size: Optional[int] = None,
+                   label: str = "", max_rows: Optional[int] = None, cached: bool = False) -> ResultPage:
+        """이미 메모리에 있는 결과(캐시/머티리얼라이즈 병합 결과)를 같은 페이지 방식으로 제공 -> 첫 페이지"""
+        size = min(max(1, page_size or self.page_size), self.max_page_size)
+        entry = _OpenCursor(None, _CachedRows(tuple(rows)), tuple(columns), size, label)
+        entry.cached = cached
+        entry.max_rows = self._row_limit(max_rows)
+        return self._next_page(None, entry)
+
+    def fetch(self, token: str, cancel_event: Optional[threading.Event] = None) -> ResultPage:
+        """이어받기 토큰으로 다음 페이지 반환 (실행 시 정한 시간 예산이 이번 호출에 다시 적용됨)"""
+        with self._lock:
+            self._purge(time.monotonic())
+            entry = self._open.pop(token, None)
+        if entry is None:
+            raise CursorNotFoundError(f"만료되었거나 존재하지 않는 커서입니다: {token}")
+        entry.arm(None, cancel_event)
+        return self._next_page(token, entry)
+
+    def _time_budget(self, timeout: Optional[float]) -> Optional[float]:
+        return timeout if timeout is not None and timeout > 0 else self.timeout_seconds
+
+    def _row_limit(self, max_rows: Optional[int]) -> int:
+        return min(max(1, max_rows), self.max_rows) if max_rows else self.max_rows
+
+    def _interrupt_error(self, entry: _OpenCursor, error: Exception) -> Exception:
+        """progress handler 중단이면 시간 초과/취소 예외로 변환하고 집계 (그 외는 원래 예외)"""
+        if entry.interrupted is None or not isinstance(error, sqlite3.OperationalError):
+            return error
+        with self._lock:
+            if entry.interrupted == "timeout":
+                self._metrics["timeouts"] += 1
+                self._timeouts_by_label[entry.label] += 1
+            else:
+                self._metrics["cancelled"] += 1
+        if entry.interrupted == "timeout":
+            return QueryTimeoutError(f"시간 예산 {entry.timeout}s 초과로 실행을 중단했습니다 ({entry.label})")
+        return QueryCancelledError(f"호출이 취소되어 실행을 중단했습니다 ({entry.label})")
+
+    def _next_page(self, token: Optional[str], entry: _OpenCursor) -> ResultPage:
+        # 레지스트리에서 꺼낸 커서는 이 호출만 사용하므로 같은 토큰의 동시 요청과 경합하지 않음
+        with entry.lock:
+            want = min(entry.page_size, entry.max_rows - entry.offset)
+            try:
+                rows = entry.cursor.fetchmany(want)
+                # 상한에 닿으면 한 행을 더 읽어 남은 행이 있는지(잘림 여부) 확인
+                truncated = (len(rows) == want and entry.offset + want >= entry.max_rows
+                             and entry.cursor.fetchmany(1) != [])
+            except Exception as e:
+                entry.close()
+                raise self._interrupt_error(entry, e)
+            finally:
+                entry.cancel_event = None
+            exhausted = len(rows) < want
+            entry.page += 1
+            page = ResultPage(entry.columns, rows, entry.page, entry.offset, None, entry.cached, truncated)
+            entry.offset += len(rows)
+
+            if entry.collect is not None:
+                key, scope, collected = entry.collect
+                collected.extend(rows)
+                if truncated or len(collected) > self.result_cache.max_entry_rows:
+                    entry.collect = None
+                elif exhausted:
+                    self.result_cache.put(key, scope[0], scope[1], entry.columns, collected)
+
+        with self._lock:
+            self._metrics["pages"] += 1
+            self._metrics["rows"] += len(rows)
+            if truncated:
+                self._metrics["truncated"] += 1
+
+        # 결과 끝 또는 행 상한 도달 -> 연결 반환
+        if exhausted or truncated or entry.offset >= entry.max_rows:
+            entry.close()
+            return page
+
+        token = token or secrets.token_urlsafe(12)
+        now = time.monotonic()
+        entry.expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._purge(now)
+            while len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+                self._metrics["evicted"] += 1
+            self._open[token] = entry
+        return page._replace(cursor=token)
+
+    def close(self, token: str) -> bool:
+        """남은 결과를 버리고 커서 종료"""
+        with self._lock:
+            entry = self._open.pop(token, None)
+        if entry is None:
+            return False
+        entry.close()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["open_cursors"] = len(self._open)
+            snapshot["timeouts_by_label"] = dict(self._timeouts_by_label.most_common(5))
+        return snapshot
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._open.values())
+            self._open.clear()
+        for entry in entries:
+            entry.close()
+        self._partition_pool.shutdown(wait=False)
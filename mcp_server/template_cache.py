@@ -0,0 +1,198 @@
+"""
+Template Cache - 마스터 쿼리 템플릿 메모리 캐시
+역할: TB_QUERY_ASSET + query_joins / query_select_columns / query_where_conditions 를 조립한
+      불변 템플릿 객체를 LRU 로 보관하여, get_query_details / modify_where_conditions 가 매 호출마다
+      같은 행을 다시 읽지 않도록 함 (load_json_data.py 가 올리는 카탈로그 세대 번호로 자동 무효화)
+구동자: query_mcp_server.py
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+
+class SelectColumn(NamedTuple):
+    alias: Optional[str]
+    expression: Optional[str]
+    table_name: Optional[str]
+    column_name: Optional[str]
+    aggregation: Optional[str]
+    category: str
+
+
+class JoinSpec(NamedTuple):
+    join_type: str
+    table_name: str
+    on_condition: str
+    relationship: Optional[str]
+
+
+class WhereCondition(NamedTuple):
+    column_name: str
+    operator: str
+    value: Any
+    condition_type: Optional[str]
+
+
+class QueryTemplate(NamedTuple):
+    """조립된 마스터 템플릿 (modification_count 처럼 서버가 갱신하는 값은 포함하지 않음)"""
+    asset_id: int
+    query_id: str
+    question: str
+    description: Optional[str]
+    unit_type: Optional[str]
+    unit_description: Optional[str]
+    entities: Tuple[str, ...]
+    presentation_type: Optional[str]
+    chart_type: Optional[str]
+    from_table: Optional[str]
+    group_by: Tuple[str, ...]
+    order_by: Tuple[str, ...]
+    normalized_sql: Optional[str]
+    created_at: Optional[str]
+    tags: Optional[str]
+    complexity: Optional[str]
+    joins: Tuple[JoinSpec, ...]
+    where_conditions: Tuple[WhereCondition, ...]
+    select_columns: Tuple[SelectColumn, ...]
+
+    def columns_for(self, category: str) -> Tuple[SelectColumn, ...]:
+        """카테고리별 SELECT 컬럼 (해당 카테고리가 없으면 'all')"""
+        columns = tuple(c for c in self.select_columns if c.category == category)
+        return columns or tuple(c for c in self.select_columns if c.category == 'all')
+
+    def partition_conditions(self) -> Tuple[WhereCondition, ...]:
+        """원본 WHERE 중 파티션 키 조건 (condition_type 'partition_key')"""
+        return tuple(c for c in self.where_conditions if c.condition_type == 'partition_key')
+
+
+def _json_tuple(raw: Optional[str]) -> Tuple:
+    return tuple(json.loads(raw)) if raw else ()
+
+
+def load_template(conn, query_id: str) -> Optional[QueryTemplate]:
+    """마스터 DB 에서 템플릿 하나를 조립 (없으면 None)"""
+    asset = conn.execute("SELECT * FROM TB_QUERY_ASSET WHERE query_id = ?", (query_id,)).fetchone()
+    if asset is None:
+        return None
+    joins = conn.execute(
+        "SELECT join_type, table_name, on_condition, relationship FROM query_joins WHERE query_id = ? ORDER BY id",
+        (query_id,)
+    ).fetchall()
+    conditions = conn.execute(
+        "SELECT column_name, operator, value, condition_type FROM query_where_conditions WHERE query_id = ? ORDER BY id",
+        (query_id,)
+    ).fetchall()
+    columns = conn.execute(
+        "SELECT alias, expression, table_name, column_name, aggregation, category "
+        "FROM query_select_columns WHERE query_id = ? ORDER BY category, id",
+        (query_id,)
+    ).fetchall()
+    presentation_config = json.loads(asset['presentation_config']) if asset['presentation_config'] else {}
+
+    return QueryTemplate(
+        asset_id=asset['id'],
+        query_id=asset['query_id'],
+        question=asset['question'],
+        description=asset['description'],
+        unit_type=asset['unit_type'],
+        unit_description=asset['unit_description'],
+        entities=_json_tuple(asset['entities']),
+        presentation_type=asset['presentation_type'],
+        chart_type=presentation_config.get('chart_type'),
+        from_table=asset['from_table'],
+        group_by=_json_tuple(asset['group_by']),
+        order_by=_json_tuple(asset['order_by']),
+        normalized_sql=asset['normalized_sql'],
+        created_at=asset['created_at'],
+        tags=asset['tags'],
+        complexity=asset['complexity'],
+        joins=tuple(JoinSpec(*row) for row in joins),
+        where_conditions=tuple(WhereCondition(*row) for row in conditions),
+        select_columns=tuple(SelectColumn(*row) for row in columns),
+    )
+
+
+class TemplateCache:
+    """
+    query_id -> QueryTemplate LRU 캐시
+    조회할 때마다 TB_CATALOG_STATE.generation 을 확인하여 마이그레이션으로 카탈로그가 바뀌었으면 전체 비움
+    템플릿별로 컴파일된 스켈레톤((query_id, category) 단위)도 함께 보관하여 같이 무효화/제거됨
+    """
+
+    def __init__(self, pool, max_entries: int = 1024):
+        self.pool = pool
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, QueryTemplate]" = OrderedDict()
+        self._skeletons: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+        self._generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, query_id: str) -> Optional[QueryTemplate]:
+        with self.pool.read() as conn:
+            generation = conn.execute("SELECT generation FROM TB_CATALOG_STATE WHERE id = 1").fetchone()[0]
+            with self._lock:
+                if generation != self._generation:
+                    if self._entries:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self._skeletons.clear()
+                    self._generation = generation
+                template = self._entries.get(query_id)
+                if template is not None:
+                    self._entries.move_to_end(query_id)
+                    self.hits += 1
+                    return template
+                self.misses += 1
+
+            template = load_template(conn, query_id)
+
+        if template is not None:
+            with self._lock:
+                # 조립하는 사이 다른 스레드가 새 세대를 관측했으면 오래된 객체는 넣지 않음
+                if generation == self._generation:
+                    self._entries[query_id] = template
+                    self._entries.move_to_end(query_id)
+                    while len(self._entries) > self.max_entries:
+                        evicted, _ = self._entries.popitem(last=False)
+                        for key in [k for k in self._skeletons if k[0] == evicted]:
+                            del self._skeletons[key]
+                        self.evictions += 1
+        return template
+
+    def get_skeleton(self, query_id: str, category: str, compile_fn: Callable[[QueryTemplate, str], Any]):
+        """
+        (템플릿, 컴파일된 스켈레톤) 조회 -> 템플릿이 없으면 (None, None)
+        스켈레톤은 템플릿이 캐시에 있는 동안 (query_id, category) 별로 한 번만 compile_fn 으로 생성
+        """
+        template = self.get(query_id)
+        if template is None:
+            return None, None
+        key = (query_id, category)
+        with self._lock:
+            skeleton = self._skeletons.get(key)
+        if skeleton is None:
+            skeleton = compile_fn(template, category)
+            with self._lock:
+                # 템플릿이 그 사이 교체/제거되었으면 보관하지 않음
+                if self._entries.get(query_id) is template:
+                    self._skeletons[key] = skeleton
+        return template, skeleton
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "skeletons": len(self._skeletons),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "generation": self._generation,
+            }
@@ -0,0 +1,139 @@
+"""
+AST Analyzer Benchmark - _analyze_ast 단일 순회 성능 측정
+역할: 대형 리포트 SQL(다수의 CTE/JOIN/서브쿼리)을 생성하여 기존 find/find_all 반복 방식과
+      단일 순회 방식(SQLQueryAnalyzer._analyze_ast)의 쿼리당 소요 시간을 비교
+구동자: 관리자 (분석기 수정 후 성능 회귀 확인용 수동 실행)
+
+사용법: python tools/benchmark/bench_analyze_ast.py [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+# 프로젝트 루트 추가 및 설정 로드
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlglot import exp, parse_one
+from engine.sql_analyzer import SQLQueryAnalyzer
+
+
+def generate_sql(cte_count: int, column_count: int, join_count: int, condition_count: int) -> str:
+    """CTE/컬럼/JOIN/조건 수를 지정하여 리포트형 대형 SQL 생성"""
+    ctes = []
+    for i in range(cte_count):
+        ctes.append(
+            f"cte_{i} AS (\n"
+            f"    SELECT A.id, A.base_date, B.route_id, SUM(A.amount) AS total_{i}\n"
+            f"    FROM Fact_{i} A\n"
+            f"    INNER JOIN Dim_{i} B ON A.dim_id = B.dim_id\n"
+            f"    WHERE A.base_date >= '20250101' AND B.use_yn = 'Y' AND A.amount > {i}\n"
+            f"    GROUP BY A.id, A.base_date, B.route_id\n"
+            f")"
+        )
+
+    columns = [f"    T.col_{i} AS c_{i}" for i in range(column_count)]
+    columns += [f"    COUNT(C{i % max(cte_count, 1)}.id) AS cnt_{i}" for i in range(column_count // 4)]
+
+    joins = [f"INNER JOIN Join_{i} J{i} ON T.join_{i}_id = J{i}.join_{i}_id" for i in range(join_count)]
+    joins += [f"LEFT JOIN cte_{i} C{i} ON T.id = C{i}.id" for i in range(cte_count)]
+
+    conditions = [f"T.attr_{i} = '{i:04d}'" for i in range(condition_count)]
+    conditions.append("T.base_date BETWEEN '20250101' AND '20251231'")
+    conditions.append("T.route_id IN (SELECT route_id FROM Route_Master WHERE use_yn = 'Y' AND route_type IN (1, 2, 3))")
+
+    with_clause = "WITH " + ",\n".join(ctes) + "\n" if ctes else ""
+    return (
+        with_clause +
+        "SELECT\n" + ",\n".join(columns) + "\n"
+        "FROM Trip_Log T\n" + "\n".join(joins) + "\n"
+        "WHERE " + "\n  AND ".join(conditions) + "\n"
+        "GROUP BY " + ", ".join(f"T.col_{i}" for i in range(column_count)) + "\n"
+        "ORDER BY " + ", ".join(f"c_{i}" for i in range(min(column_count, 5)))
+    )
+
+
+def legacy_analyze_ast(ast: exp.Expression):
+    """기존 구현 (find/find_all 반복 호출) - 비교 기준용으로 추출 단계만 재현"""
+    select_columns, joins, where_conditions, group_by, order_by = [], [], [], [], []
+    from_table = "Unknown"
+
+    from_exp = ast.find(exp.From)
+    if from_exp:
+        for source in from_exp.find_all(exp.Table):
+            from_table = source.sql()
+            break
+
+    for projection in ast.find_all(exp.Select):
+        for expression in projection.expressions:
+            if isinstance(expression, exp.Alias):
+                agg = expression.find(exp.AggFunc).sql() if expression.find(exp.AggFunc) else None
+                select_columns.append((expression.alias, expression.this.sql(), agg))
+            elif isinstance(expression, exp.Column):
+                select_columns.append((expression.name, expression.sql(), None))
+        break
+
+    for join in ast.find_all(exp.Join):
+        on_arg = join.args.get("on")
+        joins.append((join.this.sql(), on_arg.sql() if on_arg else ""))
+
+    if ast.find(exp.Where):
+        where_node = ast.find(exp.Where)
+        for cond in where_node.find_all(exp.EQ, exp.GT, exp.LT, exp.GTE, exp.LTE, exp.NEQ, exp.In, exp.Between):
+            where_conditions.append((cond.this.sql(), type(cond).__name__))
+
+    if ast.find(exp.Group):
+        for grp in ast.find(exp.Group).expressions:
+            group_by.append(grp.sql())
+
+    if ast.find(exp.Order):
+        for o in ast.find(exp.Order).expressions:
+            order_by.append(o.sql())
+
+    return select_columns, from_table, joins, where_conditions, group_by, order_by, ast.sql()
+
+
+def measure(func, repeat: int) -> float:
+    """반복 실행 후 중앙값(ms) 반환"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run_benchmark(repeat: int):
+    analyzer = SQLQueryAnalyzer(use_cache=False)
+    scenarios = [
+        ("small (CTE 0)", dict(cte_count=0, column_count=8, join_count=2, condition_count=3)),
+        ("medium (CTE 5)", dict(cte_count=5, column_count=40, join_count=5, condition_count=10)),
+        ("large (CTE 20)", dict(cte_count=20, column_count=120, join_count=10, condition_count=30)),
+        ("xlarge (CTE 50)", dict(cte_count=50, column_count=300, join_count=20, condition_count=60)),
+    ]
+
+    print(f"\n⏱️ _analyze_ast 벤치마크 (반복 {repeat}회 중앙값, {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})\n")
+    print(f"{'scenario':<18}{'lines':>7}{'nodes':>8}{'legacy ms':>12}{'single ms':>12}{'speedup':>10}")
+
+    for name, spec in scenarios:
+        sql = generate_sql(**spec)
+        ast = parse_one(sql)
+        node_count = sum(1 for _ in ast.walk())
+
+        legacy_ms = measure(lambda: legacy_analyze_ast(ast), repeat)
+        single_ms = measure(lambda: analyzer._analyze_ast(ast, "bench", "bench", sql), repeat)
+
+        print(f"{name:<18}{sql.count(chr(10)) + 1:>7}{node_count:>8}{legacy_ms:>12.2f}{single_ms:>12.2f}{legacy_ms / single_ms:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="_analyze_ast benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="시나리오별 반복 횟수 (기본: 20)")
+    args = parser.parse_args()
+    run_benchmark(args.repeat)
@@ -0,0 +1,123 @@
+"""
+MCP Concurrency Benchmark - 동시 클라이언트 수에 따른 도구 처리량 측정
+역할: SSE 모드처럼 하나의 이벤트 루프가 여러 세션을 처리하는 상황을 재현하여, 동시 클라이언트 1~64 개가
+      search_queries / get_query_details / execute_query 를 반복 호출할 때의 초당 처리량과 지연을 측정
+      - async: 현재 도구 (DB 작업을 제한된 작업 스레드에서 실행, mcp.call_tool 경유)
+      - sync: 기존 방식 재현 (동기 구현을 이벤트 루프에서 직접 호출하여 호출끼리 직렬화)
+구동자: 관리자 (서버 동시성 관련 수정 후 성능 확인용 수동 실행)
+
+사용법: python tools/benchmark/bench_mcp_concurrency.py [--clients 1,2,4,8,16,32,64] [--duration 3] [--no-result-cache]
+        [--target-latency-ms 20]
+      --target-latency-ms: 원격 대상 DB 의 왕복 지연을 흉내 내기 위해 대상 DB 연결마다 지정한 시간만큼 대기
+      (로컬 SQLite 대체 DB 는 지연이 거의 없어 CPU 1 개 환경에서는 스레드 전환 비용만 드러나므로)
+전제: load_json_data.py 로 마스터 DB 가 만들어져 있고 config target_database.path 에 대상 DB 가 있어야 함
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+import anyio
+
+# 프로젝트 루트 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from mcp_server import query_mcp_server as server
+
+
+def build_workload(query_id: str, search_text: str, page_size: int):
+    """(도구 이름, 인자, 동기 구현 호출) 목록 - 클라이언트마다 순서대로 반복"""
+    return [
+        ("search_queries", {"search_text": search_text, "limit": 10},
+         lambda: server._search_queries(search_text, None, 10, 'text')),
+        ("get_query_details", {"query_id": query_id},
+         lambda: server._get_query_details(query_id)),
+        ("execute_query", {"query_id": query_id, "page_size": page_size},
+         lambda: server._execute_query(query_id, page_size, None, None, "text", None, None)),
+    ]
+
+
+async def run_level(mode: str, clients: int, duration: float, workload) -> dict:
+    """동시 클라이언트 clients 개로 duration 초 동안 반복 호출 -> 처리량/지연"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def client(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            name, arguments, sync_call = workload[i % len(workload)]
+            started = time.perf_counter()
+            if mode == "async":
+                await server.mcp.call_tool(name, arguments)
+            else:
+                sync_call()
+                # 직접 호출은 양보 지점이 없으므로 한 번 양보하여 다른 클라이언트가 요청을 보낼 수 있게 함
+                await anyio.sleep(0)
+            latencies.append(time.perf_counter() - started)
+            i += 1
+
+    started = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for c in range(clients):
+            tg.start_soon(client, c)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 도구 동시성 벤치마크")
+    parser.add_argument("--clients", default="1,2,4,8,16,32,64", help="동시 클라이언트 수 목록 (쉼표 구분)")
+    parser.add_argument("--duration", type=float, default=3.0, help="단계별 측정 시간 (초)")
+    parser.add_argument("--query-id", default="v_unit_test", help="상세 조회/실행할 쿼리 ID")
+    parser.add_argument("--search-text", default="노선", help="검색어")
+    parser.add_argument("--page-size", type=int, default=100, help="execute_query 페이지 크기")
+    parser.add_argument("--modes", default="sync,async", help="측정할 방식 (sync,async)")
+    parser.add_argument("--no-result-cache", action="store_true", help="결과 캐시를 끄고 매번 대상 DB 실행")
+    parser.add_argument("--target-latency-ms", type=float, default=0.0, help="대상 DB 연결당 추가 지연 (원격 DB 흉내)")
+    args = parser.parse_args()
+
+    if args.no_result_cache:
+        server.RESULT_CURSORS.result_cache = None
+    if args.target_latency_ms > 0:
+        connect = server.RESULT_CURSORS._connect
+        latency = args.target_latency_ms / 1000
+
+        def slow_connect():
+            time.sleep(latency)
+            return connect()
+        server.RESULT_CURSORS._connect = slow_connect
+    workload = build_workload(args.query_id, args.search_text, args.page_size)
+
+    # 예열 (템플릿 캐시/연결 풀/스켈레톤 준비)
+    for _, _, sync_call in workload:
+        sync_call()
+
+    levels = [int(c) for c in args.clients.split(",")]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    print(f"🚀 MCP 동시성 벤치마크 ({datetime.now():%Y-%m-%d %H:%M:%S})")
+    print(f"   작업 스레드 {server._READ_LIMITER.total_tokens}개, 단계별 {args.duration}s, "
+          f"결과 캐시 {'끔' if args.no_result_cache else '켬'}, 대상 DB 지연 {args.target_latency_ms}ms, CPU {os.cpu_count()}개\n")
+    print(f"{'mode':<6} {'clients':>7} {'calls':>8} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode in modes:
+        for clients in levels:
+            result = anyio.run(run_level, mode, clients, args.duration, workload)
+            print(f"{mode:<6} {clients:>7} {result['calls']:>8} {result['throughput']:>10.1f} "
+                  f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+SQL Rebuilder Benchmark - 스켈레톤 컴파일 방식 성능 측정
+역할: modify_where_conditions 의 SQL 생성 단계를 기존 방식(매 호출 전체 재조립)과
+      스켈레톤 방식(템플릿당 1회 compile 후 WHERE 절만 render)으로 각각 실행하여
+      출력이 완전히 같은지 확인하고 호출당 소요 시간을 비교
+구동자: 관리자 (rebuilder 수정 후 성능 회귀 확인용 수동 실행)
+
+사용법: python tools/benchmark/bench_rebuilder.py [--repeat 20000]
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+# 프로젝트 루트 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from mcp_server.llm_query_rebuilder import SQLRebuilder
+
+
+def legacy_rebuild(select_columns, from_table, joins, where_conditions, group_by=None, order_by=None) -> str:
+    """기존 구현 (호출마다 모든 절을 다시 조립) - 비교 기준용"""
+    select_parts = []
+    for col in select_columns:
+        expr = col.get('expression')
+        alias = col.get('alias')
+        if alias and alias != expr and " AS " not in expr.upper():
+            clean_alias = alias.strip("'\"")
+            select_parts.append(f"{expr} AS '{clean_alias}'")
+        else:
+            select_parts.append(expr)
+    select_clause = "SELECT\n    " + ",\n    ".join(select_parts)
+    from_clause = f"FROM {from_table}"
+    join_clause = "\n".join(f"{j['join_type']} {j['table_name']} ON {j['on_condition']}" for j in joins)
+    where_parts = []
+    for cond in where_conditions:
+        col_name = cond.get('column') or cond.get('column_name')
+        where_parts.append(f"{col_name} {cond['operator']} {cond['value']}")
+    where_clause = "WHERE " + "\n  AND ".join(where_parts) if where_parts else ""
+    group_by_clause = "GROUP BY " + ", ".join(group_by) if group_by else ""
+    order_by_clause = "ORDER BY " + ", ".join(order_by) if order_by else ""
+
+    query_parts = [select_clause, from_clause]
+    for clause in (join_clause, where_clause, group_by_clause, order_by_clause):
+        if clause:
+            query_parts.append(clause)
+    return "\n".join(query_parts)
+
+
+def generate_template(column_count: int, join_count: int):
+    """리포트형 템플릿 구성 요소 생성"""
+    select_columns = [
+        {"alias": f"'컬럼_{i}'", "expression": f"T{i % max(join_count, 1)}.col_{i}"} for i in range(column_count)
+    ] + [{"alias": "cnt", "expression": "COUNT(T.trip_id)"}]
+    joins = [
+        {"join_type": "INNER JOIN" if i % 2 else "LEFT JOIN", "table_name": f"Dim_{i} T{i}", "on_condition": f"T.dim_{i}_id = T{i}.dim_{i}_id"}
+        for i in range(join_count)
+    ]
+    group_by = [f"T{i % max(join_count, 1)}.col_{i}" for i in range(column_count)]
+    order_by = ["cnt DESC"]
+    return dict(select_columns=select_columns, from_table="Trip_Log T", joins=joins, group_by=group_by, order_by=order_by)
+
+
+def condition_variants(count: int):
+    """요청마다 달라지는 WHERE 조건 (빈 조건 포함)"""
+    variants = [[]]
+    for i in range(1, count):
+        variants.append([
+            {"column": "T.base_date", "operator": "=", "value": f"'2025{i % 12 + 1:02d}01'"},
+            {"column": "R.route_nm", "operator": "IN", "value": f"('{i}', '{i + 1}')"},
+            {"column_name": "T.amount", "operator": ">", "value": str(i)},
+        ][: 1 + i % 3])
+    return variants
+
+
+def measure_us(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def run_benchmark(repeat: int):
+    scenarios = [
+        ("small", dict(column_count=5, join_count=2)),
+        ("medium", dict(column_count=20, join_count=6)),
+        ("large", dict(column_count=80, join_count=15)),
+    ]
+    variants = condition_variants(16)
+
+    print(f"\n⏱️ SQLRebuilder 벤치마크 (호출당 평균, 반복 {repeat}회, {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})\n")
+    print(f"{'scenario':<10}{'legacy us':>12}{'compile us':>12}{'render us':>12}{'speedup':>10}")
+
+    for name, spec in scenarios:
+        parts = generate_template(**spec)
+        skeleton = SQLRebuilder.compile(**parts)
+
+        # 출력 동일성 확인 (기존 방식 / rebuild / 스켈레톤 render)
+        for where in variants:
+            expected = legacy_rebuild(where_conditions=where, **parts)
+            assert SQLRebuilder.rebuild(where_conditions=where, **parts) == expected, f"{name}: rebuild 출력 불일치"
+            assert skeleton.render(where) == expected, f"{name}: render 출력 불일치"
+
+        state = {"i": 0}
+
+        def next_where():
+            state["i"] = (state["i"] + 1) % len(variants)
+            return variants[state["i"]]
+
+        legacy_us = measure_us(lambda: legacy_rebuild(where_conditions=next_where(), **parts), repeat)
+        compile_us = measure_us(lambda: SQLRebuilder.compile(**parts), max(1, repeat // 10))
+        render_us = measure_us(lambda: skeleton.render(next_where()), repeat)
+        print(f"{name:<10}{legacy_us:>12.2f}{compile_us:>12.2f}{render_us:>12.2f}{legacy_us / render_us:>9.1f}x")
+
+    print("\n✅ 모든 조건 조합에서 기존 방식과 출력 동일")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLRebuilder skeleton benchmark")
+    parser.add_argument("--repeat", type=int, default=20000, help="시나리오별 반복 횟수 (기본: 20000)")
+    args = parser.parse_args()
+    run_benchmark(args.repeat)
@@ -0,0 +1,128 @@
+"""
+Response Size Benchmark - 도구별 응답 크기 비교 (text vs compact)
+역할: 같은 인자로 각 MCP 도구를 response_format='text' / 'compact' 로 호출하여 응답 바이트 수와 토큰 수를 비교
+      - 토큰 수는 tiktoken(cl100k_base)이 설치되어 있으면 실제 값, 없으면 문자 종류별 근사치(추정)
+      - modify_where_conditions 는 예열 호출 후 측정하여 두 형식 모두 같은 경로(기존 생성 쿼리 재사용)를 비교
+      - 오류 응답을 돌려준 도구는 비교에서 제외하고 오류를 표시
+구동자: 관리자 (응답 형식 관련 수정 후 확인용 수동 실행)
+
+사용법: python tools/benchmark/bench_response_size.py [--query-id v_unit_test] [--search-text 노선] [--limit 10] [--page-size 100]
+전제: load_json_data.py 로 마스터 DB 가 만들어져 있고 config target_database.path 에 대상 DB 가 있어야 함
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+
+import anyio
+
+# 프로젝트 루트 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from mcp_server import query_mcp_server as server
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODING = None
+
+# 근사 토큰: 영문 단어 / 숫자 3자리 / 한글 1글자 / 연속 기호 2개(JSON 의 '",' 처럼 붙어 나오는 구분자)를 각각 토큰 하나로 계산
+_APPROX_TOKEN = re.compile(r"[A-Za-z]+|\d{1,3}|[가-힣]|[^\sA-Za-z\d가-힣]{1,2}")
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(_APPROX_TOKEN.findall(text))
+
+
+async def call(name: str, arguments: dict) -> str:
+    result = await server.mcp.call_tool(name, arguments)
+    content = result[0] if isinstance(result, tuple) else result
+    return "".join(getattr(c, "text", "") for c in content)
+
+
+def first_cursor(text: str):
+    """execute_query 응답(두 형식 모두)에서 cursor 값 추출"""
+    body = text[text.index("{"):]
+    return json.loads(body).get("cursor")
+
+
+def build_cases(args) -> list:
+    """(도구 이름, 공통 인자) 목록"""
+    condition = {"column": "T.base_date", "operator": "=", "value": "'20251219'"}
+    variants = [[{**condition, "value": f"'202512{day:02d}'"}] for day in range(15, 22)]
+    return [
+        ("search_queries", {"search_text": args.search_text, "limit": args.limit}),
+        ("list_queries", {"limit": args.limit}),
+        ("get_query_details", {"query_id": args.query_id}),
+        ("modify_where_conditions", {"query_id": args.query_id, "new_conditions": json.dumps([condition]),
+                                     "category": "all"}),
+        ("check_system_status", {}),
+        ("execute_query", {"query_id": args.query_id, "page_size": args.page_size}),
+        ("fetch_next_page", {}),
+        ("batch_execute_variants", {"query_id": args.query_id, "condition_sets": json.dumps(variants)}),
+    ]
+
+
+async def measure(args) -> tuple:
+    results, skipped = [], []
+    for name, arguments in build_cases(args):
+        sizes = {}
+        if name == "modify_where_conditions":
+            await call(name, arguments)
+        for fmt in ("text", "compact"):
+            call_args = {**arguments, "response_format": fmt}
+            if name == "fetch_next_page":
+                # 형식마다 커서를 새로 열어 두 번째 페이지를 비교
+                opened = await call("execute_query", {"query_id": args.query_id, "page_size": max(1, args.page_size // 10),
+                                                      "response_format": fmt})
+                call_args["cursor"] = first_cursor(opened)
+                if call_args["cursor"] is None:
+                    break
+            text = await call(name, call_args)
+            if text.startswith(("❌", "⏱️", '{"error"')):
+                skipped.append((name, text.strip()[:120]))
+                break
+            sizes[fmt] = (len(text.encode("utf-8")), count_tokens(text))
+        if len(sizes) == 2:
+            results.append((name, sizes["text"], sizes["compact"]))
+    return results, skipped
+
+
+def _change(before: int, after: int) -> str:
+    return f"{(after - before) / before * 100:+.0f}%" if before else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 도구 응답 크기 벤치마크 (text vs compact)")
+    parser.add_argument("--query-id", default="v_unit_test", help="상세 조회/수정/실행할 쿼리 ID")
+    parser.add_argument("--search-text", default="노선", help="검색어")
+    parser.add_argument("--limit", type=int, default=10, help="search_queries / list_queries 결과 수")
+    parser.add_argument("--page-size", type=int, default=100, help="execute_query 페이지 크기")
+    args = parser.parse_args()
+
+    results, skipped = anyio.run(measure, args)
+    token_label = "tiktoken cl100k_base" if _ENCODING is not None else "추정 (tiktoken 미설치)"
+    print(f"📏 응답 크기 벤치마크 ({datetime.now():%Y-%m-%d %H:%M:%S}), 토큰: {token_label}\n")
+    print(f"{'tool':<26} {'text B':>8} {'compact B':>10} {'bytes':>7} {'text tok':>9} {'compact tok':>12} {'tokens':>7}")
+    totals = [0, 0, 0, 0]
+    for name, (text_bytes, text_tokens), (compact_bytes, compact_tokens) in results:
+        totals = [a + b for a, b in zip(totals, (text_bytes, compact_bytes, text_tokens, compact_tokens))]
+        print(f"{name:<26} {text_bytes:>8} {compact_bytes:>10} {_change(text_bytes, compact_bytes):>7} "
+              f"{text_tokens:>9} {compact_tokens:>12} {_change(text_tokens, compact_tokens):>7}")
+    print(f"{'total':<26} {totals[0]:>8} {totals[1]:>10} {_change(totals[0], totals[1]):>7} "
+          f"{totals[2]:>9} {totals[3]:>12} {_change(totals[2], totals[3]):>7}")
+    for name, error in skipped:
+        print(f"⚠️ {name}: 오류 응답으로 제외 ({error})")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,12 @@ Verify All - 시스템 종합 검진 스크립트
 
 import sys
 import os
+import re
 import sqlite3
 import json
 
+import anyio
+
 # 프로젝트 루트를 Python 경로에 추가 및 설정 로드
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
@@ -18,7 +21,7 @@ from config.loader import CFG
 
 from engine.sql_analyzer import SQLQueryAnalyzer
 from engine.load_json_data import QueryIndexerDB
-from mcp_server.query_mcp_server import modify_where_conditions, get_query_details
+from mcp_server.query_mcp_server import modify_where_conditions, get_query_details, execute_query, batch_execute_variants
 
 def verify_end_to_end():
     print("Step 1: Parsing SQL to JSON (Testing Unit Classification)")
@@ -45,17 +48,52 @@ def verify_end_to_end():
     
     print("\nStep 3: Modifying conditions with 'basic' category")
     new_conds = json.dumps([
-        {"column": "Trip_Log.base_date", "operator": "=", "value": "'20251225'", "type": "partition_key"}
+        {"column": "T.base_date", "operator": "=", "value": "'20251219'", "type": "partition_key"}
     ])
     
     # 'basic' 카테고리 및 사용자 질문 로깅 테스트
-    user_q = "2025년 크리스마스날 노선의 승차 로그를 요약해서 보여줘"
-    modify_result = modify_where_conditions("v_unit_test", new_conds, user_question=user_q, category="basic")
+    user_q = "2025년 12월 19일 노선의 승차 로그를 요약해서 보여줘"
+    # MCP 도구는 async 이므로 이벤트 루프에서 호출
+    modify_result = anyio.run(lambda: modify_where_conditions("v_unit_test", new_conds, user_question=user_q, category="basic"))
     print(modify_result)
     
     print("\nStep 4: Verifying Regenerated SQL (Basic Category)")
-    details = get_query_details("v_unit_test_modified_1")
+    # 같은 조건으로 이미 생성된 쿼리가 있으면 그 ID 가 재사용됨
+    match = re.search(r"(?:새|기존) 쿼리: (\S+)", modify_result)
+    modified_id = match.group(1) if match else "v_unit_test_modified_1"
+    details = anyio.run(get_query_details, modified_id)
     print(details)
 
+    print("\nStep 5: Executing Regenerated SQL on Target DB")
+    # 생성된 바인딩 SQL(sql_shape)이 대상 DB 에서 실제로 실행되는지 확인 (JOIN 절 등 조립 오류 검출)
+    if not os.path.exists(CFG['TARGET_DB_PATH']):
+        print(f"  - 대상 DB 없음, 건너뜀: {CFG['TARGET_DB_PATH']}")
+        return
+    result = anyio.run(lambda: execute_query(modified_id, page_size=5, response_format="compact"))
+    page = json.loads(result)
+    if "error" in page:
+        print(f"❌ 생성 쿼리 실행 실패: {page['error']}")
+        sys.exit(1)
+    print(f"  - columns: {page['columns']}, rows: {len(page['values'][0]) if page['values'] else 0}")
+    print("✅ 생성 쿼리가 대상 DB 에서 실행되었습니다")
+
+    print("\nStep 6: Batch Executing Condition Variants on Target DB")
+    # IN 목록으로 합쳐지는 변형(base_date 값만 다름)과 UNION ALL 로 실행되는 변형(조건 구성이 다름) 모두 확인
+    small = {"column": "T.trip_id", "operator": "<", "value": "100"}
+    batches = {
+        "in_list": [[small, {"column": "T.base_date", "operator": "=", "value": f"'{day}'"}] for day in ("20251219", "20250301")],
+        "union_all": [[small, {"column": "T.base_date", "operator": "=", "value": "'20251219'"}],
+                      [{"column": "T.base_date", "operator": "BETWEEN", "value": "'20250301' AND '20250301'"},
+                       {"column": "T.trip_id", "operator": "<", "value": "50"}]],
+    }
+    for expected, variants in batches.items():
+        result = json.loads(anyio.run(lambda: batch_execute_variants(
+            "v_unit_test", json.dumps(variants), response_format="compact")))
+        if "error" in result or result["fused"] != expected:
+            print(f"❌ 변형 일괄 실행 실패 ({expected}): {result}")
+            sys.exit(1)
+        print(f"  - {result['fused']}: 변형별 행 수 {[v['row_count'] for v in result['variants']]}")
+    print("✅ 변형 일괄 실행이 대상 DB 에서 실행되었습니다")
+
 if __name__ == "__main__":
     verify_end_to_end()